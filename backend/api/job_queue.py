@@ -0,0 +1,394 @@
+"""Asynchronous job queue for scan processing.
+
+Uploads are persisted as ProcessingJob rows and handed to a bounded pool of
+worker tasks that run the processing pipeline off the request path.
+Reference: Section F2 - Processing time 5-60s per scan.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.config import settings
+from backend.database.connection import get_session_factory
+from backend.database.repositories import (
+    RoomRepository,
+    ObjectRepository,
+    JobRepository,
+    PatchRepository,
+    invalidate_room_on_commit
+)
+from backend.api.room_data import load_room_data
+from backend.processing.executor import PipelineExecutor, create_pipeline_executor
+from backend.utils.file_handler import cleanup_file
+from backend.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Settings that change processing output; part of the deduplication key
+PROCESSING_PARAMETERS = (
+    "voxel_size",
+    "voxel_downsampler",
+    "tiled_preprocessing_min_points",
+    "tile_size",
+    "tile_halo",
+    "outlier_neighbors",
+    "outlier_std_ratio",
+    "ransac_distance_threshold",
+    "ransac_iterations",
+    "ransac_mode",
+    "ransac_confidence",
+    "plane_detector",
+    "shared_spatial_index",
+    "geometry_backend",
+    "dbscan_eps",
+    "dbscan_min_samples",
+    "clustering_backend",
+    "lod_voxel_sizes",
+    "lod_patch_size",
+)
+
+# (content_hash, params_hash) -> room_id of a completed result
+result_cache = TTLCache(
+    max_size=settings.result_cache_size,
+    ttl_seconds=settings.result_cache_ttl
+)
+
+
+class QueueFullError(Exception):
+    """Raised when the processing queue cannot accept more jobs."""
+
+
+def new_job_id() -> str:
+    """Generate a unique job identifier."""
+    return f"job_{uuid.uuid4().hex[:12]}"
+
+
+def processing_params_hash() -> str:
+    """Fingerprint the processing settings that affect pipeline output."""
+    params = {name: getattr(settings, name) for name in PROCESSING_PARAMETERS}
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+async def lookup_completed_result(
+    session: AsyncSession,
+    content_hash: str,
+    params_hash: str
+) -> Optional[str]:
+    """Find an existing room processed from the same scan with the same settings.
+    
+    Checks the in-memory result cache first, then completed jobs in the
+    database (so deduplication survives restarts and spans API processes).
+    
+    Args:
+        session: Database session
+        content_hash: SHA-256 of the uploaded scan
+        params_hash: Result of processing_params_hash()
+        
+    Returns:
+        room_id or None if the scan has not been processed yet
+    """
+    key = (content_hash, params_hash)
+    room_repo = RoomRepository(session)
+    
+    room_id = result_cache.get(key)
+    if room_id is not None:
+        if await room_repo.get_room_by_id(room_id) is not None:
+            return room_id
+        # Room was deleted since it was cached
+        result_cache.invalidate(key)
+    
+    job = await JobRepository(session).find_job_by_content(content_hash, params_hash, ["done"])
+    if job is not None and job.room_id:
+        if await room_repo.get_room_by_id(job.room_id) is not None:
+            result_cache.set(key, job.room_id)
+            return job.room_id
+    
+    return None
+
+
+def convert_numpy_types(obj: Any) -> Any:
+    """Convert numpy types to native Python types for JSON serialization."""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    elif isinstance(obj, np.floating):
+        return float(obj)
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+    elif isinstance(obj, dict):
+        return {k: convert_numpy_types(v) for k, v in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return [convert_numpy_types(item) for item in obj]
+    return obj
+
+
+async def store_room_result(session: AsyncSession, room_data: Dict[str, Any]) -> str:
+    """Persist a processed room and its detected objects.
+    
+    Args:
+        session: Database session (caller commits)
+        room_data: Result of process_room_scan
+    
+    Returns:
+        str: Generated room_id
+    """
+    room_id = f"room_{uuid.uuid4().hex[:8]}"
+    
+    # Prepare metadata with converted types
+    metadata = {
+        "processing_time": convert_numpy_types(room_data["processing_time"]),
+        "cluster_stats": convert_numpy_types(room_data.get("cluster_stats", {})),
+        "plane_detection": convert_numpy_types(room_data.get("plane_stats", {})),
+        "spatial_index": convert_numpy_types(room_data.get("spatial_index", {})),
+        "voxel_grid": convert_numpy_types(room_data.get("voxel_grid", {})),
+        "tiling": convert_numpy_types(room_data.get("tiling", {})),
+        "lod": convert_numpy_types(room_data.get("lod_stats", {})),
+        "stage_profile": convert_numpy_types(room_data.get("stage_profile", []))
+    }
+    
+    room_repo = RoomRepository(session)
+    room = await room_repo.create_room(
+        room_id=room_id,
+        point_count=int(room_data["point_count"]),
+        processed_points=int(room_data["processed_points"]),
+        length=float(room_data["dimensions"]["length"]),
+        width=float(room_data["dimensions"]["width"]),
+        height=float(room_data["dimensions"]["height"]),
+        accuracy=room_data["dimensions"]["accuracy"],
+        scan_quality=float(room_data["scan_quality"]),
+        metadata=metadata
+    )
+    
+    # Store the level-of-detail pyramid
+    if room_data.get("lod_patches"):
+        await PatchRepository(session).create_patches(room.id, room_data["lod_patches"])
+    
+    # Store detected objects (one multi-row INSERT keyed by the room's primary key)
+    await ObjectRepository(session).create_objects(room.id, [
+        {
+            "object_type": obj["type"],
+            "position": [float(x) for x in obj["position"]],  # Ensure floats
+            "dimensions": {
+                "length": float(obj["dimensions"][0]),
+                "width": float(obj["dimensions"][1]),
+                "height": float(obj["dimensions"][2])
+            },
+            "volume": float(obj["volume"]),
+            "confidence": float(obj["confidence"]),
+            "classification_method": "geometric"
+        }
+        for obj in room_data["objects"]
+    ])
+    
+    # A cached response for this room_id (if any) predates this result
+    invalidate_room_on_commit(session, room_id)
+    
+    logger.info(f"Room processed and stored: {room_id}, {len(room_data['objects'])} objects detected")
+    return room_id
+
+
+class JobQueue:
+    """Bounded worker pool running process_room_scan for queued jobs.
+    
+    Job state lives in the processing_jobs table; the in-memory queue only
+    carries job ids, so unfinished jobs are re-queued on startup.
+    """
+    
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue_size: int,
+        executor: Optional[PipelineExecutor] = None
+    ):
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        # Execution backend for the pipeline (thread, process or inline)
+        self.executor = executor or PipelineExecutor("thread", max_workers)
+        # Callable returning an async context manager yielding an AsyncSession
+        self.session_factory: Optional[Callable[[], Any]] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._running = 0
+    
+    def _session(self):
+        factory = self.session_factory or get_session_factory()
+        if factory is None:
+            raise RuntimeError("Database session factory not initialized")
+        return factory()
+    
+    @property
+    def started(self) -> bool:
+        return self._queue is not None
+    
+    def is_full(self) -> bool:
+        """Check whether the queue is at capacity."""
+        return self._queue is not None and self._queue.full()
+    
+    def stats(self) -> Dict[str, int]:
+        """Queue status for health reporting."""
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": self._running,
+            "capacity": self.max_queue_size,
+            "backend": self.executor.backend,
+        }
+    
+    async def start(self) -> None:
+        """Start worker tasks and re-queue jobs left unfinished by a restart."""
+        if self.started:
+            return
+        
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self.executor.start()
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(self.max_workers)
+        ]
+        logger.info(f"Job queue started with {self.max_workers} workers")
+        
+        try:
+            await self._recover_jobs()
+        except Exception as e:
+            logger.warning(f"Job recovery skipped: {e}")
+    
+    async def stop(self) -> None:
+        """Cancel worker tasks. Unfinished jobs are recovered on next start."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await asyncio.to_thread(self.executor.shutdown)
+        self._queue = None
+        logger.info("Job queue stopped")
+    
+    async def submit(
+        self,
+        job_id: str,
+        file_path: str,
+        cache_key: Optional[Tuple[str, str]] = None
+    ) -> None:
+        """Queue a persisted job for processing.
+        
+        Args:
+            job_id: Job identifier (row must already be committed)
+            file_path: Path to uploaded scan
+            cache_key: (content_hash, params_hash) to record the result under
+        
+        Raises:
+            QueueFullError: If the queue is at capacity or not started
+        """
+        if self._queue is None:
+            raise QueueFullError("Job queue is not running")
+        try:
+            self._queue.put_nowait((job_id, file_path, cache_key))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Job queue full ({self.max_queue_size} jobs)")
+    
+    async def _recover_jobs(self) -> None:
+        async with self._session() as session:
+            repo = JobRepository(session)
+            jobs = await repo.get_unfinished_jobs()
+            # Queue.maxsize 0 is unbounded
+            free_slots = (
+                self._queue.maxsize - self._queue.qsize() if self._queue.maxsize > 0 else len(jobs)
+            )
+            requeue = []
+            dropped = []
+            for job in jobs:
+                if not (job.file_path and os.path.exists(job.file_path)):
+                    await repo.update_job(
+                        job.job_id,
+                        status="failed",
+                        error="Upload lost before processing completed (server restart)"
+                    )
+                elif len(requeue) < free_slots:
+                    await repo.update_job(job.job_id, status="queued", stage=None)
+                    cache_key = (job.content_hash, job.params_hash) if job.content_hash else None
+                    requeue.append((job.job_id, job.file_path, cache_key))
+                else:
+                    await repo.update_job(
+                        job.job_id,
+                        status="failed",
+                        error=f"Job queue full ({self.max_queue_size} jobs) after server restart"
+                    )
+                    dropped.append(job.file_path)
+            await session.commit()
+        
+        for item in requeue:
+            self._queue.put_nowait(item)
+        for file_path in dropped:
+            cleanup_file(file_path)
+        
+        if jobs:
+            logger.info(f"Recovered {len(requeue)} of {len(jobs)} unfinished jobs")
+    
+    async def _update(self, job_id: str, only_if_status: Optional[str] = None, **fields: Any) -> None:
+        async with self._session() as session:
+            await JobRepository(session).update_job(job_id, only_if_status=only_if_status, **fields)
+            await session.commit()
+    
+    async def _worker(self, worker_index: int) -> None:
+        while True:
+            job_id, file_path, cache_key = await self._queue.get()
+            self._running += 1
+            try:
+                await self._run_job(job_id, file_path, cache_key)
+            except Exception as e:
+                logger.error(f"Worker {worker_index} failed to record job {job_id}: {e}", exc_info=True)
+            finally:
+                self._running -= 1
+                self._queue.task_done()
+    
+    async def _run_job(
+        self,
+        job_id: str,
+        file_path: str,
+        cache_key: Optional[Tuple[str, str]] = None
+    ) -> None:
+        logger.info(f"Processing job {job_id}")
+        await self._update(job_id, status="running", stage="loading")
+        
+        loop = asyncio.get_running_loop()
+        
+        def on_stage(stage: str) -> None:
+            # Called from the processing thread; stage updates never overwrite a finished job
+            asyncio.run_coroutine_threadsafe(
+                self._update(job_id, only_if_status="running", stage=stage), loop
+            )
+        
+        try:
+            room_data = await self.executor.run_pipeline(file_path, on_stage)
+            
+            async with self._session() as session:
+                room_id = await store_room_result(session, room_data)
+                await JobRepository(session).update_job(
+                    job_id, status="done", stage="complete", room_id=room_id, error=None
+                )
+                await session.commit()
+                # Warm the room cache so the first reads after the job are hits
+                try:
+                    await load_room_data(session, room_id)
+                except Exception as e:
+                    logger.warning(f"Room cache warm-up failed for {room_id}: {e}")
+            if cache_key is not None:
+                result_cache.set(cache_key, room_id)
+            logger.info(f"Job {job_id} done: {room_id}")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}", exc_info=True)
+            await self._update(job_id, status="failed", error=f"Processing error: {str(e)}")
+        finally:
+            cleanup_file(file_path)
+
+
+# Global job queue instance (started in the application lifespan)
+job_queue = JobQueue(
+    max_workers=settings.job_workers,
+    max_queue_size=settings.job_queue_size,
+    executor=create_pipeline_executor()
+)
@@ -2,6 +2,7 @@
 
 Reference: Section E1 for API architecture.
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -9,12 +10,23 @@ import logging
 
 from backend.config import settings
 from backend.utils.logger import setup_logging, log_request_time
-from backend.api.routes import upload, rooms, analysis
+from backend.api.routes import upload, rooms, analysis, jobs
+from backend.api.job_queue import job_queue, result_cache
+from backend.utils.cache import room_cache
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop the processing job queue with the application."""
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+
+
 # Create FastAPI application
 app = FastAPI(
     title="3D Room Intelligence API",
@@ -23,6 +35,7 @@ app = FastAPI(
     docs_url="/api/docs",
     redoc_url="/api/redoc",
     openapi_url="/api/openapi.json",
+    lifespan=lifespan,
 )
 
 # CORS middleware configuration
@@ -32,6 +45,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],  # Lets browser clients send If-None-Match themselves
 )
 
 # Request timing middleware
@@ -41,6 +55,7 @@ app.middleware("http")(log_request_time)
 app.include_router(upload.router, prefix="/api", tags=["Upload"])
 app.include_router(rooms.router, prefix="/api/room", tags=["Rooms"])
 app.include_router(analysis.router, prefix="/api/room", tags=["Analysis"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
 
 
 @app.get("/")
@@ -54,6 +69,7 @@ async def root():
             "docs": "/api/docs",
             "health": "/api/health",
             "upload": "POST /api/upload-scan",
+            "job_status": "GET /api/jobs/{job_id}",
             "room_dimensions": "GET /api/room/{room_id}/dimensions",
             "room_objects": "GET /api/room/{room_id}/objects",
             "room_data": "GET /api/room/{room_id}/data",
@@ -67,11 +83,13 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     # TODO: Add database connectivity check
-    # TODO: Add processing queue status
     return {
         "status": "healthy",
         "version": "1.0.0",
         "database": "connected",  # Placeholder - implement actual check
+        "processing_queue": job_queue.stats(),
+        "result_cache": result_cache.stats(),
+        "room_cache": room_cache.stats(),
     }
 
 
@@ -4,6 +4,7 @@ Reference: Section E1 for API model specifications.
 """
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional
+from datetime import datetime
 
 
 class RoomDimensions(BaseModel):
@@ -93,6 +94,48 @@ class RoomData(BaseModel):
     )
 
 
+class StageProfile(BaseModel):
+    """Profile of one pipeline stage."""
+    stage: str = Field(..., description="Pipeline stage name")
+    wall_time: float = Field(..., description="Wall-clock time in seconds", ge=0)
+    cpu_time: float = Field(..., description="Process CPU time in seconds (all threads)", ge=0)
+    points_in: Optional[int] = Field(None, description="Points entering the stage")
+    points_out: Optional[int] = Field(None, description="Points produced by the stage")
+    rss_mb: float = Field(..., description="Process RSS at the end of the stage (MB)")
+    rss_growth_mb: float = Field(..., description="Change in process RSS over the stage (MB, negative if memory was freed)")
+    peak_rss_mb: float = Field(..., description="Process peak RSS at the end of the stage (MB)")
+    traced_peak_mb: Optional[float] = Field(None, description="Peak Python/NumPy allocations above the stage start (MB, tracemalloc)")
+
+
+class RoomProfile(BaseModel):
+    """Per-stage processing profile of a room."""
+    room_id: str = Field(..., description="Room identifier")
+    processing_time: Optional[float] = Field(None, description="Total processing time in seconds")
+    stages: List[StageProfile] = Field(..., description="Stages in pipeline order")
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "room_id": "room_001",
+                "processing_time": 19.2,
+                "stages": [
+                    {
+                        "stage": "preprocessing",
+                        "wall_time": 12.4,
+                        "cpu_time": 12.1,
+                        "points_in": 2000000,
+                        "points_out": 118085,
+                        "rss_mb": 512.0,
+                        "rss_growth_mb": 96.5,
+                        "peak_rss_mb": 806.0,
+                        "traced_peak_mb": None
+                    }
+                ]
+            }
+        }
+    )
+
+
 class ItemFitCheck(BaseModel):
     """Model for item fit checking request."""
     item_type: str = Field(..., description="Item type (e.g., 'table', 'sofa')")
@@ -153,6 +196,29 @@ class UploadResponse(BaseModel):
     objects_detected: int = Field(..., description="Number of objects detected", ge=0)
 
 
+class JobStatus(BaseModel):
+    """Model for asynchronous processing job status."""
+    job_id: str = Field(..., description="Job identifier")
+    status: str = Field(..., description="Job status: queued, running, done or failed")
+    stage: Optional[str] = Field(None, description="Current pipeline stage while running")
+    room_id: Optional[str] = Field(None, description="Room identifier once processing is done")
+    error: Optional[str] = Field(None, description="Error message if processing failed")
+    created_at: Optional[datetime] = Field(None, description="Job creation time")
+    updated_at: Optional[datetime] = Field(None, description="Last status change")
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "job_id": "job_3f9c2a1b7d4e",
+                "status": "running",
+                "stage": "plane_detection",
+                "room_id": None,
+                "error": None
+            }
+        }
+    )
+
+
 class OptimizationResult(BaseModel):
     """Model for layout optimization result."""
     room_id: str = Field(..., description="Room identifier")
@@ -0,0 +1,156 @@
+"""Read-through cache of built room responses.
+
+Rooms are written once when a scan is processed and then read many times by
+the room and analysis endpoints. load_room_data builds the RoomData response
+(dimensions, objects, point counts) from one repository call and keeps it in
+room_cache together with its pre-serialized JSON, so repeated reads neither
+query the database nor re-validate and re-serialize the models. The cache is
+per API process; rooms are invalidated when a transaction modifying them
+commits (see invalidate_room_on_commit) and expire after
+settings.room_cache_ttl.
+
+Each room also has a strong ETag built from its room_id and updated_at
+(bumped by the rooms update trigger), so conditional GETs can be answered
+from the cache or a one-column version lookup without loading objects.
+"""
+import logging
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.database.models import Room, DetectedObject
+from backend.database.repositories import RoomRepository
+from backend.api.models.schemas import RoomDimensions, SpatialObject, RoomData
+from backend.utils.cache import room_cache
+
+logger = logging.getLogger(__name__)
+
+_objects_adapter = TypeAdapter(List[SpatialObject])
+
+
+class CachedRoomData(NamedTuple):
+    """A built room response and its serialized forms."""
+    data: RoomData
+    data_json: bytes  # RoomData as JSON
+    objects_json: bytes  # RoomData.objects as a JSON array
+    etag: str  # Strong ETag of the room version (see room_etag)
+
+
+def room_etag(room_id: str, updated_at: Optional[datetime]) -> str:
+    """Strong ETag for a room version, e.g. "room_1a2b3c4d-1697461234567890"."""
+    version = int(updated_at.timestamp() * 1_000_000) if updated_at is not None else 0
+    return f'"{room_id}-{version}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header value matches an ETag.
+    
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, so a
+    W/ prefix added by a proxy still matches.
+    """
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def room_dimensions(room: Room) -> RoomDimensions:
+    """Build the dimensions response from a room row."""
+    return RoomDimensions(
+        length=room.length,
+        width=room.width,
+        height=room.height,
+        accuracy=room.accuracy
+    )
+
+
+def spatial_objects(objects: List[DetectedObject]) -> List[SpatialObject]:
+    """Convert detected object rows to response models."""
+    result = []
+    for obj in objects:
+        # Coordinates are projected with ST_X/ST_Y/ST_Z (None without a position)
+        position = [obj.position_x or 0.0, obj.position_y or 0.0, obj.position_z or 0.0]
+        
+        # Extract dimensions from JSONB
+        dims_dict = obj.dimensions if obj.dimensions else {}
+        dimensions = [
+            dims_dict.get("length", 0.0),
+            dims_dict.get("width", 0.0),
+            dims_dict.get("height", 0.0)
+        ]
+        
+        result.append(SpatialObject(
+            type=obj.object_type or "unknown",
+            position=position,
+            dimensions=dimensions,
+            volume=obj.volume or 0.0,
+            confidence=obj.confidence or 0.0
+        ))
+    return result
+
+
+def build_room_data(room: Room) -> CachedRoomData:
+    """Build and serialize the RoomData response of a room.
+    
+    Args:
+        room: Room with detected_objects loaded
+    
+    Returns:
+        CachedRoomData for the room
+    """
+    data = RoomData(
+        room_id=room.room_id,
+        dimensions=room_dimensions(room),
+        objects=spatial_objects(room.detected_objects),
+        point_count=room.point_count or 0,
+        processed_points=room.processed_points or 0
+    )
+    return CachedRoomData(
+        data=data,
+        data_json=data.model_dump_json().encode(),
+        objects_json=_objects_adapter.dump_json(data.objects),
+        etag=room_etag(room.room_id, room.updated_at)
+    )
+
+
+async def load_room_data(session: AsyncSession, room_id: str) -> Optional[CachedRoomData]:
+    """Get a room's built response from room_cache, loading it on a miss.
+    
+    Args:
+        session: Database session (used on a cache miss only)
+        room_id: Room identifier
+    
+    Returns:
+        CachedRoomData or None if the room does not exist (not cached)
+    """
+    cached = room_cache.get(room_id)
+    if cached is not None:
+        return cached
+    
+    room = await RoomRepository(session).get_room_with_objects(room_id)
+    if room is None:
+        return None
+    
+    cached = build_room_data(room)
+    room_cache.set(room_id, cached)
+    return cached
+
+
+async def load_room_etag(session: AsyncSession, room_id: str) -> Optional[str]:
+    """Get a room's current ETag without loading its objects.
+    
+    Args:
+        session: Database session (used on a cache miss only)
+        room_id: Room identifier
+    
+    Returns:
+        ETag, or None if the room does not exist
+    """
+    cached = room_cache.get(room_id)
+    if cached is not None:
+        return cached.etag
+    
+    updated_at = await RoomRepository(session).get_room_version(room_id)
+    return room_etag(room_id, updated_at) if updated_at is not None else None
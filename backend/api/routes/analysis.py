@@ -8,7 +8,7 @@ from typing import List
 import logging
 
 from backend.database.connection import get_db_session
-from backend.database.repositories import RoomRepository
+from backend.api.room_data import load_room_data
 from backend.api.models.schemas import ItemFitCheck, FitResult, OptimizationResult
 
 logger = logging.getLogger(__name__)
@@ -34,27 +34,22 @@ async def check_item_fit(
     Returns:
         FitResult: Fit checking result with available positions and constraints
     """
-    repo = RoomRepository(session)
-    room = await repo.get_room_by_id(room_id)
+    cached = await load_room_data(session, room_id)
     
-    if not room:
+    if not cached:
         raise HTTPException(status_code=404, detail=f"Room {room_id} not found")
     
-    # Get room dimensions
-    dimensions = await repo.get_room_dimensions(room_id)
-    if not dimensions:
-        raise HTTPException(status_code=404, detail=f"Room {room_id} dimensions not found")
-    
     # Simple fit checking logic
+    dimensions = cached.data.dimensions
     item_dims = item.dimensions
     fits = (
-        item_dims[0] < dimensions["length"] and
-        item_dims[1] < dimensions["width"] and
-        item_dims[2] < dimensions["height"]
+        item_dims[0] < dimensions.length and
+        item_dims[1] < dimensions.width and
+        item_dims[2] < dimensions.height
     )
     
-    # Get existing objects for collision checking
-    objects = await repo.get_room_objects(room_id)
+    # Existing objects for collision checking
+    objects = cached.data.objects
     
     # TODO: Implement actual position finding algorithm (Phase 2)
     available_positions = []
@@ -101,25 +96,18 @@ async def optimize_layout(
     Returns:
         OptimizationResult: Optimization suggestions and layout score
     """
-    repo = RoomRepository(session)
-    room = await repo.get_room_by_id(room_id)
+    cached = await load_room_data(session, room_id)
     
-    if not room:
+    if not cached:
         raise HTTPException(status_code=404, detail=f"Room {room_id} not found")
     
-    # Get dimensions and objects
-    dimensions = await repo.get_room_dimensions(room_id)
-    objects = await repo.get_room_objects(room_id)
-    
+    dimensions = cached.data.dimensions
+    objects = cached.data.objects
     suggestions = []
     
     # Calculate furniture density
-    total_furniture_volume = sum(obj.volume or 0.0 for obj in objects)
-    room_volume = (
-        dimensions["length"] * 
-        dimensions["width"] * 
-        dimensions["height"]
-    )
+    total_furniture_volume = sum(obj.volume for obj in objects)
+    room_volume = dimensions.length * dimensions.width * dimensions.height
     furniture_ratio = total_furniture_volume / room_volume if room_volume > 0 else 0
     
     # Generate suggestions based on density
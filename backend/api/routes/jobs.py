@@ -0,0 +1,49 @@
+"""Processing job status routes.
+
+Reports progress of asynchronous scan processing queued by POST /upload-scan.
+"""
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from backend.database.connection import get_db_session
+from backend.database.repositories import JobRepository
+from backend.api.models.schemas import JobStatus
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=JobStatus)
+async def get_job_status(
+    job_id: str,
+    session: AsyncSession = Depends(get_db_session)
+):
+    """Get processing job status.
+    
+    Status is one of queued, running (with current stage), done (with room_id)
+    or failed (with error).
+    
+    Args:
+        job_id: Job identifier from upload response
+        session: Database session
+        
+    Returns:
+        JobStatus: Current job status
+    """
+    repo = JobRepository(session)
+    job = await repo.get_job_by_id(job_id)
+    
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    return JobStatus(
+        job_id=job.job_id,
+        status=job.status,
+        stage=job.stage,
+        room_id=job.room_id,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at
+    )
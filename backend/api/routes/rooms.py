@@ -3,49 +3,100 @@
 Handles room dimensions, objects, and complete room data queries.
 Reference: Section E1 for room endpoints.
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional, Union
 import logging
 
 from backend.database.connection import get_db_session
-from backend.database.repositories import RoomRepository
-from backend.api.models.schemas import RoomDimensions, SpatialObject, RoomData
+from backend.database.repositories import RoomRepository, PatchRepository
+from backend.api.models.schemas import RoomDimensions, SpatialObject, RoomData, RoomProfile
+from backend.api.room_data import CachedRoomData, etag_matches, load_room_data, load_room_etag
+from backend.processing.lod import frame_patches
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Clients may keep room responses but must revalidate them (cheap with If-None-Match)
+ROOM_CACHE_CONTROL = "no-cache"
+
+
+async def load_room_or_not_modified(
+    session: AsyncSession,
+    room_id: str,
+    if_none_match: Optional[str]
+) -> Union[CachedRoomData, Response]:
+    """Load a room's cached response, or answer a matching conditional GET.
+    
+    When If-None-Match matches the room's ETag a 304 is returned, decided
+    from the room cache or a version lookup without loading objects.
+    
+    Args:
+        session: Database session
+        room_id: Room identifier
+        if_none_match: If-None-Match request header
+        
+    Returns:
+        CachedRoomData, or a 304 Response
+        
+    Raises:
+        HTTPException: 404 if the room does not exist
+    """
+    if if_none_match:
+        etag = await load_room_etag(session, room_id)
+        if etag is None:
+            raise HTTPException(status_code=404, detail=f"Room {room_id} not found")
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": ROOM_CACHE_CONTROL})
+    
+    cached = await load_room_data(session, room_id)
+    if not cached:
+        raise HTTPException(status_code=404, detail=f"Room {room_id} not found")
+    return cached
+
+
+def room_json_response(content: bytes, cached: CachedRoomData) -> Response:
+    """JSON response carrying the room's ETag."""
+    return Response(
+        content=content,
+        media_type="application/json",
+        headers={"ETag": cached.etag, "Cache-Control": ROOM_CACHE_CONTROL}
+    )
+
 
 @router.get("/{room_id}/dimensions", response_model=RoomDimensions)
 async def get_room_dimensions(
     room_id: str,
+    if_none_match: Optional[str] = Header(None),
     session: AsyncSession = Depends(get_db_session)
 ):
     """Get room dimensions.
     
     Reference: Section E1 - GET /room/{id}/dimensions.
-    Response time target: <1 second (Section F2).
+    Response time target: <1 second (Section F2); served from the room
+    cache after the first read.
     
     Args:
         room_id: Room identifier
+        if_none_match: ETag from a previous response (304 if unchanged)
         session: Database session
         
     Returns:
-        RoomDimensions: Room dimensions with accuracy
+        RoomDimensions: Room dimensions with accuracy, with an ETag header
     """
-    repo = RoomRepository(session)
-    dimensions = await repo.get_room_dimensions(room_id)
-    
-    if not dimensions:
-        raise HTTPException(status_code=404, detail=f"Room {room_id} not found")
+    cached = await load_room_or_not_modified(session, room_id, if_none_match)
+    if isinstance(cached, Response):
+        return cached
     
-    return RoomDimensions(**dimensions)
+    return room_json_response(cached.data.dimensions.model_dump_json().encode(), cached)
 
 
 @router.get("/{room_id}/objects", response_model=List[SpatialObject])
 async def get_room_objects(
     room_id: str,
+    if_none_match: Optional[str] = Header(None),
     session: AsyncSession = Depends(get_db_session)
 ):
     """Get detected objects for a room.
@@ -54,59 +105,132 @@ async def get_room_objects(
     
     Args:
         room_id: Room identifier
+        if_none_match: ETag from a previous response (304 if unchanged)
         session: Database session
         
     Returns:
-        List[SpatialObject]: List of detected objects
+        List[SpatialObject]: List of detected objects (pre-serialized JSON
+        from the room cache), with an ETag header
     """
-    repo = RoomRepository(session)
-    room = await repo.get_room_by_id(room_id)
+    cached = await load_room_or_not_modified(session, room_id, if_none_match)
+    if isinstance(cached, Response):
+        return cached
     
-    if not room:
-        raise HTTPException(status_code=404, detail=f"Room {room_id} not found")
+    return room_json_response(cached.objects_json, cached)
+
+
+@router.get("/{room_id}/data", response_model=RoomData)
+async def get_room_data(
+    room_id: str,
+    if_none_match: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_db_session)
+):
+    """Get complete room data.
     
-    objects = await repo.get_room_objects(room_id)
+    Reference: Section E1 - GET /room/{id}/data.
     
-    # Convert database objects to Pydantic models
-    spatial_objects = []
-    for obj in objects:
-        # Extract position from geometry (simplified - real implementation needs proper WKT parsing)
-        position = [0.0, 0.0, 0.0]  # Placeholder
+    Args:
+        room_id: Room identifier
+        if_none_match: ETag from a previous response (304 if unchanged)
+        session: Database session
         
-        # Extract dimensions from JSONB
-        dims_dict = obj.dimensions if obj.dimensions else {}
-        dimensions = [
-            dims_dict.get("length", 0.0),
-            dims_dict.get("width", 0.0),
-            dims_dict.get("height", 0.0)
-        ]
+    Returns:
+        RoomData: Complete room data including dimensions, objects, point
+        counts (pre-serialized JSON from the room cache), with an ETag header
+    """
+    cached = await load_room_or_not_modified(session, room_id, if_none_match)
+    if isinstance(cached, Response):
+        return cached
+    
+    return room_json_response(cached.data_json, cached)
+
+
+@router.get("/{room_id}/points")
+async def get_room_points(
+    room_id: str,
+    lod: int = Query(0, ge=0, description="LOD level (0 = coarsest)"),
+    min_x: Optional[float] = None,
+    min_y: Optional[float] = None,
+    max_x: Optional[float] = None,
+    max_y: Optional[float] = None,
+    min_z: Optional[float] = None,
+    max_z: Optional[float] = None,
+    session: AsyncSession = Depends(get_db_session)
+):
+    """Stream the point cloud patches of one LOD level within a bounding box.
+    
+    Only patches whose envelope intersects the XY box (and whose height
+    range overlaps min_z..max_z) are returned, as a binary stream of
+    length-prefixed patches (see backend.processing.lod.frame_patches and
+    decode_patch). Patches are returned whole; clients clip to the box.
+    
+    Args:
+        room_id: Room identifier
+        lod: LOD level (0 = coarsest)
+        min_x, min_y, max_x, max_y: Optional XY bounding box (all or none)
+        min_z, max_z: Optional height range
+        session: Database session
         
-        spatial_objects.append(SpatialObject(
-            type=obj.object_type or "unknown",
-            position=position,
-            dimensions=dimensions,
-            volume=obj.volume or 0.0,
-            confidence=obj.confidence or 0.0
-        ))
+    Returns:
+        StreamingResponse: application/octet-stream patch stream
+    """
+    bbox_values = (min_x, min_y, max_x, max_y)
+    bbox = None
+    if any(value is not None for value in bbox_values):
+        if any(value is None for value in bbox_values):
+            raise HTTPException(status_code=400, detail="Bounding box needs min_x, min_y, max_x and max_y")
+        if min_x > max_x or min_y > max_y:
+            raise HTTPException(status_code=400, detail="Bounding box minimum exceeds maximum")
+        bbox = bbox_values
+    
+    if min_z is not None and max_z is not None and min_z > max_z:
+        raise HTTPException(status_code=400, detail="min_z exceeds max_z")
     
-    return spatial_objects
+    repo = RoomRepository(session)
+    room = await repo.get_room_by_id(room_id)
+    
+    if not room:
+        raise HTTPException(status_code=404, detail=f"Room {room_id} not found")
+    
+    patch_repo = PatchRepository(session)
+    levels = await patch_repo.get_lod_levels(room_id)
+    if lod not in levels:
+        raise HTTPException(
+            status_code=404,
+            detail=f"LOD level {lod} not available for room {room_id} (levels: {sorted(levels)})"
+        )
+    
+    patches = await patch_repo.get_patches(room_id, lod, bbox=bbox, z_range=(min_z, max_z))
+    
+    return StreamingResponse(
+        frame_patches(patch.patch for patch in patches),
+        media_type="application/octet-stream",
+        headers={
+            "X-LOD-Level": str(lod),
+            "X-LOD-Voxel-Size": str(levels[lod]),
+            "X-Patch-Count": str(len(patches)),
+            "X-Point-Count": str(sum(patch.point_count or 0 for patch in patches)),
+        }
+    )
 
 
-@router.get("/{room_id}/data", response_model=RoomData)
-async def get_room_data(
+@router.get("/{room_id}/profile", response_model=RoomProfile)
+async def get_room_profile(
     room_id: str,
     session: AsyncSession = Depends(get_db_session)
 ):
-    """Get complete room data.
+    """Get the per-stage processing profile of a room.
     
-    Reference: Section E1 - GET /room/{id}/data.
+    Wall time, CPU time, point counts and memory for each pipeline stage,
+    recorded when the room was processed (see StageProfiler).
     
     Args:
         room_id: Room identifier
         session: Database session
         
     Returns:
-        RoomData: Complete room data including dimensions, objects, point counts
+        RoomProfile: Stage profiles in pipeline order (empty for rooms
+        processed before profiling was added)
     """
     repo = RoomRepository(session)
     room = await repo.get_room_by_id(room_id)
@@ -114,36 +238,9 @@ async def get_room_data(
     if not room:
         raise HTTPException(status_code=404, detail=f"Room {room_id} not found")
     
-    # Get dimensions
-    dimensions = await repo.get_room_dimensions(room_id)
-    if not dimensions:
-        raise HTTPException(status_code=404, detail=f"Room {room_id} dimensions not found")
-    
-    # Get objects
-    objects = await repo.get_room_objects(room_id)
-    
-    # Convert to Pydantic models (simplified - same as get_room_objects)
-    spatial_objects = []
-    for obj in objects:
-        position = [0.0, 0.0, 0.0]  # Placeholder
-        dims_dict = obj.dimensions if obj.dimensions else {}
-        dimensions_list = [
-            dims_dict.get("length", 0.0),
-            dims_dict.get("width", 0.0),
-            dims_dict.get("height", 0.0)
-        ]
-        spatial_objects.append(SpatialObject(
-            type=obj.object_type or "unknown",
-            position=position,
-            dimensions=dimensions_list,
-            volume=obj.volume or 0.0,
-            confidence=obj.confidence or 0.0
-        ))
-    
-    return RoomData(
+    metadata = room.extra_metadata or {}
+    return RoomProfile(
         room_id=room_id,
-        dimensions=RoomDimensions(**dimensions),
-        objects=spatial_objects,
-        point_count=room.point_count or 0,
-        processed_points=room.processed_points or 0
+        processing_time=metadata.get("processing_time"),
+        stages=metadata.get("stage_profile", [])
     )
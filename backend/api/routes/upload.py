@@ -1,45 +1,52 @@
 """File upload routes.
 
-Handles PLY file uploads and triggers point cloud processing.
+Handles PLY file uploads and queues point cloud processing.
 Reference: Section E1 for upload endpoint specifications.
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
-from pathlib import Path
-import time
 
 from backend.database.connection import get_db_session
-from backend.database.repositories import RoomRepository, ObjectRepository
-from backend.api.models.schemas import UploadResponse
-from backend.utils.file_handler import save_temp_file, cleanup_file
+from backend.database.repositories import JobRepository
+from backend.api.models.schemas import JobStatus
+from backend.api.job_queue import (
+    job_queue,
+    new_job_id,
+    processing_params_hash,
+    lookup_completed_result,
+    QueueFullError,
+)
+from backend.utils.file_handler import save_upload_stream, cleanup_file
 from backend.utils.validators import validate_ply_file, validate_filename
-from backend.processing.process_room import process_room_scan
 from backend.config import settings
-import uuid
-import numpy as np
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-@router.post("/upload-scan", response_model=UploadResponse)
+@router.post("/upload-scan", response_model=JobStatus, status_code=202)
 async def upload_scan(
+    response: Response,
     file: UploadFile = File(...),
     session: AsyncSession = Depends(get_db_session)
 ):
-    """Upload and process PLY/SPZ scan from Scaniverse.
+    """Upload a PLY/SPZ scan from Scaniverse and queue it for processing.
     
     Reference: Section E1 - POST /upload-scan endpoint.
     Accepts PLY files up to 250MB (Section A2).
+    Returns 202 Accepted immediately; poll GET /api/jobs/{job_id} for progress.
+    Re-uploads of a scan already processed with the current settings return
+    200 with a completed job pointing at the existing room.
     
     Args:
+        response: Response (status code set to 200 for deduplicated uploads)
         file: Uploaded PLY file
         session: Database session
         
     Returns:
-        UploadResponse: Processing status and room_id
+        JobStatus: Queued (or already completed) job with job_id
     """
     # Validate filename
     is_valid, error = validate_filename(file.filename)
@@ -53,109 +60,108 @@ async def upload_scan(
             detail="Only PLY and SPZ formats supported. Phase 1-2: PLY support only."
         )
     
-    # Read file content
-    try:
-        content = await file.read()
-    except Exception as e:
-        logger.error(f"Error reading uploaded file: {e}")
-        raise HTTPException(status_code=500, detail="Failed to read uploaded file")
-    
-    # Check file size
-    if len(content) > settings.max_upload_size:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large: {len(content)} bytes (max: {settings.max_upload_size})"
-        )
-    
-    # Save to temporary file
+    # Stream upload to a temporary file (constant memory per upload)
     temp_file_path = None
     try:
-        temp_file_path = await save_temp_file(content, suffix=".ply")
+        try:
+            temp_file_path, _, content_hash = await save_upload_stream(
+                file,
+                suffix=".ply",
+                max_size=settings.max_upload_size,
+                chunk_size=settings.upload_chunk_size
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except OSError as e:
+            logger.error(f"Error reading uploaded file: {e}")
+            raise HTTPException(status_code=500, detail="Failed to read uploaded file")
         
         # Validate PLY file format
         is_valid, error = validate_ply_file(str(temp_file_path), settings.max_upload_size)
         if not is_valid:
             raise HTTPException(status_code=400, detail=f"Invalid PLY file: {error}")
         
-        # Process point cloud (complete pipeline)
-        logger.info("Processing room scan...")
-        # Run in background to avoid blocking event loop
-        import asyncio
-        room_data = await asyncio.to_thread(process_room_scan, str(temp_file_path))
-        
-        # Generate unique room ID
-        room_id = f"room_{uuid.uuid4().hex[:8]}"
-        
-        # Convert numpy types to native Python types for JSON serialization
-        def convert_numpy_types(obj):
-            """Convert numpy types to native Python types for JSON serialization."""
-            if isinstance(obj, np.integer):
-                return int(obj)
-            elif isinstance(obj, np.floating):
-                return float(obj)
-            elif isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif isinstance(obj, dict):
-                return {k: convert_numpy_types(v) for k, v in obj.items()}
-            elif isinstance(obj, (list, tuple)):
-                return [convert_numpy_types(item) for item in obj]
-            return obj
+        job_repo = JobRepository(session)
+        params_hash = processing_params_hash()
         
-        # Prepare metadata with converted types
-        metadata = {
-            "processing_time": convert_numpy_types(room_data["processing_time"]),
-            "cluster_stats": convert_numpy_types(room_data.get("cluster_stats", {}))
-        }
+        # Same scan already processed with the same settings: reuse the room
+        room_id = await lookup_completed_result(session, content_hash, params_hash)
+        if room_id is not None:
+            job = await job_repo.create_job(
+                job_id=new_job_id(),
+                file_path=None,
+                content_hash=content_hash,
+                params_hash=params_hash,
+                status="done",
+                stage="complete",
+                room_id=room_id,
+                metadata={"deduplicated": True}
+            )
+            await session.commit()
+            logger.info(f"Duplicate scan upload, reusing {room_id}: {job.job_id}")
+            
+            response.status_code = 200
+            return JobStatus(
+                job_id=job.job_id,
+                status=job.status,
+                stage=job.stage,
+                room_id=room_id,
+                created_at=job.created_at,
+                updated_at=job.updated_at
+            )
         
-        # Store in database
-        room_repo = RoomRepository(session)
-        room = await room_repo.create_room(
-            room_id=room_id,
-            point_count=int(room_data["point_count"]),
-            processed_points=int(room_data["processed_points"]),
-            length=float(room_data["dimensions"]["length"]),
-            width=float(room_data["dimensions"]["width"]),
-            height=float(room_data["dimensions"]["height"]),
-            accuracy=room_data["dimensions"]["accuracy"],
-            scan_quality=float(room_data["scan_quality"]),
-            metadata=metadata
+        # Same scan still being processed (e.g. client retry): return that job
+        pending = await job_repo.find_job_by_content(
+            content_hash, params_hash, ["queued", "running"]
         )
-        
-        # Store detected objects
-        obj_repo = ObjectRepository(session)
-        for obj in room_data["objects"]:
-            await obj_repo.create_object(
-                room_id=room_id,
-                object_type=obj["type"],
-                position=[float(x) for x in obj["position"]],  # Ensure floats
-                dimensions={
-                    "length": float(obj["dimensions"][0]),
-                    "width": float(obj["dimensions"][1]),
-                    "height": float(obj["dimensions"][2])
-                },
-                volume=float(obj["volume"]),
-                confidence=float(obj["confidence"]),
-                classification_method="geometric"
+        if pending is not None:
+            logger.info(f"Duplicate scan upload, already in progress: {pending.job_id}")
+            return JobStatus(
+                job_id=pending.job_id,
+                status=pending.status,
+                stage=pending.stage,
+                created_at=pending.created_at,
+                updated_at=pending.updated_at
             )
         
-        # Commit transaction
+        # Reject early when the workers are saturated
+        if job_queue.is_full():
+            raise HTTPException(status_code=503, detail="Processing queue full, retry later")
+        
+        # Persist job before queuing so workers and status queries can see it
+        job_id = new_job_id()
+        job = await job_repo.create_job(
+            job_id=job_id,
+            file_path=str(temp_file_path),
+            content_hash=content_hash,
+            params_hash=params_hash
+        )
         await session.commit()
         
-        logger.info(f"Room processed and stored: {room_id}, {len(room_data['objects'])} objects detected")
+        try:
+            await job_queue.submit(job_id, str(temp_file_path), (content_hash, params_hash))
+        except QueueFullError as e:
+            await job_repo.update_job(job_id, status="failed", error=str(e))
+            await session.commit()
+            raise HTTPException(status_code=503, detail=str(e))
+        
+        # Worker owns the file from here on
+        temp_file_path = None
+        logger.info(f"Queued scan for processing: {job_id}")
         
-        return UploadResponse(
-            status="success",
-            room_id=room_id,
-            message=f"Processed {room_data['point_count']} points, detected {len(room_data['objects'])} objects",
-            objects_detected=len(room_data["objects"])
+        return JobStatus(
+            job_id=job_id,
+            status="queued",
+            created_at=job.created_at,
+            updated_at=job.updated_at
         )
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error processing upload: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+        logger.error(f"Error queuing upload: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Upload error: {str(e)}")
     finally:
-        # Cleanup temporary file
+        # Cleanup temporary file unless it was handed to the job queue
         if temp_file_path:
             cleanup_file(str(temp_file_path))
@@ -3,7 +3,7 @@
 Reference: Section C of 3dscanknowledge.md for algorithm parameters.
 """
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -23,15 +23,48 @@ class Settings(BaseSettings):
     max_upload_size: int = 262144000  # 250MB - Section A2: typical room scan size
     upload_directory: str = "./uploads"
     temp_directory: str = "./temp"
+    upload_chunk_size: int = 1048576  # 1MB - streaming ingest chunk size
+    
+    # Job Queue (asynchronous scan processing)
+    job_workers: int = 2  # Concurrent processing pipelines per API process
+    job_queue_size: int = 100  # Maximum queued jobs before uploads get 503
+    processing_backend: str = "thread"  # Pipeline executor: "thread", "process" or "inline"
+    processing_max_tasks_per_child: int = 20  # Recycle process-pool workers after N jobs
+    result_cache_size: int = 1024  # Deduplicated scan results kept in memory (LRU)
+    result_cache_ttl: int = 86400  # Seconds before a cached scan result expires
+    
+    # Room read cache (built room responses per API process)
+    room_cache_size: int = 256  # Rooms kept in memory (LRU; 0 disables the cache)
+    room_cache_ttl: int = 3600  # Seconds before a cached room expires
     
     # Processing Parameters (Section F1, B1 from knowledge doc)
+    ply_mmap_reader: bool = True  # Memory-map binary PLY files instead of o3d.io parsing
     voxel_size: float = 0.05  # 5cm voxels - Section F1
+    voxel_downsampler: str = "numpy"  # "numpy" (also summarizes per-voxel density) or "open3d"
+    tiled_preprocessing_min_points: int = 5_000_000  # Binary scans this large are preprocessed in XY tiles (0: never)
+    tile_size: float = 4.0  # Tile edge length in meters for tiled preprocessing
+    tile_halo: float = 0.25  # Tile overlap for outlier/normal neighborhoods (meters)
     outlier_neighbors: int = 20  # Statistical outlier removal - Section F1
     outlier_std_ratio: float = 2.0  # 2 standard deviations - Section F1
     ransac_distance_threshold: float = 0.01  # 1cm tolerance - Section B1
-    ransac_iterations: int = 1000  # RANSAC iterations - Section B1
+    ransac_iterations: int = 1000  # RANSAC iterations (upper bound in adaptive mode) - Section B1
+    ransac_mode: str = "adaptive"  # "adaptive" (early exit at ransac_confidence) or "fixed"
+    ransac_confidence: float = 0.999  # Adaptive RANSAC termination confidence
+    plane_detector: str = "ransac"  # "ransac" or "manhattan" (dominant axes, RANSAC fallback)
     dbscan_eps: float = 0.1  # 10cm neighborhood - Section B1
     dbscan_min_samples: int = 50  # Minimum cluster size - Section B1
+    clustering_backend: str = "dbscan"  # "dbscan" or "voxel" (occupancy-grid connected components)
+    lod_voxel_sizes: List[float] = [0.2, 0.1, 0.05, 0.02]  # Stored LOD pyramid, coarse to fine (empty: none)
+    lod_patch_size: float = 2.0  # XY edge length of stored point cloud patches (meters)
+    shared_spatial_index: bool = True  # One KD-tree over the processed cloud shared by normals and DBSCAN
+    # Geometry backend: "legacy" (o3d.geometry + NumPy kernels) or "tensor" (o3d.t.geometry, float32).
+    # "tensor" covers outlier removal, voxel downsampling, normal estimation, RANSAC (always
+    # fixed mode) and DBSCAN, overriding ransac_mode and shared_spatial_index; PLY loading,
+    # tiled preprocessing, the Manhattan detector and voxel clustering are the same for both
+    geometry_backend: str = "legacy"
+    
+    # Pipeline profiling
+    profile_allocations: bool = False  # Per-stage tracemalloc peaks in the stage profile (slows processing)
     
     # Logging
     log_level: str = "INFO"
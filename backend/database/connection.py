@@ -61,6 +61,17 @@ engine = _engine
 AsyncSessionLocal = _AsyncSessionLocal
 
 
+def get_session_factory() -> Optional[Any]:
+    """Get the async session factory for work outside request scope.
+    
+    Returns:
+        async_sessionmaker or None if the engine is not initialized (TEST_MODE)
+    """
+    if _AsyncSessionLocal is None:
+        _initialize_engine()
+    return _AsyncSessionLocal
+
+
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     """Dependency for FastAPI to get database session.
     
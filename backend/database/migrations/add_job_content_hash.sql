@@ -0,0 +1,8 @@
+-- Migration script: Add content hash columns to processing_jobs for upload deduplication
+-- Run this if processing_jobs was created before deduplication was added
+
+ALTER TABLE processing_jobs ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+ALTER TABLE processing_jobs ADD COLUMN IF NOT EXISTS params_hash VARCHAR(64);
+
+CREATE INDEX IF NOT EXISTS processing_jobs_content_hash_idx
+ON processing_jobs(content_hash, params_hash);
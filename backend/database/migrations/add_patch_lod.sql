@@ -0,0 +1,14 @@
+-- Migration script: Store LOD pyramid patches in point_cloud_patches
+-- Run this if point_cloud_patches was created with the TEXT patch column
+
+ALTER TABLE point_cloud_patches
+    ALTER COLUMN patch TYPE BYTEA USING convert_to(patch, 'UTF8');
+
+ALTER TABLE point_cloud_patches ADD COLUMN IF NOT EXISTS lod_level INTEGER DEFAULT 0;
+ALTER TABLE point_cloud_patches ADD COLUMN IF NOT EXISTS voxel_size FLOAT;
+ALTER TABLE point_cloud_patches ADD COLUMN IF NOT EXISTS point_count INTEGER;
+ALTER TABLE point_cloud_patches ADD COLUMN IF NOT EXISTS z_min FLOAT;
+ALTER TABLE point_cloud_patches ADD COLUMN IF NOT EXISTS z_max FLOAT;
+
+CREATE INDEX IF NOT EXISTS room_patches_level_idx
+ON point_cloud_patches(room_id, lod_level);
@@ -0,0 +1,23 @@
+-- Migration script: Add processing_jobs table for asynchronous scan processing
+-- Run this if you have an existing database created before the job queue was added
+
+CREATE TABLE IF NOT EXISTS processing_jobs (
+    id SERIAL PRIMARY KEY,
+    job_id VARCHAR(50) UNIQUE NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    stage VARCHAR(50),
+    room_id VARCHAR(50),
+    file_path TEXT,
+    error TEXT,
+    extra_metadata JSONB DEFAULT '{}'::jsonb,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS processing_jobs_status_idx
+ON processing_jobs(status);
+
+DROP TRIGGER IF EXISTS update_processing_jobs_updated_at ON processing_jobs;
+CREATE TRIGGER update_processing_jobs_updated_at BEFORE UPDATE ON processing_jobs
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
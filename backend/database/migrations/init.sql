@@ -30,17 +30,26 @@ CREATE TABLE IF NOT EXISTS rooms (
 );
 
 -- Table: point_cloud_patches (Point cloud storage)
+-- Level-of-detail pyramid: each row is one XY patch of one LOD level
 -- Note: PCPATCH type requires pointcloud extension (optional)
--- For now, using TEXT to store point cloud data as JSON or base64
+-- Patches use a compact binary encoding instead (quantized positions + colors)
 CREATE TABLE IF NOT EXISTS point_cloud_patches (
     id SERIAL PRIMARY KEY,
     room_id INTEGER REFERENCES rooms(id) ON DELETE CASCADE,
-    patch TEXT,  -- Changed from PCPATCH(1) to TEXT for compatibility
+    patch BYTEA,  -- Changed from PCPATCH(1) for compatibility
     envelope GEOMETRY(POLYGON, 4326),
     patch_index INTEGER DEFAULT 0,
+    lod_level INTEGER DEFAULT 0,  -- 0 = coarsest level
+    voxel_size FLOAT,
+    point_count INTEGER,
+    z_min FLOAT,
+    z_max FLOAT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+CREATE INDEX IF NOT EXISTS room_patches_level_idx
+ON point_cloud_patches(room_id, lod_level);
+
 -- Create spatial index on point cloud patches (Section C3)
 -- Note: PC_EnvelopeGeometry requires pointcloud extension
 -- Using envelope geometry index instead
@@ -69,6 +78,31 @@ ON detected_objects USING GIST(position);
 CREATE INDEX IF NOT EXISTS objects_room_id_idx 
 ON detected_objects(room_id);
 
+-- Table: processing_jobs (Asynchronous scan processing queue)
+-- Persisted so queued/running jobs survive API restarts
+CREATE TABLE IF NOT EXISTS processing_jobs (
+    id SERIAL PRIMARY KEY,
+    job_id VARCHAR(50) UNIQUE NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued'
+        CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    stage VARCHAR(50),
+    room_id VARCHAR(50),
+    file_path TEXT,
+    content_hash VARCHAR(64),
+    params_hash VARCHAR(64),
+    error TEXT,
+    extra_metadata JSONB DEFAULT '{}'::jsonb,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS processing_jobs_status_idx
+ON processing_jobs(status);
+
+-- Content-hash lookup for upload deduplication
+CREATE INDEX IF NOT EXISTS processing_jobs_content_hash_idx
+ON processing_jobs(content_hash, params_hash);
+
 -- Function to update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -81,3 +115,6 @@ $$ language 'plpgsql';
 -- Trigger to automatically update updated_at
 CREATE TRIGGER update_rooms_updated_at BEFORE UPDATE ON rooms
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER update_processing_jobs_updated_at BEFORE UPDATE ON processing_jobs
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
@@ -3,9 +3,9 @@
 Reference: Hybrid database schema from implementation plan.
 Uses GeoAlchemy2 for spatial data types.
 """
-from sqlalchemy import Column, Integer, String, Float, TIMESTAMP, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, TIMESTAMP, ForeignKey, JSON, LargeBinary
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.orm import declarative_base, relationship, column_property
 from sqlalchemy.sql import func
 from geoalchemy2 import Geometry
 from typing import Optional, Dict, Any
@@ -40,22 +40,31 @@ class Room(Base):
 
 
 class PointCloudPatch(Base):
-    """Point cloud patch model - stores point cloud data using PostGIS Pointcloud extension."""
+    """Point cloud patch model - one XY patch of one level of a room's LOD pyramid.
+    
+    patch holds the compact binary encoding from backend.processing.lod
+    (quantized positions and colors); envelope is the patch's XY bounds.
+    """
     
     __tablename__ = "point_cloud_patches"
     
     id = Column(Integer, primary_key=True, index=True)
     room_id = Column(Integer, ForeignKey("rooms.id", ondelete="CASCADE"), nullable=False)
-    patch = Column(String)  # PCPATCH type - stored as string (PostGIS specific type)
+    patch = Column(LargeBinary)  # Encoded points (see backend.processing.lod.encode_patch)
     envelope = Column(Geometry("POLYGON", srid=4326), nullable=True)
     patch_index = Column(Integer, default=0)
+    lod_level = Column(Integer, default=0)  # 0 = coarsest level
+    voxel_size = Column(Float)  # LOD voxel size in meters
+    point_count = Column(Integer)
+    z_min = Column(Float)
+    z_max = Column(Float)
     created_at = Column(TIMESTAMP, server_default=func.now())
     
     # Relationships
     room = relationship("Room", back_populates="point_cloud_patches")
     
     def __repr__(self) -> str:
-        return f"<PointCloudPatch(id={self.id}, room_id={self.room_id})>"
+        return f"<PointCloudPatch(id={self.id}, room_id={self.room_id}, lod_level={self.lod_level})>"
 
 
 class DetectedObject(Base):
@@ -74,8 +83,35 @@ class DetectedObject(Base):
     extra_metadata = Column(JSONB, default={})
     created_at = Column(TIMESTAMP, server_default=func.now())
     
+    # Position coordinates extracted in the SELECT (no WKB round trip)
+    position_x = column_property(func.ST_X(position, type_=Float))
+    position_y = column_property(func.ST_Y(position, type_=Float))
+    position_z = column_property(func.ST_Z(position, type_=Float))
+    
     # Relationships
     room = relationship("Room", back_populates="detected_objects")
     
     def __repr__(self) -> str:
         return f"<DetectedObject(id={self.id}, type='{self.object_type}', room_id={self.room_id})>"
+
+
+class ProcessingJob(Base):
+    """Processing job model - tracks asynchronous scan processing."""
+    
+    __tablename__ = "processing_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(50), unique=True, nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, done, failed
+    stage = Column(String(50))  # Current pipeline stage while running
+    room_id = Column(String(50))  # Resulting room identifier once done
+    file_path = Column(String)  # Uploaded scan awaiting processing
+    content_hash = Column(String(64), index=True)  # SHA-256 of uploaded scan
+    params_hash = Column(String(64))  # Fingerprint of processing settings used
+    error = Column(String)
+    extra_metadata = Column(JSONB, default={})
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self) -> str:
+        return f"<ProcessingJob(id={self.id}, job_id='{self.job_id}', status='{self.status}')>"
@@ -5,15 +5,54 @@ Implements data access layer with spatial queries using PostGIS functions.
 All methods use async SQLAlchemy sessions for non-blocking database access.
 """
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func as sql_func
-from sqlalchemy.orm import selectinload
-from typing import List, Optional, Dict, Any
+from sqlalchemy import Float, event, insert, literal, select, update, func as sql_func
+from sqlalchemy.orm import Session, defer, selectinload
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Tuple
 import logging
 
-from backend.database.models import Room, PointCloudPatch, DetectedObject
+from backend.database.models import Room, PointCloudPatch, DetectedObject, ProcessingJob
+from backend.utils.cache import room_cache
 
 logger = logging.getLogger(__name__)
 
+# Rows per multi-row INSERT (11 bind parameters each; PostgreSQL allows 65535)
+OBJECT_INSERT_BATCH_SIZE = 1000
+
+# Patches per multi-row INSERT (kept small: every row carries its encoded blob)
+PATCH_INSERT_BATCH_SIZE = 100
+
+# Session.info key of the room_ids to drop from room_cache on commit
+PENDING_ROOM_INVALIDATIONS = "pending_room_invalidations"
+
+
+def invalidate_room_on_commit(session: AsyncSession, room_id: str) -> None:
+    """
+    Drop a room from room_cache once the session's transaction commits.
+    
+    Invalidating before the commit would let a concurrent read reload the
+    old row and cache it again until the TTL expires; on rollback nothing
+    is invalidated.
+    
+    Args:
+        session: Session modifying the room
+        room_id: Room identifier
+    """
+    session.sync_session.info.setdefault(PENDING_ROOM_INVALIDATIONS, set()).add(room_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_rooms(session: Session) -> None:
+    for room_id in session.info.pop(PENDING_ROOM_INVALIDATIONS, ()):
+        room_cache.invalidate(room_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_room_invalidations(session: Session, previous_transaction: Any) -> None:
+    # Rolling back a savepoint keeps the outer transaction's changes pending
+    if previous_transaction.parent is None:
+        session.info.pop(PENDING_ROOM_INVALIDATIONS, None)
+
 
 class RoomRepository:
     """Repository for room-related database operations."""
@@ -82,6 +121,44 @@ class RoomRepository:
         )
         return result.scalar_one_or_none()
     
+    async def get_room_with_objects(self, room_id: str) -> Optional[Room]:
+        """
+        Get room by room_id with its detected objects eagerly loaded.
+        
+        The objects are fetched by selectinload in a second query keyed on
+        the room's primary key, so room.detected_objects can be read
+        without further queries (or lazy loads on the async session).
+        Object positions come back as position_x/y/z floats; the position
+        geometry itself is not fetched.
+        
+        Args:
+            room_id: Room identifier
+            
+        Returns:
+            Room with detected_objects loaded, or None if not found
+        """
+        result = await self.session.execute(
+            select(Room)
+            .options(selectinload(Room.detected_objects).defer(DetectedObject.position))
+            .where(Room.room_id == room_id)
+        )
+        return result.scalar_one_or_none()
+    
+    async def get_room_version(self, room_id: str) -> Optional[datetime]:
+        """
+        Get the last modification time of a room (no objects are loaded).
+        
+        Args:
+            room_id: Room identifier
+            
+        Returns:
+            rooms.updated_at, or None if the room does not exist
+        """
+        result = await self.session.execute(
+            select(Room.updated_at).where(Room.room_id == room_id)
+        )
+        return result.scalar_one_or_none()
+    
     async def get_room_dimensions(self, room_id: str) -> Optional[Dict[str, Any]]:
         """
         Get room dimensions by room_id.
@@ -92,16 +169,12 @@ class RoomRepository:
         Returns:
             Dict with length, width, height, accuracy or None
         """
-        room = await self.get_room_by_id(room_id)
-        if not room:
-            return None
-        
-        return {
-            "length": room.length,
-            "width": room.width,
-            "height": room.height,
-            "accuracy": room.accuracy
-        }
+        result = await self.session.execute(
+            select(Room.length, Room.width, Room.height, Room.accuracy)
+            .where(Room.room_id == room_id)
+        )
+        row = result.one_or_none()
+        return dict(row._mapping) if row is not None else None
     
     async def get_room_objects(
         self,
@@ -116,14 +189,14 @@ class RoomRepository:
             object_type: Optional filter by object type
             
         Returns:
-            List of DetectedObject objects
+            List of DetectedObject objects (empty if the room does not exist)
         """
-        # First get the room to get its ID
-        room = await self.get_room_by_id(room_id)
-        if not room:
-            return []
-        
-        query = select(DetectedObject).where(DetectedObject.room_id == room.id)
+        query = (
+            select(DetectedObject)
+            .options(defer(DetectedObject.position))
+            .join(Room, DetectedObject.room_id == Room.id)
+            .where(Room.room_id == room_id)
+        )
         
         if object_type:
             query = query.where(DetectedObject.object_type == object_type)
@@ -137,7 +210,8 @@ class RoomRepository:
         scan_quality: float
     ) -> bool:
         """
-        Update scan quality for a room.
+        Update scan quality for a room; it is dropped from the room cache
+        when the caller commits.
         
         Args:
             room_id: Room identifier
@@ -152,6 +226,7 @@ class RoomRepository:
         
         room.scan_quality = scan_quality
         await self.session.flush()
+        invalidate_room_on_commit(self.session, room_id)
         return True
 
 
@@ -161,58 +236,54 @@ class ObjectRepository:
     def __init__(self, session: AsyncSession):
         self.session = session
     
-    async def create_object(
+    async def create_objects(
         self,
-        room_id: str,
-        object_type: str,
-        position: List[float],  # [x, y, z]
-        dimensions: Dict[str, float],  # {length, width, height}
-        volume: float,
-        confidence: float,
-        classification_method: str = "geometric",
-        metadata: Optional[Dict[str, Any]] = None
-    ) -> DetectedObject:
+        room_pk: int,
+        objects: List[Dict[str, Any]]
+    ) -> List[int]:
         """
-        Create a detected object record.
+        Create many detected object records with one multi-row INSERT.
+        
+        Positions are built in the database with ST_MakePoint from bound
+        coordinates. Rows are inserted OBJECT_INSERT_BATCH_SIZE at a time
+        (one statement for any realistic room) to stay within the bind
+        parameter limit.
         
         Args:
-            room_id: Room identifier
-            object_type: Object type (e.g., "table", "chair")
-            position: 3D position [x, y, z]
-            dimensions: Dict with length, width, height
-            volume: Volume in cubic meters
-            confidence: Classification confidence 0-1
-            classification_method: "geometric" or "ml"
-            metadata: Additional metadata
-            
+            room_pk: Primary key (rooms.id) of the owning room
+            objects: Dicts with object_type, position [x, y, z], dimensions
+                {length, width, height}, volume, confidence and optionally
+                classification_method and metadata
+        
         Returns:
-            DetectedObject: Created object
+            Ids of the created objects, in input order
         """
-        # Get room to get its ID
-        room_repo = RoomRepository(self.session)
-        room = await room_repo.get_room_by_id(room_id)
-        if not room:
-            raise ValueError(f"Room {room_id} not found")
-        
-        # Create WKT for PointZ: POINTZ(x y z)
-        wkt = f"POINTZ({position[0]} {position[1]} {position[2]})"
-        
-        obj = DetectedObject(
-            room_id=room.id,
-            object_type=object_type,
-            position=wkt,  # GeoAlchemy2 will handle conversion
-            dimensions=dimensions,
-            volume=volume,
-            confidence=confidence,
-            classification_method=classification_method,
-            extra_metadata=metadata or {}
-        )
+        ids: List[int] = []
+        for start in range(0, len(objects), OBJECT_INSERT_BATCH_SIZE):
+            rows = [
+                {
+                    "room_id": room_pk,
+                    "object_type": obj["object_type"],
+                    "position": sql_func.ST_SetSRID(
+                        sql_func.ST_MakePoint(*(literal(float(v), Float) for v in obj["position"])),
+                        4326
+                    ),
+                    "dimensions": obj["dimensions"],
+                    "volume": obj["volume"],
+                    "confidence": obj["confidence"],
+                    "classification_method": obj.get("classification_method", "geometric"),
+                    "extra_metadata": obj.get("metadata") or {},
+                }
+                for obj in objects[start:start + OBJECT_INSERT_BATCH_SIZE]
+            ]
+            result = await self.session.execute(
+                insert(DetectedObject.__table__).values(rows).returning(DetectedObject.__table__.c.id)
+            )
+            # Serial ids are assigned in VALUES order; RETURNING order is not guaranteed
+            ids.extend(sorted(result.scalars().all()))
         
-        self.session.add(obj)
-        await self.session.flush()
-        await self.session.refresh(obj)
-        logger.info(f"Created object: {object_type} in room {room_id}")
-        return obj
+        logger.info(f"Created {len(ids)} objects in room {room_pk}")
+        return ids
     
     async def get_objects_in_radius(
         self,
@@ -251,3 +322,247 @@ class ObjectRepository:
         result = await self.session.execute(query)
         return list(result.scalars().all())
 
+
+class PatchRepository:
+    """Repository for LOD point cloud patch operations."""
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def create_patches(
+        self,
+        room_pk: int,
+        patches: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Store the LOD pyramid patches of a room.
+        
+        Envelopes are built in the database with ST_MakeEnvelope from bound
+        coordinates; rows are inserted PATCH_INSERT_BATCH_SIZE at a time.
+        
+        Args:
+            room_pk: Primary key (rooms.id) of the owning room
+            patches: Patches from build_lod_pyramid (lod_level, voxel_size,
+                patch_index, point_count, envelope, z_min, z_max, data)
+            
+        Returns:
+            Number of patches stored
+        """
+        table = PointCloudPatch.__table__
+        for start in range(0, len(patches), PATCH_INSERT_BATCH_SIZE):
+            rows = [
+                {
+                    "room_id": room_pk,
+                    "patch": patch["data"],
+                    "envelope": sql_func.ST_MakeEnvelope(
+                        *(literal(float(v), Float) for v in patch["envelope"]),
+                        4326
+                    ),
+                    "patch_index": patch["patch_index"],
+                    "lod_level": patch["lod_level"],
+                    "voxel_size": patch["voxel_size"],
+                    "point_count": patch["point_count"],
+                    "z_min": patch["z_min"],
+                    "z_max": patch["z_max"],
+                }
+                for patch in patches[start:start + PATCH_INSERT_BATCH_SIZE]
+            ]
+            await self.session.execute(insert(table).values(rows))
+        
+        logger.info(f"Stored {len(patches)} point cloud patches for room {room_pk}")
+        return len(patches)
+    
+    async def get_lod_levels(self, room_id: str) -> Dict[int, float]:
+        """
+        Get the stored LOD levels of a room.
+        
+        Args:
+            room_id: Room identifier
+            
+        Returns:
+            Dict mapping lod_level to voxel size (empty if none are stored)
+        """
+        result = await self.session.execute(
+            select(PointCloudPatch.lod_level, PointCloudPatch.voxel_size)
+            .join(Room, PointCloudPatch.room_id == Room.id)
+            .where(Room.room_id == room_id)
+            .distinct()
+        )
+        return {level: voxel_size for level, voxel_size in result.all()}
+    
+    async def get_patches(
+        self,
+        room_id: str,
+        lod_level: int,
+        bbox: Optional[Tuple[float, float, float, float]] = None,
+        z_range: Optional[Tuple[Optional[float], Optional[float]]] = None
+    ) -> List[PointCloudPatch]:
+        """
+        Get the patches of one LOD level, optionally within a bounding box.
+        
+        The XY filter uses ST_Intersects on the envelope so the GiST index
+        selects only intersecting patches.
+        
+        Args:
+            room_id: Room identifier
+            lod_level: Pyramid level (0 = coarsest)
+            bbox: Optional (min_x, min_y, max_x, max_y)
+            z_range: Optional (min_z, max_z); either bound may be None
+            
+        Returns:
+            List of PointCloudPatch ordered by patch_index
+        """
+        query = (
+            select(PointCloudPatch)
+            .join(Room, PointCloudPatch.room_id == Room.id)
+            .where(Room.room_id == room_id, PointCloudPatch.lod_level == lod_level)
+        )
+        
+        if bbox is not None:
+            query = query.where(sql_func.ST_Intersects(
+                PointCloudPatch.envelope,
+                sql_func.ST_MakeEnvelope(*bbox, 4326)
+            ))
+        
+        if z_range is not None:
+            min_z, max_z = z_range
+            if min_z is not None:
+                query = query.where(PointCloudPatch.z_max >= min_z)
+            if max_z is not None:
+                query = query.where(PointCloudPatch.z_min <= max_z)
+        
+        result = await self.session.execute(query.order_by(PointCloudPatch.patch_index))
+        return list(result.scalars().all())
+
+
+class JobRepository:
+    """Repository for asynchronous processing job operations."""
+    
+    def __init__(self, session: AsyncSession):
+        self.session = session
+    
+    async def create_job(
+        self,
+        job_id: str,
+        file_path: Optional[str],
+        content_hash: Optional[str] = None,
+        params_hash: Optional[str] = None,
+        status: str = "queued",
+        stage: Optional[str] = None,
+        room_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> ProcessingJob:
+        """
+        Create a processing job.
+        
+        Args:
+            job_id: Unique job identifier
+            file_path: Path to the uploaded scan awaiting processing
+            content_hash: SHA-256 of the uploaded scan
+            params_hash: Fingerprint of the processing settings
+            status: Initial status ("done" for deduplicated uploads)
+            stage: Initial pipeline stage
+            room_id: Existing room for deduplicated uploads
+            metadata: Additional metadata dict
+            
+        Returns:
+            ProcessingJob: Created job
+        """
+        job = ProcessingJob(
+            job_id=job_id,
+            status=status,
+            stage=stage,
+            file_path=file_path,
+            content_hash=content_hash,
+            params_hash=params_hash,
+            room_id=room_id,
+            extra_metadata=metadata or {}
+        )
+        self.session.add(job)
+        await self.session.flush()
+        await self.session.refresh(job)
+        logger.info(f"Created job: {job_id}")
+        return job
+    
+    async def get_job_by_id(self, job_id: str) -> Optional[ProcessingJob]:
+        """
+        Get job by job_id.
+        
+        Args:
+            job_id: Job identifier
+            
+        Returns:
+            ProcessingJob or None if not found
+        """
+        result = await self.session.execute(
+            select(ProcessingJob).where(ProcessingJob.job_id == job_id)
+        )
+        return result.scalar_one_or_none()
+    
+    async def update_job(
+        self,
+        job_id: str,
+        only_if_status: Optional[str] = None,
+        **fields: Any
+    ) -> bool:
+        """
+        Update job fields (status, stage, room_id, error, ...).
+        
+        Args:
+            job_id: Job identifier
+            only_if_status: Only update if the job currently has this status
+                (prevents late stage updates from overwriting a finished job)
+            **fields: Column values to set
+            
+        Returns:
+            True if a row was updated
+        """
+        query = update(ProcessingJob).where(ProcessingJob.job_id == job_id)
+        if only_if_status is not None:
+            query = query.where(ProcessingJob.status == only_if_status)
+        
+        result = await self.session.execute(query.values(**fields))
+        return result.rowcount > 0
+    
+    async def find_job_by_content(
+        self,
+        content_hash: str,
+        params_hash: str,
+        statuses: List[str]
+    ) -> Optional[ProcessingJob]:
+        """
+        Find the most recent job for the same scan content and settings.
+        
+        Args:
+            content_hash: SHA-256 of the uploaded scan
+            params_hash: Fingerprint of the processing settings
+            statuses: Job statuses to consider
+            
+        Returns:
+            Most recent matching ProcessingJob or None
+        """
+        result = await self.session.execute(
+            select(ProcessingJob)
+            .where(
+                ProcessingJob.content_hash == content_hash,
+                ProcessingJob.params_hash == params_hash,
+                ProcessingJob.status.in_(statuses)
+            )
+            .order_by(ProcessingJob.created_at.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+    
+    async def get_unfinished_jobs(self) -> List[ProcessingJob]:
+        """
+        Get jobs that were queued or running (e.g. before a restart).
+        
+        Returns:
+            List of ProcessingJob ordered by creation time
+        """
+        result = await self.session.execute(
+            select(ProcessingJob)
+            .where(ProcessingJob.status.in_(["queued", "running"]))
+            .order_by(ProcessingJob.created_at)
+        )
+        return list(result.scalars().all())
@@ -3,15 +3,129 @@
 Reference: Section B1 - RANSAC plane detection and DBSCAN clustering.
 Implements exact parameters from knowledge document.
 """
+import itertools
+
 import open3d as o3d
 import numpy as np
 import logging
-from typing import List, Tuple, Dict, Any
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from typing import List, Tuple, Dict, Any, Optional
 
 from backend.config import settings
+from backend.processing.cluster_stats import compute_cluster_stats
+from backend.processing.manhattan import detect_manhattan_planes
+from backend.processing.spatial_index import SpatialIndex
+from backend.processing.tensor_backend import use_tensor_backend, segment_plane_tensor, cluster_dbscan_tensor
 
 logger = logging.getLogger(__name__)
 
+RANSAC_MODES = ("fixed", "adaptive")
+PLANE_DETECTORS = ("ransac", "manhattan")
+CLUSTERING_BACKENDS = ("dbscan", "voxel")
+
+# Occupancy grids whose flat voxel keys could overflow int64 fall back to DBSCAN
+MAX_CLUSTER_GRID_VOXELS = 2 ** 62
+
+# 13 of the 26 voxel neighbor offsets; the others are their negations
+HALF_NEIGHBOR_OFFSETS = np.array(
+    [offset for offset in itertools.product((-1, 0, 1), repeat=3) if offset > (0, 0, 0)],
+    dtype=np.int64
+)
+
+# Upper bound on (points x hypotheses) distances evaluated per batch
+RANSAC_BATCH_ELEMENTS = 4_000_000
+
+
+def ransac_required_iterations(inlier_ratio: float, confidence: float, sample_size: int = 3) -> float:
+    """Number of RANSAC hypotheses needed to draw an all-inlier sample.
+    
+    Standard adaptive termination: N = log(1 - p) / log(1 - w^s).
+    
+    Args:
+        inlier_ratio: Best inlier ratio observed so far (w)
+        confidence: Desired probability of at least one clean sample (p)
+        sample_size: Points per hypothesis (s)
+        
+    Returns:
+        Required iteration count (inf when no inliers have been seen)
+    """
+    clean_sample = inlier_ratio ** sample_size
+    if clean_sample <= 0.0:
+        return float("inf")
+    if clean_sample >= 1.0:
+        return 1.0
+    return np.log(1.0 - confidence) / np.log(1.0 - clean_sample)
+
+
+def segment_plane_adaptive(
+    points: np.ndarray,
+    distance_threshold: float,
+    max_iterations: int,
+    confidence: float = 0.999,
+    rng: Optional[np.random.Generator] = None
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """RANSAC plane fit with confidence-based early termination.
+    
+    Hypotheses are scored in vectorized batches. After each batch the
+    required iteration count is re-estimated from the best inlier ratio, so
+    a dominant plane (floor, large wall) terminates after a few dozen
+    hypotheses instead of max_iterations. The winning plane is refit to its
+    inliers by least squares.
+    
+    Args:
+        points: (N, 3) point positions
+        distance_threshold: Inlier distance to the plane in meters
+        max_iterations: Upper bound on hypotheses (settings.ransac_iterations)
+        confidence: Termination confidence
+        rng: Random generator (default: fresh unseeded generator)
+        
+    Returns:
+        Tuple of (plane_model [a, b, c, d], inlier indices, iterations used)
+    """
+    rng = rng or np.random.default_rng()
+    n = len(points)
+    batch_size = int(max(1, min(64, RANSAC_BATCH_ELEMENTS // max(n, 1))))
+    
+    best_model = np.zeros(4)
+    best_count = 0
+    iterations = 0
+    required = float(max_iterations)
+    
+    while iterations < min(required, max_iterations):
+        batch = min(batch_size, max_iterations - iterations)
+        samples = points[rng.integers(0, n, size=(batch, 3))]
+        normals = np.cross(samples[:, 1] - samples[:, 0], samples[:, 2] - samples[:, 0])
+        norms = np.linalg.norm(normals, axis=1)
+        valid = norms > 1e-12
+        normals[valid] /= norms[valid, None]
+        offsets = -np.einsum("ij,ij->i", normals, samples[:, 0])
+        
+        counts = (np.abs(points @ normals.T + offsets) <= distance_threshold).sum(axis=0)
+        counts[~valid] = 0
+        iterations += batch
+        
+        k = int(np.argmax(counts))
+        if counts[k] > best_count:
+            best_count = int(counts[k])
+            best_model = np.append(normals[k], offsets[k])
+            required = ransac_required_iterations(best_count / n, confidence)
+    
+    if best_count < 3:
+        return best_model, np.zeros(0, dtype=np.int64), iterations
+    
+    inliers = np.flatnonzero(np.abs(points @ best_model[:3] + best_model[3]) <= distance_threshold)
+    
+    # Least-squares refit: normal is the smallest principal axis of the inliers
+    centroid = points[inliers].mean(axis=0)
+    _, _, vt = np.linalg.svd(points[inliers] - centroid, full_matrices=False)
+    refit = np.append(vt[-1], -vt[-1] @ centroid)
+    refit_inliers = np.flatnonzero(np.abs(points @ refit[:3] + refit[3]) <= distance_threshold)
+    if len(refit_inliers) >= len(inliers):
+        best_model, inliers = refit, refit_inliers
+    
+    return best_model, inliers, iterations
+
 
 def detect_planes(
     pcd: o3d.geometry.PointCloud,
@@ -33,51 +147,307 @@ def detect_planes(
     Returns:
         Tuple of (plane_models, inlier_indices_list):
         - plane_models: List of plane equations [a, b, c, d] where ax+by+cz+d=0
-        - inlier_indices_list: List of inlier index arrays for each plane
+        - inlier_indices_list: List of inlier index arrays for each plane,
+          indexing into pcd (disjoint across planes)
+    """
+    plane_models, inlier_indices_list, _ = detect_planes_with_stats(pcd, max_planes)
+    return plane_models, inlier_indices_list
+
+
+def detect_planes_with_stats(
+    pcd: o3d.geometry.PointCloud,
+    max_planes: int = 5
+) -> Tuple[List[np.ndarray], List[np.ndarray], Dict[str, Any]]:
+    """Detect planes and report how they were found.
+    
+    With settings.plane_detector == "manhattan" the dominant-axis detector
+    (see manhattan.py) runs first; RANSAC is used when it is disabled or
+    the Manhattan assumption fails.
+    
+    RANSAC planes are peeled from one shared position array using a boolean
+    "remaining" mask; only the xyz of the remaining points is handed to
+    RANSAC (colors and normals are never copied).
+    
+    settings.ransac_mode selects the RANSAC implementation:
+    - fixed: Open3D segment_plane with settings.ransac_iterations hypotheses
+    - adaptive: segment_plane_adaptive, stopping once settings.ransac_confidence
+      is reached (bounded by settings.ransac_iterations)
+    With settings.geometry_backend == "tensor", RANSAC always runs o3d.t
+    segment_plane in fixed mode, whatever ransac_mode says.
+    
+    Args:
+        pcd: Point cloud to detect planes in
+        max_planes: Maximum number of planes to detect
+        
+    Returns:
+        Tuple of (plane_models, inlier_indices_list, statistics):
+        - plane_models, inlier_indices_list: as detect_planes
+        - statistics: detector used; for RANSAC also mode, max_iterations,
+          confidence and iterations (hypotheses evaluated per attempted plane)
     """
-    logger.info(f"Detecting up to {max_planes} planes using RANSAC...")
+    detector = settings.plane_detector
+    if detector not in PLANE_DETECTORS:
+        raise ValueError(f"Unknown plane detector: {detector} (expected one of {PLANE_DETECTORS})")
+    
+    fallback = None
+    if detector == "manhattan":
+        result = None
+        if pcd.has_normals():
+            result = detect_manhattan_planes(
+                np.asarray(pcd.points),
+                np.asarray(pcd.normals),
+                distance_threshold=settings.ransac_distance_threshold,
+                max_planes=max_planes
+            )
+        if result is not None:
+            plane_models, inlier_indices_list, statistics = result
+            statistics["detector"] = "manhattan"
+            return plane_models, inlier_indices_list, statistics
+        fallback = "manhattan"
+        logger.info("Manhattan assumption failed, falling back to RANSAC")
+    
+    mode = settings.ransac_mode
+    if mode not in RANSAC_MODES:
+        raise ValueError(f"Unknown RANSAC mode: {mode} (expected one of {RANSAC_MODES})")
+    # The tensor backend takes priority: o3d.t segment_plane has no early exit
+    tensor = use_tensor_backend()
+    if tensor:
+        mode = "fixed"
+    
+    logger.info(f"Detecting up to {max_planes} planes using RANSAC ({mode})...")
     
     plane_models = []
     inlier_indices_list = []
-    current_pcd = pcd
+    iterations_used = []
+    points = np.asarray(pcd.points)
+    remaining = np.ones(len(points), dtype=bool)
     
     for i in range(max_planes):
-        if len(current_pcd.points) < 3:
-            logger.debug(f"Not enough points for plane detection: {len(current_pcd.points)}")
+        remaining_indices = np.flatnonzero(remaining)
+        if len(remaining_indices) < 3:
+            logger.debug(f"Not enough points for plane detection: {len(remaining_indices)}")
             break
         
         # Adaptive minimum inlier threshold: 1% of remaining points, but at least 500
-        min_inliers = max(500, int(len(current_pcd.points) * 0.01))
+        min_inliers = max(500, int(len(remaining_indices) * 0.01))
         
-        # Section B1: RANSAC parameters
-        plane_model, inliers = current_pcd.segment_plane(
-            distance_threshold=settings.ransac_distance_threshold,  # 0.01m = 1cm
-            ransac_n=3,  # Minimum points for plane
-            num_iterations=settings.ransac_iterations  # 1000 iterations
-        )
+        if mode == "adaptive":
+            plane_model, inliers, iterations = segment_plane_adaptive(
+                points[remaining_indices],
+                distance_threshold=settings.ransac_distance_threshold,
+                max_iterations=settings.ransac_iterations,
+                confidence=settings.ransac_confidence
+            )
+        elif tensor:
+            plane_model, inliers = segment_plane_tensor(
+                points[remaining_indices],
+                distance_threshold=settings.ransac_distance_threshold,
+                num_iterations=settings.ransac_iterations
+            )
+            iterations = settings.ransac_iterations
+        else:
+            candidates = o3d.geometry.PointCloud()
+            candidates.points = o3d.utility.Vector3dVector(points[remaining_indices])
+            
+            # Section B1: RANSAC parameters
+            plane_model, inliers = candidates.segment_plane(
+                distance_threshold=settings.ransac_distance_threshold,  # 0.01m = 1cm
+                ransac_n=3,  # Minimum points for plane
+                num_iterations=settings.ransac_iterations  # 1000 iterations
+            )
+            iterations = settings.ransac_iterations
+        iterations_used.append(int(iterations))
         
         # Check if we found a significant plane (adaptive minimum based on point count)
         if len(inliers) < min_inliers:
             logger.debug(f"Plane {i+1}: Insufficient inliers ({len(inliers)} < {min_inliers} minimum)")
             break
         
-        plane_models.append(plane_model)
-        inlier_indices_list.append(inliers)
+        # Map inliers back to indices into the input cloud
+        global_inliers = remaining_indices[np.asarray(inliers, dtype=np.int64)]
+        plane_models.append(np.asarray(plane_model))
+        inlier_indices_list.append(global_inliers)
         
-        logger.info(f"Plane {i+1}: {len(inliers)} inliers, equation: {plane_model}")
+        logger.info(
+            f"Plane {i+1}: {len(inliers)} inliers, {iterations} iterations, equation: {plane_model}"
+        )
         
         # Remove detected plane points for next iteration
-        if len(inliers) < len(current_pcd.points):
-            current_pcd = current_pcd.select_by_index(inliers, invert=True)
-        else:
-            break
+        remaining[global_inliers] = False
     
     logger.info(f"Detected {len(plane_models)} planes")
-    return plane_models, inlier_indices_list
+    statistics = {
+        "detector": "ransac",
+        "fallback_from": fallback,
+        "mode": mode,
+        "max_iterations": settings.ransac_iterations,
+        "confidence": settings.ransac_confidence if mode == "adaptive" else None,
+        "iterations": iterations_used,
+    }
+    return plane_models, inlier_indices_list, statistics
+
+
+def remaining_points_mask(point_count: int, plane_inliers: List[np.ndarray]) -> np.ndarray:
+    """Boolean mask of points not assigned to any detected plane.
+    
+    Args:
+        point_count: Number of points in the cloud passed to detect_planes
+        plane_inliers: Inlier index arrays returned by detect_planes
+        
+    Returns:
+        (point_count,) mask, True for non-plane (object) points
+    """
+    mask = np.ones(point_count, dtype=bool)
+    for inliers in plane_inliers:
+        mask[inliers] = False
+    return mask
+
+
+def dbscan_radius() -> float:
+    """DBSCAN neighborhood radius derived from settings.
+    
+    eps is 2-3x the voxel size (clamped to 0.05-0.15m) or settings.dbscan_eps,
+    whichever is larger.
+    
+    Returns:
+        eps in meters
+    """
+    # Adaptive parameter calculation
+    # eps: 2-3x voxel size, but not less than 0.05m or more than 0.15m
+    base_eps = settings.dbscan_eps  # 0.1m default
+    voxel_ratio = 2.5  # eps should be ~2.5x voxel size for good connectivity
+    adaptive_eps = max(0.05, min(0.15, settings.voxel_size * voxel_ratio))
+    # Use the larger of base_eps and adaptive_eps for better detection
+    return max(base_eps, adaptive_eps)
+
+
+def dbscan_labels(index: SpatialIndex, eps: float, min_points: int) -> np.ndarray:
+    """DBSCAN over the cached radius neighbor graph of a spatial index.
+    
+    Same definition as Open3D cluster_dbscan: a point is core when at least
+    min_points points (itself included) lie within eps; clusters are the
+    connected components of core points, border points join a neighboring
+    core point's cluster, and everything else is noise. Clusters are
+    numbered in order of their lowest point index.
+    
+    Args:
+        index: Spatial index over the points to cluster
+        eps: Neighborhood radius in meters
+        min_points: Minimum neighborhood size of a core point
+        
+    Returns:
+        (N,) cluster labels (-1 for noise)
+    """
+    n = len(index)
+    indptr, neighbors, _ = index.radius_graph(eps)
+    rows = np.repeat(np.arange(n), np.diff(indptr))
+    core = np.diff(indptr) + 1 >= min_points
+    
+    # Connected components of the core-core subgraph
+    core_edges = core[rows] & core[neighbors]
+    graph = csr_matrix(
+        (np.ones(int(core_edges.sum()), dtype=np.int8), (rows[core_edges], neighbors[core_edges])),
+        shape=(n, n)
+    )
+    _, components = connected_components(graph, directed=False)
+    
+    # Number clusters by their lowest core point index
+    core_points = np.flatnonzero(core)
+    _, first = np.unique(components[core_points], return_index=True)
+    cluster_of_component = np.full(n, -1, dtype=np.int64)
+    cluster_of_component[components[core_points[np.sort(first)]]] = np.arange(len(first))
+    
+    labels = np.full(n, -1, dtype=np.int64)
+    labels[core_points] = cluster_of_component[components[core_points]]
+    
+    # Border points join the cluster of their first core neighbor
+    border_edges = np.flatnonzero(~core[rows] & core[neighbors])
+    border_points, first_edge = np.unique(rows[border_edges], return_index=True)
+    labels[border_points] = labels[neighbors[border_edges[first_edge]]]
+    return labels
+
+
+def voxel_cluster_labels(
+    points: np.ndarray,
+    cell_size: float,
+    min_points: int
+) -> Optional[np.ndarray]:
+    """Cluster points as 26-connected components of an occupancy grid.
+    
+    Points are rasterized into cell_size voxels, but only occupied voxels
+    are stored: each is a flat int64 key, and its 26 neighbors are found by
+    binary search in the sorted keys, so memory grows with the number of
+    points rather than with the room's bounding box. A voxel's support is
+    the number of points in it and its 26 neighbors (the grid analogue of a
+    DBSCAN eps-neighborhood); occupied voxels with at least min_points
+    support are joined with their clustered neighbors into connected
+    components, and points in the remaining voxels are noise. Clusters are
+    numbered in order of their lowest point index, like dbscan_labels.
+    
+    Args:
+        points: (N, 3) point positions
+        cell_size: Voxel edge length in meters (the DBSCAN eps)
+        min_points: Minimum support of a clustered voxel
+        
+    Returns:
+        (N,) cluster labels (-1 for noise), or None if the grid would exceed
+        MAX_CLUSTER_GRID_VOXELS
+    """
+    origin = points.min(axis=0)
+    # One empty voxel of padding on each side, so neighbor keys never wrap
+    # into the next row
+    shape = np.floor((points.max(axis=0) - origin) / cell_size).astype(np.int64) + 3
+    if np.prod(shape, dtype=np.float64) > MAX_CLUSTER_GRID_VOXELS:
+        return None
+    
+    flat = np.zeros(len(points), dtype=np.int64)
+    for axis in range(3):
+        offsets = np.subtract(points[:, axis], origin[axis], dtype=np.float64)
+        offsets /= cell_size
+        flat *= shape[axis]
+        flat += np.floor(offsets, out=offsets).astype(np.int64) + 1
+    keys, point_voxels, counts = np.unique(flat, return_inverse=True, return_counts=True)
+    del flat
+    
+    # Neighbor pairs, each found once from its lower key; a voxel has at most
+    # one neighbor per offset, so the scatter-adds below have no duplicates
+    strides = np.array([shape[1] * shape[2], shape[2], 1], dtype=np.int64)
+    support = counts.copy()
+    pairs = []
+    for step in HALF_NEIGHBOR_OFFSETS @ strides:
+        neighbor_keys = keys + step
+        found = np.minimum(np.searchsorted(keys, neighbor_keys), len(keys) - 1)
+        voxels = np.flatnonzero(keys[found] == neighbor_keys)
+        neighbors = found[voxels]
+        support[voxels] += counts[neighbors]
+        support[neighbors] += counts[voxels]
+        pairs.append((voxels, neighbors))
+    clustered = support >= min_points
+    
+    rows = np.concatenate([voxels for voxels, _ in pairs])
+    cols = np.concatenate([neighbors for _, neighbors in pairs])
+    linked = clustered[rows] & clustered[cols]
+    graph = csr_matrix(
+        (np.ones(int(linked.sum()), dtype=np.int8), (rows[linked], cols[linked])),
+        shape=(len(keys), len(keys))
+    )
+    num_components, components = connected_components(graph, directed=False)
+    point_components = np.where(clustered, components, -1)[point_voxels]
+    
+    # Renumber components by their lowest point index
+    labels = np.full(len(points), -1, dtype=np.int64)
+    member = np.flatnonzero(point_components >= 0)
+    found, first = np.unique(point_components[member], return_index=True)
+    cluster_of_component = np.zeros(num_components, dtype=np.int64)
+    cluster_of_component[found[np.argsort(first)]] = np.arange(len(found))
+    labels[member] = cluster_of_component[point_components[member]]
+    return labels
 
 
 def cluster_objects(
-    pcd: o3d.geometry.PointCloud
+    pcd: o3d.geometry.PointCloud,
+    spatial_index: Optional[SpatialIndex] = None,
+    groups: Optional[Dict[str, Any]] = None
 ) -> Tuple[np.ndarray, int, Dict[str, Any]]:
     """Cluster objects using DBSCAN algorithm with adaptive parameters.
     
@@ -92,8 +462,20 @@ def cluster_objects(
     
     Complexity: O(n log n) with spatial indexing.
     
+    settings.clustering_backend selects the engine:
+    - dbscan: Open3D cluster_dbscan; with a spatial_index over pcd's points,
+      DBSCAN runs on its cached radius neighbor graph instead (see
+      dbscan_labels). With settings.geometry_backend == "tensor" the o3d.t
+      version always runs and spatial_index is ignored.
+    - voxel: connected components of an eps-sized occupancy grid
+      (see voxel_cluster_labels), same parameters
+    
     Args:
         pcd: Point cloud to cluster
+        spatial_index: Optional shared index over pcd's points
+        groups: Optional dict filled with the per-cluster grouping
+            (compute_cluster_stats with bounding boxes), so classify_objects
+            does not group the points again
         
     Returns:
         Tuple of (labels, max_label, statistics):
@@ -101,7 +483,11 @@ def cluster_objects(
         - max_label: Maximum cluster label
         - statistics: Dictionary with cluster statistics
     """
-    logger.info(f"Clustering objects using DBSCAN...")
+    backend = settings.clustering_backend
+    if backend not in CLUSTERING_BACKENDS:
+        raise ValueError(f"Unknown clustering backend: {backend} (expected one of {CLUSTERING_BACKENDS})")
+    
+    logger.info(f"Clustering objects using {backend}...")
     
     point_count = len(pcd.points)
     
@@ -110,13 +496,7 @@ def cluster_objects(
         logger.warning(f"Not enough points for DBSCAN clustering: {point_count}")
         return np.array([]), -1, {}
     
-    # Adaptive parameter calculation
-    # eps: 2-3x voxel size, but not less than 0.05m or more than 0.15m
-    base_eps = settings.dbscan_eps  # 0.1m default
-    voxel_ratio = 2.5  # eps should be ~2.5x voxel size for good connectivity
-    adaptive_eps = max(0.05, min(0.15, settings.voxel_size * voxel_ratio))
-    # Use the larger of base_eps and adaptive_eps for better detection
-    eps = max(base_eps, adaptive_eps)
+    eps = dbscan_radius()
     
     # min_points: adapt based on point cloud size
     # For small clouds (< 200 points): use 20-30% of points
@@ -133,40 +513,53 @@ def cluster_objects(
     min_points = min(min_points, max(10, point_count - 5))
     
     logger.info(
-        f"DBSCAN parameters: eps={eps:.3f}m, min_points={min_points} "
+        f"Clustering parameters: eps={eps:.3f}m, min_points={min_points} "
         f"(point_count={point_count}, voxel_size={settings.voxel_size}m)"
     )
     
+    labels = None
+    if backend == "voxel":
+        labels = voxel_cluster_labels(np.asarray(pcd.points), cell_size=eps, min_points=min_points)
+        if labels is None:
+            logger.warning("Occupancy grid too large for voxel clustering, using DBSCAN")
+            backend = "dbscan"
+    
     # Run DBSCAN clustering
-    labels = np.array(pcd.cluster_dbscan(
-        eps=eps,
-        min_points=min_points
-    ))
+    if backend == "dbscan":
+        if use_tensor_backend():
+            labels = cluster_dbscan_tensor(np.asarray(pcd.points), eps=eps, min_points=min_points)
+        elif spatial_index is not None:
+            labels = dbscan_labels(spatial_index, eps=eps, min_points=min_points)
+        else:
+            labels = np.array(pcd.cluster_dbscan(
+                eps=eps,
+                min_points=min_points
+            ))
     
     max_label = labels.max()
-    num_clusters = max_label + 1
-    noise_points = int(np.sum(labels == -1))
+    stats = compute_cluster_stats(labels, np.asarray(pcd.points) if groups is not None else None)
+    if groups is not None:
+        groups.update(stats)
+    num_clusters = stats["num_clusters"]
+    noise_points = stats["noise_points"]
     
     logger.info(
-        f"DBSCAN clustering complete: {num_clusters} clusters "
+        f"Clustering complete ({backend}): {num_clusters} clusters "
         f"(noise: {noise_points} points, {noise_points/point_count*100:.1f}%)"
     )
     
     # Calculate cluster statistics
     cluster_stats = {
+        "backend": backend,
         "total_points": len(labels),
         "num_clusters": num_clusters,
         "noise_points": noise_points,
         "noise_ratio": noise_points / point_count if point_count > 0 else 0.0,
         "eps_used": eps,
         "min_points_used": min_points,
-        "cluster_sizes": {}
+        "cluster_sizes": {i: int(size) for i, size in enumerate(stats["counts"])}
     }
     
-    for i in range(num_clusters):
-        cluster_size = np.sum(labels == i)
-        cluster_stats["cluster_sizes"][i] = int(cluster_size)
-    
     return labels, max_label, cluster_stats
 
 
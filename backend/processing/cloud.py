@@ -0,0 +1,98 @@
+"""Compact array-backed point cloud container.
+
+Reference: Section F1 (preprocessing pipeline).
+Open3D legacy PointCloud stores points, colors and normals as float64
+(72 bytes per point). Room-scale scans need well under millimeter precision,
+so the pipeline keeps clouds as float32 positions and normals and uint8
+colors (15-27 bytes per point) and converts to Open3D only at the boundaries
+that need it (Open3D algorithms, the downsampled cloud handed to later
+stages).
+"""
+import numpy as np
+import open3d as o3d
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _compact_colors(colors: np.ndarray) -> np.ndarray:
+    """Colors as uint8; floats are taken to be in [0, 1], wider integers are rescaled."""
+    if colors.dtype == np.uint8:
+        return np.ascontiguousarray(colors)
+    if np.issubdtype(colors.dtype, np.integer):
+        scale = 255.0 / np.iinfo(colors.dtype).max
+    else:
+        scale = 255.0
+    return np.rint(np.clip(colors * scale, 0.0, 255.0)).astype(np.uint8)
+
+
+class CompactPointCloud:
+    """Point cloud with float32 positions/normals and uint8 colors.
+    
+    Attributes:
+        points: (N, 3) float32 positions
+        colors: (N, 3) uint8 colors or None
+        normals: (N, 3) float32 normals or None
+    """
+    
+    def __init__(
+        self,
+        points: np.ndarray,
+        colors: Optional[np.ndarray] = None,
+        normals: Optional[np.ndarray] = None
+    ):
+        """
+        Args:
+            points: (N, 3) positions (copied only if not contiguous float32)
+            colors: Optional (N, 3) colors, uint8, other integers or floats in [0, 1]
+            normals: Optional (N, 3) normals
+        """
+        self.points = np.ascontiguousarray(points, dtype=np.float32)
+        self.colors = _compact_colors(colors) if colors is not None else None
+        self.normals = np.ascontiguousarray(normals, dtype=np.float32) if normals is not None else None
+    
+    @classmethod
+    def from_open3d(cls, pcd: o3d.geometry.PointCloud) -> "CompactPointCloud":
+        """Convert an Open3D point cloud."""
+        return cls(
+            np.asarray(pcd.points),
+            np.asarray(pcd.colors) if pcd.has_colors() else None,
+            np.asarray(pcd.normals) if pcd.has_normals() else None
+        )
+    
+    def to_open3d(self) -> o3d.geometry.PointCloud:
+        """Convert to an Open3D point cloud (float64, colors in [0, 1])."""
+        pcd = o3d.geometry.PointCloud()
+        pcd.points = o3d.utility.Vector3dVector(self.points.astype(np.float64))
+        if self.colors is not None:
+            pcd.colors = o3d.utility.Vector3dVector(self.colors / 255.0)
+        if self.normals is not None:
+            pcd.normals = o3d.utility.Vector3dVector(self.normals.astype(np.float64))
+        return pcd
+    
+    def __len__(self) -> int:
+        return len(self.points)
+    
+    def has_colors(self) -> bool:
+        return self.colors is not None
+    
+    def has_normals(self) -> bool:
+        return self.normals is not None
+    
+    def select(self, indices: np.ndarray) -> "CompactPointCloud":
+        """Subset by point indices or boolean mask."""
+        return CompactPointCloud(
+            self.points[indices],
+            self.colors[indices] if self.colors is not None else None,
+            self.normals[indices] if self.normals is not None else None
+        )
+    
+    def color_floats(self) -> Optional[np.ndarray]:
+        """Colors as float64 in [0, 1], or None."""
+        return self.colors / 255.0 if self.colors is not None else None
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the point arrays."""
+        return sum(a.nbytes for a in (self.points, self.colors, self.normals) if a is not None)
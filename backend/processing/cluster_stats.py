@@ -0,0 +1,88 @@
+"""Per-cluster statistics from a label array in a single pass.
+
+Reference: Section B1 (DBSCAN clustering), Section D2 (object detection).
+Sorts point indices by label once and reduces each contiguous label run with
+np.bincount / ufunc.reduceat, replacing per-cluster `labels == i` mask scans
+(O(clusters x points)) with one O(n log n) pass.
+"""
+import numpy as np
+import logging
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def compute_cluster_stats(
+    labels: np.ndarray,
+    points: Optional[np.ndarray] = None,
+    colors: Optional[np.ndarray] = None
+) -> Dict[str, Any]:
+    """Compute per-cluster counts, index ranges and geometry in one pass.
+    
+    Args:
+        labels: Cluster label per point (-1 for noise)
+        points: Optional (N, 3) point coordinates aligned with labels
+        colors: Optional (N, 3) point colors aligned with labels
+    
+    Returns:
+        Dictionary with:
+        - num_clusters: max_label + 1
+        - noise_points: number of points labelled -1
+        - counts: (K,) points per cluster
+        - order: point indices grouped by cluster (noise excluded),
+          ascending within each cluster
+        - offsets: (K + 1,) cluster i occupies order[offsets[i]:offsets[i + 1]]
+        - centroids, bbox_min, bbox_max: (K, 3) arrays (only with points;
+          NaN for empty labels)
+        - color_means: (K, 3) array (only with colors)
+    """
+    labels = np.asarray(labels).astype(np.int64, copy=False)
+    num_clusters = int(labels.max()) + 1 if labels.size > 0 else 0
+    
+    # Stable sort keeps original index order inside each cluster (same as np.where)
+    order = np.argsort(labels, kind="stable")
+    first_cluster = int(np.searchsorted(labels[order], 0, side="left"))
+    noise_points = first_cluster
+    order = order[first_cluster:]
+    
+    counts = np.bincount(labels[labels >= 0], minlength=num_clusters)
+    offsets = np.zeros(num_clusters + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    
+    stats: Dict[str, Any] = {
+        "num_clusters": num_clusters,
+        "noise_points": noise_points,
+        "counts": counts,
+        "order": order,
+        "offsets": offsets,
+    }
+    
+    # reduceat is undefined for empty segments, so only reduce non-empty clusters
+    nonempty = counts > 0
+    starts = offsets[:-1][nonempty]
+    
+    if points is not None:
+        grouped = np.asarray(points, dtype=np.float64)[order]
+        centroids = np.full((num_clusters, 3), np.nan)
+        bbox_min = np.full((num_clusters, 3), np.nan)
+        bbox_max = np.full((num_clusters, 3), np.nan)
+        if starts.size > 0:
+            centroids[nonempty] = np.add.reduceat(grouped, starts, axis=0) / counts[nonempty, None]
+            bbox_min[nonempty] = np.minimum.reduceat(grouped, starts, axis=0)
+            bbox_max[nonempty] = np.maximum.reduceat(grouped, starts, axis=0)
+        stats["centroids"] = centroids
+        stats["bbox_min"] = bbox_min
+        stats["bbox_max"] = bbox_max
+    
+    if colors is not None and len(colors) == len(labels):
+        grouped_colors = np.asarray(colors, dtype=np.float64)[order]
+        color_means = np.full((num_clusters, 3), np.nan)
+        if starts.size > 0:
+            color_means[nonempty] = (
+                np.add.reduceat(grouped_colors, starts, axis=0) / counts[nonempty, None]
+            )
+        stats["color_means"] = color_means
+    
+    logger.debug(f"Cluster statistics: {num_clusters} clusters, {noise_points} noise points")
+    return stats
+
@@ -0,0 +1,185 @@
+"""Execution backends for the room processing pipeline.
+
+Reference: Section F2 - Performance targets for concurrent processing.
+The pipeline can run inline (on the calling thread), in a thread pool, or in
+a pool of long-lived worker processes with Open3D pre-imported. The process
+pool isolates each pipeline's GIL and heap from the API event loop and
+recycles workers after a fixed number of jobs to limit memory fragmentation.
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from backend.config import settings
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_BACKENDS = ("inline", "thread", "process")
+
+
+def _worker_initializer() -> None:
+    """Prepare a pipeline worker process.
+    
+    Imports Open3D and the processing modules once per worker so jobs do not
+    pay the import cost, and configures logging for the child process.
+    """
+    from backend.utils.logger import setup_logging
+    setup_logging()
+    
+    import open3d  # noqa: F401
+    import backend.processing.process_room  # noqa: F401
+    
+    logging.getLogger(__name__).info(
+        f"Pipeline worker ready (pid={multiprocessing.current_process().pid})"
+    )
+
+
+def _run_in_worker(file_path: str, progress_queue: Optional[Any]) -> Dict[str, Any]:
+    """Process pool entry point: run the pipeline and forward stage updates."""
+    from backend.processing.process_room import process_room_scan
+    
+    callback = progress_queue.put if progress_queue is not None else None
+    try:
+        return process_room_scan(file_path, callback)
+    finally:
+        if progress_queue is not None:
+            progress_queue.put(None)  # Sentinel: no more stage updates
+
+
+class PipelineExecutor:
+    """Runs process_room_scan on the configured execution backend.
+    
+    Backends:
+    - inline: run on the event loop thread (debugging only, blocks the loop)
+    - thread: shared thread pool in the API process
+    - process: pool of long-lived worker processes (spawn context)
+    """
+    
+    def __init__(
+        self,
+        backend: str,
+        max_workers: int,
+        max_tasks_per_child: Optional[int] = None
+    ):
+        if backend not in EXECUTOR_BACKENDS:
+            raise ValueError(
+                f"Unknown processing backend: {backend} (expected one of {EXECUTOR_BACKENDS})"
+            )
+        self.backend = backend
+        self.max_workers = max_workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self._executor: Optional[Executor] = None
+        self._manager = None
+    
+    def _create_executor(self) -> Optional[Executor]:
+        if self.backend == "thread":
+            return ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="pipeline"
+            )
+        if self.backend == "process":
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_worker_initializer,
+                max_tasks_per_child=self.max_tasks_per_child or None,
+            )
+        return None
+    
+    def start(self) -> None:
+        """Create the underlying pool."""
+        if self._executor is None:
+            self._executor = self._create_executor()
+            logger.info(
+                f"Pipeline executor started: backend={self.backend}, "
+                f"max_workers={self.max_workers}, max_tasks_per_child={self.max_tasks_per_child}"
+            )
+    
+    def shutdown(self) -> None:
+        """Shut down the pool, waiting for running pipelines."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+    
+    async def run_pipeline(
+        self,
+        file_path: str,
+        progress_callback: Optional[Callable[[str], None]] = None
+    ) -> Dict[str, Any]:
+        """Run process_room_scan for a file on this backend.
+        
+        Args:
+            file_path: Path to PLY file
+            progress_callback: Optional stage callback (called from a
+                non-event-loop thread for thread/process backends)
+        
+        Returns:
+            Result dictionary of process_room_scan
+        
+        Raises:
+            RuntimeError: If a worker process died while processing
+        """
+        from backend.processing.process_room import process_room_scan
+        
+        if self.backend == "inline":
+            return process_room_scan(file_path, progress_callback)
+        
+        self.start()
+        loop = asyncio.get_running_loop()
+        
+        if self.backend == "thread":
+            return await loop.run_in_executor(
+                self._executor, process_room_scan, file_path, progress_callback
+            )
+        
+        # Process backend: stage updates cross the process boundary via a managed queue
+        progress_queue = None
+        drain_thread = None
+        if progress_callback is not None:
+            if self._manager is None:
+                self._manager = multiprocessing.get_context("spawn").Manager()
+            progress_queue = self._manager.Queue()
+            
+            def drain() -> None:
+                while True:
+                    stage = progress_queue.get()
+                    if stage is None:
+                        break
+                    progress_callback(stage)
+            
+            drain_thread = threading.Thread(target=drain, daemon=True)
+            drain_thread.start()
+        
+        pool = self._executor
+        try:
+            return await loop.run_in_executor(
+                pool, _run_in_worker, file_path, progress_queue
+            )
+        except BrokenProcessPool:
+            # Every job on the broken pool ends up here; only the first replaces it
+            if self._executor is pool:
+                logger.error("Pipeline worker process died; recreating process pool")
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._executor = self._create_executor()
+            if progress_queue is not None:
+                progress_queue.put(None)
+            raise RuntimeError("Processing worker crashed (possibly out of memory)")
+        finally:
+            if drain_thread is not None:
+                await asyncio.to_thread(drain_thread.join, 5.0)
+
+
+def create_pipeline_executor() -> PipelineExecutor:
+    """Create a PipelineExecutor from application settings."""
+    return PipelineExecutor(
+        backend=settings.processing_backend,
+        max_workers=settings.job_workers,
+        max_tasks_per_child=settings.processing_max_tasks_per_child,
+    )
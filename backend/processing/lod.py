@@ -0,0 +1,244 @@
+"""Multi-resolution level-of-detail (LOD) pyramid for stored point clouds.
+
+Reference: Section C3 (point cloud storage).
+At ingest the scan is voxel-downsampled at several resolutions (coarse to
+fine) and every level is split into XY patches. Each patch is encoded as a
+compact little-endian binary blob (16-bit quantized positions relative to
+the patch origin plus 8-bit colors, 9 bytes per point) and stored with its
+envelope in point_cloud_patches, so viewers can fetch a coarse level
+without touching the full scan.
+"""
+import numpy as np
+import struct
+import logging
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from backend.processing.voxel_grid import voxel_downsample
+
+logger = logging.getLogger(__name__)
+
+# Patch blob header: magic, version, flags, point count, origin (xyz), quantization step
+PATCH_MAGIC = b"LODP"
+PATCH_VERSION = 1
+PATCH_HEADER = struct.Struct("<4sBBxxI3dd")
+PATCH_FLAG_COLORS = 1
+
+# Patch stream framing: each blob is prefixed with its byte length
+PATCH_FRAME = struct.Struct("<I")
+
+# Position quantization step in meters (below the finest LOD voxel size)
+PATCH_QUANTIZATION = 0.001
+MAX_QUANTIZED = np.iinfo(np.uint16).max
+
+
+def encode_patch(points: np.ndarray, colors: Optional[np.ndarray] = None) -> bytes:
+    """Encode points (and colors in [0, 1]) as a binary patch blob.
+    
+    Positions are stored as uint16 offsets from the patch minimum in
+    PATCH_QUANTIZATION steps; the step grows for patches wider than
+    65m so offsets always fit.
+    
+    Args:
+        points: (N, 3) positions
+        colors: Optional (N, 3) colors in [0, 1]
+    
+    Returns:
+        Encoded patch bytes
+    
+    Raises:
+        ValueError: If points is empty
+    """
+    if len(points) == 0:
+        raise ValueError("Cannot encode an empty patch")
+    
+    points = np.asarray(points, dtype=np.float64)
+    origin = points.min(axis=0)
+    extent = float((points.max(axis=0) - origin).max())
+    step = max(PATCH_QUANTIZATION, extent / MAX_QUANTIZED)
+    quantized = np.rint((points - origin) / step).astype("<u2")
+    
+    flags = 0
+    body = [quantized.tobytes()]
+    if colors is not None:
+        flags |= PATCH_FLAG_COLORS
+        body.append(np.rint(np.clip(colors, 0.0, 1.0) * 255).astype(np.uint8).tobytes())
+    
+    header = PATCH_HEADER.pack(PATCH_MAGIC, PATCH_VERSION, flags, len(points), *origin, step)
+    return header + b"".join(body)
+
+
+def decode_patch(data: bytes) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Decode a patch blob created by encode_patch.
+    
+    Args:
+        data: Encoded patch bytes
+    
+    Returns:
+        Tuple of (points (N, 3) float64, colors (N, 3) float64 in [0, 1] or None)
+    
+    Raises:
+        ValueError: If data is not a valid patch blob
+    """
+    if len(data) < PATCH_HEADER.size:
+        raise ValueError("Patch blob too short")
+    magic, version, flags, count, ox, oy, oz, step = PATCH_HEADER.unpack_from(data)
+    if magic != PATCH_MAGIC or version != PATCH_VERSION:
+        raise ValueError(f"Unsupported patch format: {magic!r} v{version}")
+    
+    has_colors = bool(flags & PATCH_FLAG_COLORS)
+    expected = PATCH_HEADER.size + count * 6 + (count * 3 if has_colors else 0)
+    if len(data) != expected:
+        raise ValueError(f"Patch blob size {len(data)} does not match {count} points")
+    
+    offset = PATCH_HEADER.size
+    quantized = np.frombuffer(data, dtype="<u2", count=count * 3, offset=offset).reshape(count, 3)
+    points = quantized * step + np.array([ox, oy, oz])
+    
+    colors = None
+    if has_colors:
+        offset += count * 6
+        colors = np.frombuffer(data, dtype=np.uint8, count=count * 3, offset=offset).reshape(count, 3) / 255.0
+    return points, colors
+
+
+def frame_patches(blobs: Iterable[bytes]) -> Iterator[bytes]:
+    """Length-prefix patch blobs for a binary stream.
+    
+    Args:
+        blobs: Encoded patches
+    
+    Yields:
+        PATCH_FRAME length followed by the blob, one chunk per patch
+    """
+    for blob in blobs:
+        yield PATCH_FRAME.pack(len(blob)) + blob
+
+
+def read_patch_stream(payload: bytes) -> Iterator[bytes]:
+    """Split a framed patch stream (see frame_patches) back into blobs.
+    
+    Args:
+        payload: Concatenated frames
+    
+    Yields:
+        Encoded patch blobs
+    
+    Raises:
+        ValueError: If the stream is truncated
+    """
+    offset = 0
+    while offset < len(payload):
+        if offset + PATCH_FRAME.size > len(payload):
+            raise ValueError("Truncated patch stream")
+        (length,) = PATCH_FRAME.unpack_from(payload, offset)
+        offset += PATCH_FRAME.size
+        if offset + length > len(payload):
+            raise ValueError("Truncated patch stream")
+        yield payload[offset:offset + length]
+        offset += length
+
+
+def split_patches(
+    points: np.ndarray,
+    patch_size: float,
+    pad: float = 0.0
+) -> List[Dict[str, Any]]:
+    """Group points into square XY patches.
+    
+    Args:
+        points: (N, 3) positions
+        patch_size: Patch edge length in meters
+        pad: Margin added around each patch's point bounds in its envelope
+    
+    Returns:
+        List of patches in (y, x) cell order, each with indices (ascending
+        point indices), envelope (min_x, min_y, max_x, max_y), z_min and z_max
+    """
+    cells = np.floor(points[:, :2] / patch_size).astype(np.int64)
+    cells -= cells.min(axis=0)
+    keys = cells[:, 1] * (int(cells[:, 0].max()) + 1) + cells[:, 0]
+    order = np.argsort(keys, kind="stable")
+    boundaries = np.flatnonzero(np.diff(keys[order])) + 1
+    
+    patches = []
+    for indices in np.split(order, boundaries):
+        patch_points = points[indices]
+        low = patch_points.min(axis=0)
+        high = patch_points.max(axis=0)
+        patches.append({
+            "indices": indices,
+            "envelope": (low[0] - pad, low[1] - pad, high[0] + pad, high[1] + pad),
+            "z_min": float(low[2]),
+            "z_max": float(high[2]),
+        })
+    return patches
+
+
+def build_lod_pyramid(
+    points: np.ndarray,
+    colors: Optional[np.ndarray],
+    voxel_sizes: List[float],
+    patch_size: float,
+    source_voxel_size: float = 0.0
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Downsample a cloud at each LOD voxel size and encode it in patches.
+    
+    Args:
+        points: (N, 3) source positions
+        colors: Optional (N, 3) source colors, floats in [0, 1] or uint8
+        voxel_sizes: LOD voxel sizes in meters (sorted coarse to fine)
+        patch_size: Patch edge length in meters
+        source_voxel_size: Resolution of the source cloud; levels finer than
+            it are skipped (they would only repeat the source)
+    
+    Returns:
+        Tuple of (patches, statistics). Each patch has lod_level (0 is the
+        coarsest), voxel_size, patch_index, point_count, envelope, z_min,
+        z_max and data (encoded blob). Statistics list points, patches and
+        bytes per level.
+    """
+    levels = sorted((size for size in voxel_sizes if size >= source_voxel_size), reverse=True)
+    skipped = [size for size in voxel_sizes if size < source_voxel_size]
+    if skipped:
+        logger.info(f"LOD levels {skipped} finer than the source resolution {source_voxel_size}m skipped")
+    
+    color_scale = 255.0 if colors is not None and colors.dtype == np.uint8 else 1.0
+    
+    patches = []
+    level_stats = []
+    for level, voxel_size in enumerate(levels):
+        grid = voxel_downsample(points, voxel_size, colors=colors)
+        level_points = grid["points"]
+        level_colors = grid.get("colors")
+        if level_colors is not None:
+            level_colors = level_colors / color_scale
+        
+        level_bytes = 0
+        level_patches = split_patches(level_points, patch_size, pad=voxel_size / 2)
+        for patch_index, patch in enumerate(level_patches):
+            indices = patch["indices"]
+            data = encode_patch(
+                level_points[indices],
+                level_colors[indices] if level_colors is not None else None
+            )
+            level_bytes += len(data)
+            patches.append({
+                "lod_level": level,
+                "voxel_size": voxel_size,
+                "patch_index": patch_index,
+                "point_count": int(len(indices)),
+                "envelope": patch["envelope"],
+                "z_min": patch["z_min"],
+                "z_max": patch["z_max"],
+                "data": data,
+            })
+        
+        level_stats.append({
+            "voxel_size": voxel_size,
+            "points": int(len(level_points)),
+            "patches": len(level_patches),
+            "bytes": level_bytes,
+        })
+    
+    logger.info(f"Built LOD pyramid: {len(levels)} levels, {len(patches)} patches")
+    return patches, {"levels": level_stats, "patch_size": patch_size}
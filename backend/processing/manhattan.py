@@ -0,0 +1,218 @@
+"""Manhattan-world plane detection for rectilinear rooms.
+
+Reference: Section B1 (plane detection), Section D1 (room dimensions).
+Most rooms are bounded by planes along three orthogonal directions. The
+dominant directions are found from a histogram of the estimated normals, and
+plane offsets from 1D histograms of point projections along each direction.
+This is O(n) with no random sampling; callers fall back to RANSAC when the
+Manhattan assumption does not hold.
+"""
+import numpy as np
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cells per axis of the unit-cube grid used for the normal histogram (~6 degrees)
+NORMAL_HISTOGRAM_BINS = 32
+
+# Normals within this angle of an axis support that axis
+AXIS_ANGLE_TOLERANCE_DEG = 15.0
+
+# Minimum fraction of normals explained by the three axes
+MIN_AXIS_SUPPORT = 0.5
+
+# Vertical axis must be this close to +z (same rule as identify_floor_and_ceiling)
+MIN_VERTICAL_ALIGNMENT = 0.9
+
+# Minimum separation between two parallel planes along an axis (meters)
+MIN_PLANE_SEPARATION = 0.1
+
+
+def _fold_axial(normals: np.ndarray) -> np.ndarray:
+    """Map n and -n to the same vector (largest-magnitude component positive)."""
+    dominant = np.abs(normals).argmax(axis=1)
+    signs = np.sign(normals[np.arange(len(normals)), dominant])
+    signs[signs == 0] = 1.0
+    return normals * signs[:, None]
+
+
+def _dominant_direction(normals: np.ndarray) -> Optional[np.ndarray]:
+    """Peak of the axial normal histogram, refined by the principal direction.
+    
+    Args:
+        normals: (N, 3) unit normals
+    
+    Returns:
+        Unit direction or None if normals is empty
+    """
+    if len(normals) == 0:
+        return None
+    
+    folded = _fold_axial(normals)
+    cells = np.clip(
+        ((folded + 1.0) * 0.5 * NORMAL_HISTOGRAM_BINS).astype(np.int64),
+        0, NORMAL_HISTOGRAM_BINS - 1
+    )
+    keys = np.ravel_multi_index(cells.T, (NORMAL_HISTOGRAM_BINS,) * 3)
+    peak = np.bincount(keys).argmax()
+    seed = folded[keys == peak].mean(axis=0)
+    seed /= np.linalg.norm(seed)
+    
+    # Refine: principal eigenvector of the scatter of normals near the peak
+    cos_tol = np.cos(np.radians(AXIS_ANGLE_TOLERANCE_DEG))
+    near = normals[np.abs(normals @ seed) >= cos_tol]
+    _, vectors = np.linalg.eigh(near.T @ near)
+    return vectors[:, -1]
+
+
+def find_manhattan_axes(normals: np.ndarray) -> Optional[Tuple[np.ndarray, float]]:
+    """Find three dominant orthogonal directions from point normals.
+    
+    Args:
+        normals: (N, 3) estimated normals
+    
+    Returns:
+        Tuple of (axes, support) where axes is a (3, 3) array with the
+        vertical axis (oriented +z) first, or None if the Manhattan
+        assumption fails
+    """
+    lengths = np.linalg.norm(normals, axis=1)
+    normals = normals[lengths > 1e-9] / lengths[lengths > 1e-9, None]
+    if len(normals) == 0:
+        return None
+    
+    sin_tol = np.sin(np.radians(AXIS_ANGLE_TOLERANCE_DEG))
+    
+    first = _dominant_direction(normals)
+    # Second axis: dominant direction among normals perpendicular to the first
+    second = _dominant_direction(normals[np.abs(normals @ first) <= sin_tol])
+    if second is None:
+        return None
+    second = second - (second @ first) * first
+    second /= np.linalg.norm(second)
+    third = np.cross(first, second)
+    axes = np.stack([first, second, third])
+    
+    # Support: fraction of normals explained by any of the three axes
+    cos_tol = np.cos(np.radians(AXIS_ANGLE_TOLERANCE_DEG))
+    support = float(np.mean((np.abs(normals @ axes.T) >= cos_tol).any(axis=1)))
+    if support < MIN_AXIS_SUPPORT:
+        logger.info(f"Manhattan axes rejected: support {support:.2f} < {MIN_AXIS_SUPPORT}")
+        return None
+    
+    # Vertical axis first, pointing up
+    vertical = int(np.abs(axes[:, 2]).argmax())
+    if abs(axes[vertical, 2]) < MIN_VERTICAL_ALIGNMENT:
+        logger.info("Manhattan axes rejected: no axis aligned with vertical")
+        return None
+    axes = axes[[vertical] + [i for i in range(3) if i != vertical]]
+    if axes[0, 2] < 0:
+        axes[0] = -axes[0]
+    
+    return axes, support
+
+
+def _axis_offsets(
+    projections: np.ndarray,
+    bin_width: float,
+    min_support: int
+) -> List[float]:
+    """Plane offsets along an axis from a 1D histogram of projections.
+    
+    Peaks are taken greedily by count with non-maximum suppression within
+    MIN_PLANE_SEPARATION, then refined to the median projection in the bin
+    neighborhood.
+    """
+    if len(projections) == 0:
+        return []
+    
+    low = projections.min()
+    bins = np.floor((projections - low) / bin_width).astype(np.int64)
+    counts = np.bincount(bins)
+    # Count each peak over a 3-bin window so planes straddling a bin edge are not split
+    window = counts + np.concatenate([[0], counts[:-1]]) + np.concatenate([counts[1:], [0]])
+    
+    suppress = int(np.ceil(MIN_PLANE_SEPARATION / bin_width))
+    available = np.ones(len(window), dtype=bool)
+    offsets = []
+    for peak in np.argsort(window)[::-1]:
+        if window[peak] < min_support:
+            break
+        if not available[peak]:
+            continue
+        available[max(0, peak - suppress):peak + suppress + 1] = False
+        near = np.abs(bins - peak) <= 1
+        offsets.append(float(np.median(projections[near])))
+    return offsets
+
+
+def detect_manhattan_planes(
+    points: np.ndarray,
+    normals: np.ndarray,
+    distance_threshold: float,
+    max_planes: int = 5
+) -> Optional[Tuple[List[np.ndarray], List[np.ndarray], Dict[str, Any]]]:
+    """Detect axis-aligned room planes under the Manhattan-world assumption.
+    
+    Args:
+        points: (N, 3) point positions
+        normals: (N, 3) estimated normals (see preprocess_point_cloud)
+        distance_threshold: Inlier distance to a plane in meters
+        max_planes: Maximum number of planes to return (largest first)
+    
+    Returns:
+        Tuple of (plane_models, inlier_indices_list, statistics) in the
+        detect_planes format, with plane normals pointing into the room,
+        or None if the Manhattan assumption fails (caller should fall back)
+    """
+    result = find_manhattan_axes(normals)
+    if result is None:
+        return None
+    axes, support = result
+    
+    n = len(points)
+    min_inliers = max(500, int(n * 0.01))
+    cos_tol = np.cos(np.radians(AXIS_ANGLE_TOLERANCE_DEG))
+    unit_normals = normals / np.maximum(np.linalg.norm(normals, axis=1), 1e-9)[:, None]
+    centroid = points.mean(axis=0)
+    
+    candidates = []
+    for axis in axes:
+        projections = points @ axis
+        aligned = np.abs(unit_normals @ axis) >= cos_tol
+        for offset in _axis_offsets(projections[aligned], 2 * distance_threshold, min_inliers):
+            plane = np.append(axis, -offset)
+            # Orient the normal towards the room interior
+            if plane[:3] @ centroid + plane[3] < 0:
+                plane = -plane
+            inliers = np.flatnonzero(np.abs(projections - offset) <= distance_threshold)
+            candidates.append((plane, inliers))
+    
+    # Largest planes first; each point belongs to at most one plane
+    candidates.sort(key=lambda c: len(c[1]), reverse=True)
+    assigned = np.zeros(n, dtype=bool)
+    plane_models = []
+    inlier_indices_list = []
+    for plane, inliers in candidates:
+        inliers = inliers[~assigned[inliers]]
+        if len(inliers) < min_inliers:
+            continue
+        assigned[inliers] = True
+        plane_models.append(plane)
+        inlier_indices_list.append(inliers)
+        if len(plane_models) == max_planes:
+            break
+    
+    has_horizontal = any(abs(plane[2]) >= MIN_VERTICAL_ALIGNMENT for plane in plane_models)
+    if not has_horizontal:
+        logger.info("Manhattan detection found no floor or ceiling plane")
+        return None
+    
+    statistics = {
+        "axes": axes,
+        "axis_support": support,
+        "plane_points": int(assigned.sum()),
+    }
+    logger.info(f"Manhattan detection: {len(plane_models)} planes, axis support {support:.2f}")
+    return plane_models, inlier_indices_list, statistics
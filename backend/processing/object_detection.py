@@ -6,10 +6,37 @@ Uses DBSCAN clustering + geometric feature extraction + heuristic classification
 import open3d as o3d
 import numpy as np
 import logging
-from typing import List, Dict, Any, Tuple
+from typing import Callable, List, Dict, Any, Tuple, Optional
+
+from backend.processing.cluster_stats import compute_cluster_stats
 
 logger = logging.getLogger(__name__)
 
+# Section D2 geometric classification rules as (object_type, confidence,
+# predicate), in priority order: the first matching rule wins. Predicates
+# read length, width, height, volume and aspect_ratio (length/width) from a
+# feature mapping and combine conditions with & and |, so the same table
+# classifies one cluster (floats) or many at once (NumPy arrays).
+ClassificationRule = Tuple[str, float, Callable[[Dict[str, Any]], Any]]
+
+CLASSIFICATION_RULES: List[ClassificationRule] = [
+    # Bed: 0.3-0.6m height, large volume (>0.8m³ catches twin and platform beds),
+    # longer than 1.5m or a large surface; checked first so beds are not tables
+    ("bed", 0.80, lambda f: (f["height"] >= 0.3) & (f["height"] <= 0.6) & (f["volume"] > 0.8)
+        & ((f["length"] > 1.5) | (f["length"] * f["width"] > 1.5))),
+    # Nightstand: table height but compact (0.05-0.5m³, under 0.6m footprint);
+    # checked before table
+    ("nightstand", 0.75, lambda f: (f["height"] >= 0.45) & (f["height"] <= 0.7)
+        & (f["volume"] >= 0.05) & (f["volume"] <= 0.5) & (f["width"] < 0.6) & (f["length"] < 0.6)),
+    ("table", 0.75, lambda f: (f["height"] >= 0.6) & (f["height"] <= 0.8) & (f["aspect_ratio"] > 0.5)),
+    ("chair", 0.70, lambda f: (f["height"] >= 0.4) & (f["height"] <= 0.5) & (f["volume"] < 0.3)),
+    ("desk", 0.72, lambda f: (f["height"] >= 0.7) & (f["height"] <= 0.8) & (f["aspect_ratio"] > 1.2)),
+    ("sofa", 0.75, lambda f: (f["height"] >= 0.7) & (f["height"] <= 0.9) & (f["length"] > 1.5)),
+    ("cabinet", 0.68, lambda f: (f["height"] > 1.2) & (f["volume"] > 0.5)),
+    # Bookshelf: tall and narrow
+    ("bookshelf", 0.65, lambda f: (f["height"] > 1.5) & (f["aspect_ratio"] < 0.3)),
+]
+
 
 def extract_geometric_features(
     cluster_pcd: o3d.geometry.PointCloud
@@ -57,6 +84,44 @@ def extract_geometric_features(
     }
 
 
+def extract_batch_features(
+    bbox_min: np.ndarray,
+    bbox_max: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """Extract geometric features for many clusters at once.
+    
+    Vectorized equivalent of extract_geometric_features: each feature is an
+    array with one entry per cluster (structure-of-arrays).
+    
+    Args:
+        bbox_min: (K, 3) axis-aligned bounding box minimum per cluster
+        bbox_max: (K, 3) axis-aligned bounding box maximum per cluster
+        
+    Returns:
+        Dictionary of (K,) feature arrays plus "center" as (K, 3)
+    """
+    extent = bbox_max - bbox_min
+    length, width, height = extent[:, 0], extent[:, 1], extent[:, 2]
+    
+    def ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+        # Same as the scalar path: 0 when the denominator is not positive
+        out = np.zeros_like(numerator)
+        np.divide(numerator, denominator, out=out, where=denominator > 0)
+        return out
+    
+    return {
+        "length": length,
+        "width": width,
+        "height": height,
+        "volume": length * width * height,
+        "aspect_ratio_xy": ratio(length, width),
+        "aspect_ratio_xz": ratio(length, height),
+        "aspect_ratio_yz": ratio(width, height),
+        "surface_area": 2 * (length * width + length * height + width * height),
+        "center": (bbox_min + bbox_max) / 2,
+    }
+
+
 def classify_by_geometry(
     dims: Dict[str, float],
     volume: float,
@@ -65,7 +130,8 @@ def classify_by_geometry(
 ) -> Tuple[str, float]:
     """Classify object by geometric heuristics.
     
-    Reference: Section D2 - Geometric classification rules:
+    Reference: Section D2 - Geometric classification rules (CLASSIFICATION_RULES,
+    first match wins):
     - Tables: 0.6-0.8m height, aspect_ratio > 0.5
     - Chairs: 0.4-0.5m height, volume < 0.3m³
     - Desks: 0.7-0.8m height, aspect_ratio > 1.2
@@ -85,140 +151,119 @@ def classify_by_geometry(
     Returns:
         Tuple of (object_type, confidence)
     """
-    length = dims.get("length", 0)
-    width = dims.get("width", 0)
-    
-    # Bed detection: 0.3-0.6m height, large volume (>0.8m³ for smaller beds)
-    # Large horizontal surface (typically 2m x 1.5m x 0.5m = 1.5m³)
-    # Check bed FIRST to avoid misclassification as table
-    # Lowered threshold to 0.8m³ to catch twin beds and platform beds
-    if 0.3 <= height <= 0.6 and volume > 0.8:
-        # Beds are typically longer than wide (length > width)
-        # Also check if it's a large surface area (length * width > 1.5m²)
-        surface_area = length * width
-        if length > 1.5 or surface_area > 1.5:  # Typical bed length is 2m, or large surface
-            return "bed", 0.80
-    
-    # Nightstand detection: 0.45-0.7m height, compact size (0.05-0.5m³)
-    # Smaller than tables but similar height, typically 0.3-0.5m width/depth
-    # Check BEFORE table to avoid misclassification
-    if 0.45 <= height <= 0.7 and 0.05 <= volume <= 0.5:
-        # Check for compact footprint (not too elongated)
-        if width < 0.6 and length < 0.6:
-            return "nightstand", 0.75
-    
-    # Table detection: 0.6-0.8m height, aspect_ratio > 0.5
-    if 0.6 <= height <= 0.8 and aspect_ratio > 0.5:
-        return "table", 0.75
-    
-    # Chair detection: 0.4-0.5m height, volume < 0.3m³
-    if 0.4 <= height <= 0.5 and volume < 0.3:
-        return "chair", 0.70
-    
-    # Desk detection: 0.7-0.8m height, aspect_ratio > 1.2
-    if 0.7 <= height <= 0.8 and aspect_ratio > 1.2:
-        return "desk", 0.72
-    
-    # Sofa detection: 0.7-0.9m height, length > 1.5m
-    if 0.7 <= height <= 0.9 and length > 1.5:
-        return "sofa", 0.75
-    
-    # Cabinet detection: height > 1.2m, volume > 0.5m³
-    if height > 1.2 and volume > 0.5:
-        return "cabinet", 0.68
-    
-    # Bookshelf: tall and narrow
-    if height > 1.5 and aspect_ratio < 0.3:
-        return "bookshelf", 0.65
+    features = {
+        "length": dims.get("length", 0),
+        "width": dims.get("width", 0),
+        "height": height,
+        "volume": volume,
+        "aspect_ratio": aspect_ratio,
+    }
+    for object_type, confidence, rule in CLASSIFICATION_RULES:
+        if rule(features):
+            return object_type, confidence
     
-    # Unknown
     return "unknown", 0.0
 
 
+def classify_by_geometry_batch(
+    features: Dict[str, np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Classify many clusters at once with the classify_by_geometry rules.
+    
+    Every CLASSIFICATION_RULES predicate is evaluated as a boolean mask over
+    all clusters and np.select picks the first matching rule, so each cluster
+    gets the identical type and confidence as classify_by_geometry.
+    
+    Args:
+        features: Result of extract_batch_features
+        
+    Returns:
+        Tuple of (object_types, confidences) arrays, one entry per cluster
+    """
+    rule_features = dict(features, aspect_ratio=features["aspect_ratio_xy"])
+    conditions = [rule(rule_features) for _, _, rule in CLASSIFICATION_RULES]
+    object_types = np.select(conditions, [name for name, _, _ in CLASSIFICATION_RULES], default="unknown")
+    confidences = np.select(conditions, [conf for _, conf, _ in CLASSIFICATION_RULES], default=0.0)
+    return object_types, confidences
+
+
 def classify_objects(
     pcd: o3d.geometry.PointCloud,
     labels: np.ndarray,
-    min_cluster_size: int = None
+    min_cluster_size: int = None,
+    stats: Optional[Dict[str, Any]] = None
 ) -> List[Dict[str, Any]]:
     """Classify objects from DBSCAN cluster labels.
     
-    Process each cluster, extract geometric features, and classify.
+    Bounding boxes for all clusters come from one compute_cluster_stats pass;
+    features and classification rules are then evaluated for every cluster
+    at once without building per-cluster point clouds.
     
     Args:
         pcd: Point cloud with clusters
         labels: DBSCAN cluster labels array (-1 for noise)
         min_cluster_size: Minimum cluster size to classify
+        stats: Precomputed compute_cluster_stats(labels, points) result
+            (computed if omitted or lacking bounding boxes)
         
     Returns:
         List of object dictionaries with type, position, dimensions, volume, confidence
     """
     logger.info(f"Classifying objects from {labels.max() + 1} clusters...")
     
-    objects = []
     max_label = labels.max()
     
     if max_label < 0:
         logger.warning("No clusters found for classification")
-        return objects
+        return []
+    
+    # Single pass over labels: per-cluster sizes and bounding boxes
+    if stats is None or "bbox_min" not in stats:
+        stats = compute_cluster_stats(labels, np.asarray(pcd.points))
+    cluster_sizes = stats["counts"]
     
     # Adaptive min_cluster_size: if not provided, use 10% of average cluster size or 15, whichever is smaller
     if min_cluster_size is None:
-        cluster_sizes = [np.sum(labels == i) for i in range(max_label + 1)]
-        if cluster_sizes:
+        if len(cluster_sizes) > 0:
             avg_size = np.mean(cluster_sizes)
             min_cluster_size = max(10, min(30, int(avg_size * 0.1)))
         else:
             min_cluster_size = 15
     
-    for i in range(max_label + 1):
-        cluster_indices = np.where(labels == i)[0]
-        
-        # Skip small clusters
-        if len(cluster_indices) < min_cluster_size:
-            logger.debug(f"Skipping cluster {i}: too small ({len(cluster_indices)} < {min_cluster_size})")
-            continue
-        
-        # Extract cluster point cloud
-        cluster_pcd = pcd.select_by_index(cluster_indices)
-        
-        # Extract geometric features
-        features = extract_geometric_features(cluster_pcd)
-        
-        # Classify by geometry
-        aspect_ratio = features["aspect_ratio_xy"]
-        obj_type, confidence = classify_by_geometry(
-            {
-                "length": features["length"],
-                "width": features["width"],
-                "height": features["height"]
-            },
-            features["volume"],
-            aspect_ratio,
-            features["height"]
-        )
-        
-        # Skip unknown objects with very low confidence
-        if obj_type == "unknown" and confidence < 0.1:
-            continue
-        
-        objects.append({
+    # Skip small clusters
+    cluster_ids = np.flatnonzero(cluster_sizes >= min_cluster_size)
+    logger.debug(
+        f"Skipping {max_label + 1 - len(cluster_ids)} clusters smaller than {min_cluster_size} points"
+    )
+    
+    # Extract geometric features and classify all clusters at once
+    features = extract_batch_features(stats["bbox_min"][cluster_ids], stats["bbox_max"][cluster_ids])
+    object_types, confidences = classify_by_geometry_batch(features)
+    
+    # Skip unknown objects with very low confidence
+    keep = ~((object_types == "unknown") & (confidences < 0.1))
+    
+    dimensions = np.stack([features["length"], features["width"], features["height"]], axis=1)
+    objects = [
+        {
             "type": obj_type,
-            "position": features["center"],  # [x, y, z]
-            "dimensions": [
-                features["length"],
-                features["width"],
-                features["height"]
-            ],
-            "volume": features["volume"],
+            "position": position,  # [x, y, z]
+            "dimensions": dims,
+            "volume": volume,
             "confidence": confidence,
-            "cluster_id": i,
-            "point_count": len(cluster_indices),
-        })
-        
-        logger.debug(
-            f"Classified cluster {i}: {obj_type} "
-            f"(confidence: {confidence:.2f}, points: {len(cluster_indices)})"
+            "cluster_id": cluster_id,
+            "point_count": point_count,
+        }
+        for obj_type, position, dims, volume, confidence, cluster_id, point_count in zip(
+            object_types[keep].tolist(),
+            features["center"][keep].tolist(),
+            dimensions[keep].tolist(),
+            features["volume"][keep].tolist(),
+            confidences[keep].tolist(),
+            cluster_ids[keep].tolist(),
+            cluster_sizes[cluster_ids[keep]].tolist(),
         )
+    ]
     
     logger.info(f"Classified {len(objects)} objects from {max_label + 1} clusters")
     return objects
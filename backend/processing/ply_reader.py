@@ -0,0 +1,228 @@
+"""Memory-mapped binary PLY reader.
+
+Reference: Section C1 (Open3D loading), Section A2 (Scaniverse PLY exports).
+Parses the PLY header and maps the vertex block straight from disk as a
+NumPy structured array, so xyz/rgb/normals are zero-copy views and extra
+per-vertex properties (confidence, intensity, ...) that Open3D drops are kept.
+"""
+import numpy as np
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from numpy.lib import recfunctions
+
+logger = logging.getLogger(__name__)
+
+# PLY scalar type names -> NumPy type codes (byte order added per file)
+PLY_TYPES = {
+    "char": "i1", "int8": "i1",
+    "uchar": "u1", "uint8": "u1",
+    "short": "i2", "int16": "i2",
+    "ushort": "u2", "uint16": "u2",
+    "int": "i4", "int32": "i4",
+    "uint": "u4", "uint32": "u4",
+    "float": "f4", "float32": "f4",
+    "double": "f8", "float64": "f8",
+}
+
+PLY_BYTE_ORDER = {
+    "binary_little_endian": "<",
+    "binary_big_endian": ">",
+}
+
+# Maximum header size scanned for end_header
+MAX_HEADER_BYTES = 65536
+
+POSITION_FIELDS = ("x", "y", "z")
+COLOR_FIELDS = ("red", "green", "blue")
+NORMAL_FIELDS = ("nx", "ny", "nz")
+
+
+def read_ply_header(file_path: str) -> Dict[str, Any]:
+    """Parse the header of a PLY file.
+    
+    Args:
+        file_path: Path to PLY file
+    
+    Returns:
+        Dictionary with format, header_size and elements
+        (list of {name, count, properties}); each property is
+        (name, type) or (name, ("list", count_type, item_type))
+    
+    Raises:
+        ValueError: If the file is not a PLY file or the header is malformed
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(MAX_HEADER_BYTES)
+    
+    if not head.startswith(b"ply"):
+        raise ValueError("Invalid PLY file header")
+    
+    end = head.find(b"end_header")
+    if end < 0:
+        raise ValueError("PLY header not terminated (end_header missing)")
+    
+    # Header ends after the newline following end_header
+    newline = head.find(b"\n", end)
+    if newline < 0:
+        raise ValueError("PLY header not terminated (end_header missing)")
+    header_size = newline + 1
+    
+    fmt = None
+    elements: List[Dict[str, Any]] = []
+    
+    for raw_line in head[:end].decode("ascii", errors="replace").splitlines():
+        parts = raw_line.split()
+        if not parts or parts[0] in ("ply", "comment", "obj_info"):
+            continue
+        
+        if parts[0] == "format":
+            fmt = parts[1]
+        elif parts[0] == "element":
+            elements.append({"name": parts[1], "count": int(parts[2]), "properties": []})
+        elif parts[0] == "property":
+            if not elements:
+                raise ValueError("PLY property declared before any element")
+            if parts[1] == "list":
+                elements[-1]["properties"].append((parts[4], ("list", parts[2], parts[3])))
+            else:
+                elements[-1]["properties"].append((parts[2], parts[1]))
+    
+    if fmt is None:
+        raise ValueError("PLY header missing format line")
+    
+    return {
+        "format": fmt,
+        "header_size": header_size,
+        "elements": elements,
+    }
+
+
+def is_binary_ply(file_path: str) -> bool:
+    """Check whether a PLY file uses a binary encoding.
+    
+    Args:
+        file_path: Path to PLY file
+    
+    Returns:
+        True for binary_little_endian/binary_big_endian, False otherwise
+        (including unreadable or non-PLY files)
+    """
+    try:
+        return read_ply_header(file_path)["format"] in PLY_BYTE_ORDER
+    except (OSError, ValueError):
+        return False
+
+
+def _element_dtype(properties: List[Tuple[str, Any]], byte_order: str) -> np.dtype:
+    """Build a structured dtype for a fixed-size PLY element."""
+    fields = []
+    for name, ply_type in properties:
+        if isinstance(ply_type, tuple):
+            raise ValueError(f"List property '{name}' has no fixed size")
+        if ply_type not in PLY_TYPES:
+            raise ValueError(f"Unsupported PLY property type: {ply_type}")
+        fields.append((name, byte_order + PLY_TYPES[ply_type]))
+    return np.dtype(fields)
+
+
+def memmap_ply_vertices(file_path: str) -> np.memmap:
+    """Memory-map the vertex block of a binary PLY file.
+    
+    Args:
+        file_path: Path to binary PLY file
+    
+    Returns:
+        Read-only structured memmap with one record per vertex
+    
+    Raises:
+        ValueError: If the file is ASCII, lacks a vertex element, the vertex
+            element has list properties, or the file is truncated
+    """
+    header = read_ply_header(file_path)
+    byte_order = PLY_BYTE_ORDER.get(header["format"])
+    if byte_order is None:
+        raise ValueError(f"Not a binary PLY file: format {header['format']}")
+    
+    # Skip any fixed-size elements declared before the vertex element
+    offset = header["header_size"]
+    vertex_element = None
+    for element in header["elements"]:
+        dtype = _element_dtype(element["properties"], byte_order)
+        if element["name"] == "vertex":
+            vertex_element = element
+            vertex_dtype = dtype
+            break
+        offset += element["count"] * dtype.itemsize
+    
+    if vertex_element is None:
+        raise ValueError("PLY file has no vertex element")
+    
+    count = vertex_element["count"]
+    required = offset + count * vertex_dtype.itemsize
+    file_size = Path(file_path).stat().st_size
+    if file_size < required:
+        raise ValueError(
+            f"PLY file truncated: {file_size} bytes, vertex block needs {required}"
+        )
+    
+    if count == 0:
+        return np.zeros(0, dtype=vertex_dtype)
+    
+    return np.memmap(file_path, dtype=vertex_dtype, mode="r", offset=offset, shape=(count,))
+
+
+def _field_view(vertices: np.ndarray, names: Tuple[str, ...]) -> Optional[np.ndarray]:
+    """Return an (N, k) view over named fields, or None if any are missing.
+    
+    The result is a zero-copy view when the fields share a dtype and are
+    packed next to each other (the usual x/y/z, nx/ny/nz, red/green/blue layout).
+    """
+    available = vertices.dtype.names or ()
+    if not all(name in available for name in names):
+        return None
+    return recfunctions.structured_to_unstructured(vertices[list(names)], copy=False)
+
+
+def load_ply_arrays(file_path: str) -> Dict[str, Any]:
+    """Load a binary PLY file as NumPy arrays without going through Open3D.
+    
+    Args:
+        file_path: Path to binary PLY file
+    
+    Returns:
+        Dictionary with:
+        - points: (N, 3) view of x/y/z
+        - colors: (N, 3) view of red/green/blue or None
+        - normals: (N, 3) view of nx/ny/nz or None
+        - attributes: dict of remaining per-vertex properties (e.g. confidence)
+        - vertex_count: number of vertices
+    
+    Raises:
+        ValueError: If the file cannot be memory-mapped (see memmap_ply_vertices)
+            or has no x/y/z properties
+    """
+    vertices = memmap_ply_vertices(file_path)
+    
+    points = _field_view(vertices, POSITION_FIELDS)
+    if points is None:
+        raise ValueError("PLY vertex element has no x/y/z properties")
+    
+    known = set(POSITION_FIELDS + COLOR_FIELDS + NORMAL_FIELDS)
+    attributes = {
+        name: vertices[name]
+        for name in vertices.dtype.names
+        if name not in known
+    }
+    
+    if attributes:
+        logger.debug(f"PLY extra vertex properties: {sorted(attributes)}")
+    
+    return {
+        "points": points,
+        "colors": _field_view(vertices, COLOR_FIELDS),
+        "normals": _field_view(vertices, NORMAL_FIELDS),
+        "attributes": attributes,
+        "vertex_count": len(vertices),
+    }
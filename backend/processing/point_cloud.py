@@ -2,17 +2,110 @@
 
 Reference: Section C1 (Open3D), Section F1 (Preprocessing pipeline).
 Implements complete preprocessing: outlier removal, voxel downsampling, normal estimation.
+The pipeline works on CompactPointCloud (float32 positions, uint8 colors) and
+converts to Open3D only where an Open3D algorithm or a later stage needs it.
 """
 import open3d as o3d
 import numpy as np
 import logging
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Dict, Tuple, Optional
 
 from backend.config import settings
+from backend.processing.cloud import CompactPointCloud
+from backend.processing.ply_reader import is_binary_ply, load_ply_arrays
+from backend.processing.spatial_index import SpatialIndex, SpatialIndexRegistry
+from backend.processing.tensor_backend import use_tensor_backend, to_tensor_cloud, from_tensor_cloud
+from backend.processing.voxel_grid import voxel_downsample
 
 logger = logging.getLogger(__name__)
 
+VOXEL_DOWNSAMPLERS = ("numpy", "open3d")
+
+# Section F1: hybrid normal search (10cm radius, at most 30 neighbors)
+NORMAL_SEARCH_RADIUS = 0.1
+NORMAL_MAX_NN = 30
+
+
+def point_cloud_from_arrays(
+    points: np.ndarray,
+    colors: Optional[np.ndarray] = None,
+    normals: Optional[np.ndarray] = None
+) -> o3d.geometry.PointCloud:
+    """Build an Open3D point cloud from NumPy arrays.
+    
+    Integer colors (e.g. uchar red/green/blue from PLY) are scaled to [0, 1].
+    Arrays are always copied, so read-only memory-mapped views are accepted.
+    
+    Args:
+        points: (N, 3) positions
+        colors: Optional (N, 3) colors
+        normals: Optional (N, 3) normals
+        
+    Returns:
+        PointCloud: Open3D point cloud
+    """
+    pcd = o3d.geometry.PointCloud()
+    pcd.points = o3d.utility.Vector3dVector(np.array(points, dtype=np.float64))
+    
+    if colors is not None:
+        if np.issubdtype(colors.dtype, np.integer):
+            colors = colors / float(np.iinfo(colors.dtype).max)
+        pcd.colors = o3d.utility.Vector3dVector(np.array(colors, dtype=np.float64))
+    
+    if normals is not None:
+        pcd.normals = o3d.utility.Vector3dVector(np.array(normals, dtype=np.float64))
+    
+    return pcd
+
+
+def _read_binary_ply_arrays(file_path: str) -> Optional[Dict[str, Optional[np.ndarray]]]:
+    """Read a binary PLY through the memory-mapped reader.
+    
+    Returns None when the file layout is not supported by the reader
+    (e.g. list properties on the vertex element) so the caller can fall
+    back to Open3D.
+    """
+    try:
+        return load_ply_arrays(file_path)
+    except ValueError as e:
+        logger.debug(f"Memory-mapped PLY reader unavailable ({e}), using Open3D")
+        return None
+
+
+def _read_binary_ply(file_path: str) -> Optional[o3d.geometry.PointCloud]:
+    """Read a binary PLY as an Open3D point cloud (see _read_binary_ply_arrays)."""
+    arrays = _read_binary_ply_arrays(file_path)
+    if arrays is None:
+        return None
+    return point_cloud_from_arrays(arrays["points"], arrays["colors"], arrays["normals"])
+
+
+def _check_scan_path(file_path: str) -> Path:
+    """Validate that file_path is an existing PLY file."""
+    path = Path(file_path)
+    
+    if not path.exists():
+        raise ValueError(f"File does not exist: {file_path}")
+    
+    if path.suffix.lower() not in [".ply"]:
+        # SPZ support deferred to Phase 5
+        raise ValueError(f"Unsupported format: {path.suffix}. Only PLY supported in Phase 1-2.")
+    
+    return path
+
+
+def _check_point_count(point_count: int) -> None:
+    """Reject empty scans and warn about sparse ones."""
+    if point_count == 0:
+        raise ValueError("Point cloud is empty")
+    
+    logger.info(f"Loaded {point_count} points")
+    
+    # Warn if point count is low (Section F1: typical room ~1-3M points)
+    if point_count < 100000:
+        logger.warning(f"Low point count: {point_count}. Scan may be incomplete.")
+
 
 def load_point_cloud(file_path: str) -> o3d.geometry.PointCloud:
     """Load point cloud from PLY file.
@@ -29,36 +122,204 @@ def load_point_cloud(file_path: str) -> o3d.geometry.PointCloud:
     Raises:
         ValueError: If file cannot be loaded or format unsupported
     """
-    path = Path(file_path)
-    
-    if not path.exists():
-        raise ValueError(f"File does not exist: {file_path}")
-    
-    if path.suffix.lower() not in [".ply"]:
-        # SPZ support deferred to Phase 5
-        raise ValueError(f"Unsupported format: {path.suffix}. Only PLY supported in Phase 1-2.")
+    path = _check_scan_path(file_path)
     
     try:
         logger.info(f"Loading point cloud from: {file_path}")
-        pcd = o3d.io.read_point_cloud(str(path))
+        pcd = None
+        # Binary PLY: memory-map the vertex block instead of Open3D parsing
+        if settings.ply_mmap_reader and is_binary_ply(str(path)):
+            pcd = _read_binary_ply(str(path))
+        if pcd is None:
+            pcd = o3d.io.read_point_cloud(str(path))
         
-        if len(pcd.points) == 0:
-            raise ValueError("Point cloud is empty")
+        _check_point_count(len(pcd.points))
+        return pcd
         
-        logger.info(f"Loaded {len(pcd.points)} points")
+    except Exception as e:
+        logger.error(f"Error loading point cloud: {e}")
+        raise ValueError(f"Failed to load point cloud: {str(e)}")
+
+
+def load_compact_point_cloud(file_path: str) -> CompactPointCloud:
+    """Load a PLY file as a CompactPointCloud.
+    
+    Binary PLY vertex blocks are memory-mapped and converted straight to
+    float32/uint8 arrays, so the float64 Open3D cloud is never built. Other
+    layouts are read by Open3D and converted.
+    
+    Args:
+        file_path: Path to PLY file
         
-        # Warn if point count is low (Section F1: typical room ~1-3M points)
-        if len(pcd.points) < 100000:
-            logger.warning(f"Low point count: {len(pcd.points)}. Scan may be incomplete.")
+    Returns:
+        CompactPointCloud: Loaded point cloud
         
-        return pcd
+    Raises:
+        ValueError: If file cannot be loaded or format unsupported
+    """
+    path = _check_scan_path(file_path)
+    
+    try:
+        logger.info(f"Loading point cloud from: {file_path}")
+        arrays = None
+        if settings.ply_mmap_reader and is_binary_ply(str(path)):
+            arrays = _read_binary_ply_arrays(str(path))
+        if arrays is not None:
+            cloud = CompactPointCloud(arrays["points"], arrays["colors"], arrays["normals"])
+        else:
+            cloud = CompactPointCloud.from_open3d(o3d.io.read_point_cloud(str(path)))
+        
+        _check_point_count(len(cloud))
+        return cloud
         
     except Exception as e:
         logger.error(f"Error loading point cloud: {e}")
         raise ValueError(f"Failed to load point cloud: {str(e)}")
 
 
-def preprocess_point_cloud(pcd: o3d.geometry.PointCloud) -> o3d.geometry.PointCloud:
+def estimate_normals_indexed(
+    index: SpatialIndex,
+    radius: float = NORMAL_SEARCH_RADIUS,
+    max_nn: int = NORMAL_MAX_NN
+) -> np.ndarray:
+    """Estimate normals from the cached radius neighbor graph.
+    
+    Equivalent to Open3D hybrid (radius + max_nn) normal estimation: the
+    normal is the smallest principal axis of the covariance of each point
+    and its nearest neighbors within radius (at most max_nn points in total).
+    Sign is arbitrary, as in Open3D without orientation.
+    
+    Args:
+        index: Spatial index over the cloud
+        radius: Search radius in meters
+        max_nn: Maximum neighborhood size (including the point)
+        
+    Returns:
+        (N, 3) unit normals ([0, 0, 1] where fewer than 3 points are in range)
+    """
+    points = index.points
+    n = len(points)
+    indptr, neighbors, distances = index.radius_graph(radius)
+    counts = np.diff(indptr)
+    rows = np.repeat(np.arange(n), counts)
+    
+    # Keep only the max_nn - 1 nearest neighbors; rows are unordered, so sort
+    # the edges of rows that exceed the limit by distance
+    crowded = np.flatnonzero((counts > max_nn - 1)[rows])
+    if len(crowded) > 0:
+        crowded = crowded[np.lexsort((distances[crowded], rows[crowded]))]
+        crowded_rows = rows[crowded]
+        rank = np.arange(len(crowded)) - np.searchsorted(crowded_rows, crowded_rows)
+        keep = np.ones(len(neighbors), dtype=bool)
+        keep[crowded[rank >= max_nn - 1]] = False
+        rows, neighbors = rows[keep], neighbors[keep]
+    
+    # Accumulate first and second moments per point (each point counts itself);
+    # neighbor coordinates are gathered in the index dtype, products and sums
+    # are float64
+    size = np.bincount(rows, minlength=n) + 1.0
+    neighbor_points = points[neighbors]
+    mean = np.empty((n, 3))
+    for a in range(3):
+        mean[:, a] = np.bincount(rows, weights=neighbor_points[:, a], minlength=n) + points[:, a]
+    mean /= size[:, None]
+    
+    covariance = np.empty((n, 3, 3))
+    for a in range(3):
+        for b in range(a, 3):
+            moment = np.bincount(
+                rows,
+                weights=np.multiply(neighbor_points[:, a], neighbor_points[:, b], dtype=np.float64),
+                minlength=n
+            ) + np.multiply(points[:, a], points[:, b], dtype=np.float64)
+            covariance[:, a, b] = covariance[:, b, a] = moment / size - mean[:, a] * mean[:, b]
+    
+    _, vectors = np.linalg.eigh(covariance)
+    normals = vectors[:, :, 0]
+    normals[size < 3] = (0.0, 0.0, 1.0)
+    return normals
+
+
+def remove_outliers(cloud: CompactPointCloud) -> CompactPointCloud:
+    """Statistical outlier removal (Section F1: 20 neighbors, 2.0 std ratio).
+    
+    Runs Open3D remove_statistical_outlier on the positions (the tensor
+    version with settings.geometry_backend == "tensor") and selects the
+    inliers from the compact arrays, so colors and normals are not converted.
+    
+    Args:
+        cloud: Input point cloud
+        
+    Returns:
+        CompactPointCloud: Inlier points
+    """
+    if use_tensor_backend():
+        _, mask = to_tensor_cloud(CompactPointCloud(cloud.points)).remove_statistical_outliers(
+            nb_neighbors=settings.outlier_neighbors,
+            std_ratio=settings.outlier_std_ratio
+        )
+        inliers = mask.numpy()
+    else:
+        _, inliers = CompactPointCloud(cloud.points).to_open3d().remove_statistical_outlier(
+            nb_neighbors=settings.outlier_neighbors,
+            std_ratio=settings.outlier_std_ratio
+        )
+        inliers = np.asarray(inliers, dtype=np.int64)
+    cloud_clean = cloud.select(inliers)
+    
+    removed = len(cloud) - len(cloud_clean)
+    logger.info(f"Removed {removed} outliers ({removed/len(cloud)*100:.1f}%)")
+    return cloud_clean
+
+
+def downsample_point_cloud(
+    cloud: CompactPointCloud,
+    voxel_size: float,
+    layers: Optional[Dict[str, np.ndarray]] = None
+) -> CompactPointCloud:
+    """Voxel-downsample a point cloud with the NumPy kernel.
+    
+    Same voxels as Open3D voxel_down_sample (see voxel_grid.voxel_downsample);
+    points are returned in voxel key order and mean normals are re-normalized.
+    Colors are averaged from the uint8 arrays and stored back as uint8; the
+    color variance layer is in [0, 1] units.
+    
+    Args:
+        cloud: Input point cloud
+        voxel_size: Voxel edge length in meters
+        layers: Optional dict filled with per-voxel layers aligned with the
+            returned points: density (points per voxel), z_min, z_max and,
+            with colors, color_variance
+        
+    Returns:
+        CompactPointCloud: Downsampled point cloud
+    """
+    grid = voxel_downsample(
+        cloud.points,
+        voxel_size,
+        colors=cloud.colors,
+        normals=cloud.normals
+    )
+    colors = grid.get("colors")
+    if colors is not None:
+        colors /= 255.0
+    
+    if layers is not None:
+        layers["density"] = grid["counts"]
+        layers["z_min"] = grid["z_min"]
+        layers["z_max"] = grid["z_max"]
+        if "color_variance" in grid:
+            layers["color_variance"] = grid["color_variance"] / 255.0 ** 2
+    
+    return CompactPointCloud(grid["points"], colors, grid.get("normals"))
+
+
+def preprocess_compact(
+    cloud: CompactPointCloud,
+    indexes: Optional[SpatialIndexRegistry] = None,
+    layers: Optional[Dict[str, np.ndarray]] = None,
+    outliers_removed: bool = False
+) -> CompactPointCloud:
     """Complete preprocessing pipeline for point cloud.
     
     Reference: Section F1 - Preprocessing operations:
@@ -66,47 +327,150 @@ def preprocess_point_cloud(pcd: o3d.geometry.PointCloud) -> o3d.geometry.PointCl
     2. Voxel downsampling (0.05m voxels)
     3. Normal estimation
     
+    Outlier removal (see remove_outliers) always uses Open3D: the raw
+    cloud is queried once, and Open3D's k-NN search is faster than building
+    a cKDTree that no later stage reuses. With a SpatialIndexRegistry, normal
+    estimation uses a shared "processed" index instead of Open3D's per-call
+    KD-tree, and clustering reuses its neighbor graph.
+    
+    settings.voxel_downsampler selects the NumPy kernel (which can also
+    return per-voxel layers, see downsample_point_cloud) or Open3D
+    voxel_down_sample.
+    
+    Intermediate clouds stay compact; Open3D clouds are built only for the
+    Open3D fallbacks (without an index registry or with the Open3D
+    downsampler).
+    
+    With settings.geometry_backend == "tensor" all three steps run on an
+    o3d.t point cloud instead (see preprocess_tensor).
+    
     Args:
-        pcd: Input point cloud
+        cloud: Input point cloud
+        indexes: Optional pipeline spatial index registry
+        layers: Optional dict filled with per-voxel layers of the returned
+            cloud (NumPy downsampler only)
+        outliers_removed: Whether cloud was already filtered by
+            remove_outliers (step 1 is then skipped)
         
     Returns:
-        PointCloud: Preprocessed point cloud
+        CompactPointCloud: Preprocessed point cloud
     """
-    logger.info(f"Preprocessing point cloud with {len(pcd.points)} points")
-    original_count = len(pcd.points)
+    if use_tensor_backend():
+        return preprocess_tensor(cloud, outliers_removed)
+    
+    if settings.voxel_downsampler not in VOXEL_DOWNSAMPLERS:
+        raise ValueError(
+            f"Unknown voxel downsampler: {settings.voxel_downsampler} "
+            f"(expected one of {VOXEL_DOWNSAMPLERS})"
+        )
+    
+    logger.info(f"Preprocessing point cloud with {len(cloud)} points")
+    original_count = len(cloud)
     
     # Step 1: Statistical Outlier Removal
     # Section F1: 20 neighbors, 2.0 std ratio
-    logger.debug("Removing statistical outliers...")
-    pcd_clean, outlier_indices = pcd.remove_statistical_outlier(
-        nb_neighbors=settings.outlier_neighbors,
-        std_ratio=settings.outlier_std_ratio
-    )
-    
-    removed_outliers = original_count - len(pcd_clean.points)
-    logger.info(f"Removed {removed_outliers} outliers ({removed_outliers/original_count*100:.1f}%)")
+    if outliers_removed:
+        cloud_clean = cloud
+    else:
+        logger.debug("Removing statistical outliers...")
+        cloud_clean = remove_outliers(cloud)
     
     # Step 2: Voxel Downsampling
     # Section F1: 0.05m (5cm) voxels
     logger.debug(f"Downsampling with voxel size: {settings.voxel_size}m...")
-    pcd_down = pcd_clean.voxel_down_sample(voxel_size=settings.voxel_size)
+    if settings.voxel_downsampler == "numpy":
+        cloud_down = downsample_point_cloud(cloud_clean, settings.voxel_size, layers)
+    else:
+        cloud_down = CompactPointCloud.from_open3d(
+            cloud_clean.to_open3d().voxel_down_sample(voxel_size=settings.voxel_size)
+        )
     
-    logger.info(f"Downsampled to {len(pcd_down.points)} points ({(1 - len(pcd_down.points)/len(pcd_clean.points))*100:.1f}% reduction)")
+    logger.info(f"Downsampled to {len(cloud_down)} points ({(1 - len(cloud_down)/len(cloud_clean))*100:.1f}% reduction)")
+    del cloud_clean
     
     # Step 3: Normal Estimation
     # Required for surface reconstruction and plane detection
     logger.debug("Estimating normals...")
-    pcd_down.estimate_normals(
-        search_param=o3d.geometry.KDTreeSearchParamHybrid(
-            radius=0.1,  # 10cm search radius
-            max_nn=30    # Maximum 30 neighbors
+    if indexes is not None:
+        processed_index = indexes.create("processed", cloud_down.points)
+        cloud_down.normals = estimate_normals_indexed(
+            processed_index, NORMAL_SEARCH_RADIUS, NORMAL_MAX_NN
+        ).astype(np.float32)
+    else:
+        # Open3D orients estimated normals along existing ones, so keep them
+        pcd_down = cloud_down.to_open3d()
+        pcd_down.estimate_normals(
+            search_param=o3d.geometry.KDTreeSearchParamHybrid(
+                radius=NORMAL_SEARCH_RADIUS,  # 10cm search radius
+                max_nn=NORMAL_MAX_NN          # Maximum 30 neighbors
+            )
         )
-    )
+        cloud_down.normals = np.asarray(pcd_down.normals, dtype=np.float32)
     
     logger.info("Normal estimation complete")
-    logger.info(f"Preprocessing complete: {original_count} -> {len(pcd_down.points)} points")
+    logger.info(f"Preprocessing complete: {original_count} -> {len(cloud_down)} points")
+    
+    return cloud_down
+
+
+def preprocess_tensor(cloud: CompactPointCloud, outliers_removed: bool = False) -> CompactPointCloud:
+    """Preprocessing with the Open3D tensor API (same steps and parameters).
+    
+    Positions stay float32 tensors shared with NumPy. Spatial indexes and
+    per-voxel layers are not produced; Open3D builds its own neighbor
+    searches.
+    
+    Args:
+        cloud: Input point cloud
+        outliers_removed: Whether cloud was already filtered by remove_outliers
+        
+    Returns:
+        CompactPointCloud: Preprocessed point cloud
+    """
+    logger.info(f"Preprocessing point cloud with {len(cloud)} points (tensor backend)")
+    original_count = len(cloud)
+    
+    tpcd = to_tensor_cloud(cloud)
+    if not outliers_removed:
+        tpcd, _ = tpcd.remove_statistical_outliers(
+            nb_neighbors=settings.outlier_neighbors,
+            std_ratio=settings.outlier_std_ratio
+        )
+        clean_count = len(tpcd.point.positions)
+        logger.info(f"Removed {original_count - clean_count} outliers ({(original_count - clean_count)/original_count*100:.1f}%)")
     
-    return pcd_down
+    # o3d.t anchors voxels at the coordinate origin; shift to the legacy grid
+    # (half a voxel below the minimum bound) so both backends produce the same
+    # voxels and a floor at z=0 is not split across two voxel layers. The
+    # filtered cloud is a copy, so the input arrays are untouched.
+    origin = tpcd.get_min_bound().numpy().astype(np.float64) - settings.voxel_size * 0.5
+    tpcd.translate(-origin)
+    tpcd = tpcd.voxel_down_sample(voxel_size=settings.voxel_size)
+    tpcd.translate(origin)
+    tpcd.estimate_normals(max_nn=NORMAL_MAX_NN, radius=NORMAL_SEARCH_RADIUS)
+    
+    cloud_down = from_tensor_cloud(tpcd)
+    logger.info(f"Preprocessing complete: {original_count} -> {len(cloud_down)} points")
+    return cloud_down
+
+
+def preprocess_point_cloud(
+    pcd: o3d.geometry.PointCloud,
+    indexes: Optional[SpatialIndexRegistry] = None,
+    layers: Optional[Dict[str, np.ndarray]] = None
+) -> o3d.geometry.PointCloud:
+    """Preprocess an Open3D point cloud (see preprocess_compact).
+    
+    Args:
+        pcd: Input point cloud
+        indexes: Optional pipeline spatial index registry
+        layers: Optional dict filled with per-voxel layers of the returned
+            cloud (NumPy downsampler only)
+        
+    Returns:
+        PointCloud: Preprocessed point cloud
+    """
+    return preprocess_compact(CompactPointCloud.from_open3d(pcd), indexes, layers).to_open3d()
 
 
 def assess_scan_quality(pcd: o3d.geometry.PointCloud) -> dict:
@@ -120,11 +484,41 @@ def assess_scan_quality(pcd: o3d.geometry.PointCloud) -> dict:
     Returns:
         dict: Quality metrics including score, point count, density
     """
-    point_count = len(pcd.points)
-    
-    # Calculate bounding box and volume
     bbox = pcd.get_axis_aligned_bounding_box()
-    volume = bbox.volume()
+    return scan_quality_metrics(
+        len(pcd.points),
+        bbox.min_bound,
+        bbox.max_bound,
+        has_normals=pcd.has_normals(),
+        has_colors=pcd.has_colors()
+    )
+
+
+def scan_quality_metrics(
+    point_count: int,
+    min_bound: np.ndarray,
+    max_bound: np.ndarray,
+    has_normals: bool,
+    has_colors: bool
+) -> dict:
+    """Scan quality metrics from summary statistics (see assess_scan_quality).
+    
+    Used directly when the raw cloud is never loaded as a whole (tiled
+    preprocessing).
+    
+    Args:
+        point_count: Number of raw points
+        min_bound: Bounding box minimum
+        max_bound: Bounding box maximum
+        has_normals: Whether the scan has normals
+        has_colors: Whether the scan has colors
+        
+    Returns:
+        dict: Quality metrics including score, point count, density
+    """
+    min_bound = np.asarray(min_bound, dtype=np.float64)
+    max_bound = np.asarray(max_bound, dtype=np.float64)
+    volume = float(np.prod(max_bound - min_bound))
     
     point_density = point_count / volume if volume > 0 else 0
     
@@ -146,9 +540,9 @@ def assess_scan_quality(pcd: o3d.geometry.PointCloud) -> dict:
         quality_score += 0.2
     
     # Completeness checks
-    if pcd.has_normals():
+    if has_normals:
         quality_score += 0.15
-    if pcd.has_colors():
+    if has_colors:
         quality_score += 0.15
     
     rating = "excellent" if quality_score > 0.8 else \
@@ -161,8 +555,8 @@ def assess_scan_quality(pcd: o3d.geometry.PointCloud) -> dict:
         "point_density": point_density,
         "rating": rating,
         "bbox": {
-            "min": bbox.min_bound.tolist(),
-            "max": bbox.max_bound.tolist(),
+            "min": min_bound.tolist(),
+            "max": max_bound.tolist(),
         },
         "volume": volume
     }
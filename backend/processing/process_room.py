@@ -4,20 +4,55 @@ Integrates all processing modules into complete end-to-end pipeline.
 Reference: Section F1 - Complete workflow pipeline.
 """
 import open3d as o3d
+import numpy as np
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional
 import time
 
-from backend.processing.point_cloud import load_point_cloud, preprocess_point_cloud, assess_scan_quality
-from backend.processing.algorithms import detect_planes, cluster_objects
+from backend.config import settings
+from backend.processing.point_cloud import (
+    load_compact_point_cloud,
+    preprocess_compact,
+    remove_outliers,
+    scan_quality_metrics,
+    NORMAL_SEARCH_RADIUS
+)
+from backend.processing.algorithms import (
+    detect_planes_with_stats,
+    cluster_objects,
+    remaining_points_mask,
+    dbscan_radius
+)
+from backend.processing.spatial_index import SpatialIndexRegistry
+from backend.processing.tensor_backend import use_tensor_backend
+from backend.processing.voxel_grid import voxel_grid_stats
+from backend.processing.tiling import use_tiled_preprocessing, open_tiled_scan, preprocess_tiled
+from backend.processing.lod import build_lod_pyramid
+from backend.processing.profiler import StageProfiler
 from backend.processing.room_analysis import extract_room_dimensions
 from backend.processing.object_detection import classify_objects
 from backend.processing.spatial_relations import calculate_spatial_relationships
 
 logger = logging.getLogger(__name__)
 
+# Pipeline stage names reported through progress_callback (Stages 1-8)
+PIPELINE_STAGES = [
+    "loading",
+    "preprocessing",
+    "lod_pyramid",
+    "plane_detection",
+    "room_dimensions",
+    "object_isolation",
+    "clustering",
+    "classification",
+    "spatial_relationships",
+]
 
-def process_room_scan(file_path: str) -> Dict[str, Any]:
+
+def process_room_scan(
+    file_path: str,
+    progress_callback: Optional[Callable[[str], None]] = None
+) -> Dict[str, Any]:
     """Complete room processing pipeline.
     
     Reference: Section F1 - End-to-End Processing Chain:
@@ -30,6 +65,8 @@ def process_room_scan(file_path: str) -> Dict[str, Any]:
     
     Args:
         file_path: Path to PLY file
+        progress_callback: Optional callable invoked with the stage name
+            (see PIPELINE_STAGES) as each stage starts
         
     Returns:
         Dictionary with room data:
@@ -39,61 +76,159 @@ def process_room_scan(file_path: str) -> Dict[str, Any]:
             "relationships": [{object1, object2, distance, relationship}],
             "point_count": int,
             "processed_points": int,
-            "scan_quality": float
+            "scan_quality": float,
+            "plane_stats": {mode, iterations per plane, ...},
+            "spatial_index": {indexes: {name: {build_time, queries, reuses}}, ...},
+            "voxel_grid": {voxels, mean_density, max_density} (NumPy downsampler),
+            "tiling": {tiles, halo, max_tile_points, ...} (tiled preprocessing only),
+            "lod_patches": [{lod_level, voxel_size, patch_index, envelope, data, ...}],
+            "lod_stats": {levels: [{voxel_size, points, patches, bytes}], patch_size},
+            "stage_profile": [{stage, wall_time, cpu_time, points_in, points_out,
+                               rss_mb, rss_growth_mb, peak_rss_mb, ...}] (see StageProfiler)
         }
     """
     start_time = time.time()
     logger.info(f"Starting room processing pipeline for: {file_path}")
     
+    profiler = StageProfiler(trace_allocations=settings.profile_allocations)
+    
+    def report_stage(stage: str, points_in: Optional[int] = None) -> None:
+        profiler.start(stage, points_in)
+        if progress_callback is not None:
+            progress_callback(stage)
+    
     try:
+        # Large binary scans are never loaded whole; they are streamed in tiles
+        tiled = use_tiled_preprocessing(file_path)
+        
         # Stage 1: Load point cloud
         logger.info("Stage 1: Loading point cloud...")
-        pcd = load_point_cloud(file_path)
-        original_point_count = len(pcd.points)
-        
-        # Assess scan quality
-        quality_metrics = assess_scan_quality(pcd)
+        report_stage("loading")
+        if tiled:
+            scan = open_tiled_scan(file_path)
+            original_point_count = scan["point_count"]
+            quality_metrics = scan_quality_metrics(
+                original_point_count,
+                scan["min_bound"],
+                scan["max_bound"],
+                has_normals=scan["normals"] is not None,
+                has_colors=scan["colors"] is not None
+            )
+        else:
+            # float32 positions / uint8 colors until the processed cloud is handed
+            # to the Open3D-based stages
+            cloud = load_compact_point_cloud(file_path)
+            original_point_count = len(cloud)
+            
+            # Assess scan quality
+            quality_metrics = scan_quality_metrics(
+                original_point_count,
+                cloud.points.min(axis=0),
+                cloud.points.max(axis=0),
+                has_normals=cloud.has_normals(),
+                has_colors=cloud.has_colors()
+            )
+        profiler.set_points_out(original_point_count)
         logger.info(f"Scan quality: {quality_metrics['rating']} (score: {quality_metrics['quality_score']:.2f})")
         
+        # One spatial index over the processed cloud, shared by normal estimation
+        # and clustering; its neighbor graph is built at the largest radius either
+        # needs. The tensor backend runs Open3D's own neighbor searches instead.
+        indexes = None
+        if settings.shared_spatial_index and not use_tensor_backend():
+            indexes = SpatialIndexRegistry(graph_radius=max(NORMAL_SEARCH_RADIUS, dbscan_radius()))
+        
         # Stage 2: Preprocessing
         logger.info("Stage 2: Preprocessing point cloud...")
-        pcd_processed = preprocess_point_cloud(pcd)
+        report_stage("preprocessing", original_point_count)
+        # Per-voxel layers (density, z range, color variance) of the processed
+        # cloud; diagnostic only, summarized in the voxel_grid statistics
+        voxel_layers = {}
+        tiling_stats = {}
+        if tiled:
+            pcd_processed, tiling_stats = preprocess_tiled(scan, voxel_layers, indexes)
+            del scan
+        else:
+            # The outlier-filtered cloud replaces the raw one (releasing it) and
+            # is kept as the full-resolution source of the LOD pyramid
+            cloud = remove_outliers(cloud)
+            pcd_processed = preprocess_compact(
+                cloud, indexes, voxel_layers, outliers_removed=True
+            ).to_open3d()
         processed_point_count = len(pcd_processed.points)
+        profiler.set_points_out(processed_point_count)
+        
+        # Level-of-detail pyramid for storage; tiled scans are never loaded whole,
+        # so their pyramid is built from the processed cloud (no finer levels)
+        report_stage("lod_pyramid", processed_point_count if tiled else len(cloud))
+        lod_patches, lod_stats = [], {}
+        if settings.lod_voxel_sizes:
+            if tiled:
+                source_points = np.asarray(pcd_processed.points)
+                source_colors = np.asarray(pcd_processed.colors) if pcd_processed.has_colors() else None
+            else:
+                source_points, source_colors = cloud.points, cloud.colors
+            lod_patches, lod_stats = build_lod_pyramid(
+                source_points,
+                source_colors,
+                settings.lod_voxel_sizes,
+                settings.lod_patch_size,
+                source_voxel_size=settings.voxel_size if tiled else 0.0
+            )
+            del source_points, source_colors
+            profiler.set_points_out(sum(level["points"] for level in lod_stats["levels"]))
+        if not tiled:
+            del cloud
         
         # Stage 3: Plane detection (RANSAC)
         logger.info("Stage 3: Detecting planes using RANSAC...")
-        plane_models, plane_inliers = detect_planes(pcd_processed, max_planes=5)
+        report_stage("plane_detection", processed_point_count)
+        plane_models, plane_inliers, plane_stats = detect_planes_with_stats(pcd_processed, max_planes=5)
+        profiler.set_points_out(sum(len(inliers) for inliers in plane_inliers))
         
         if not plane_models:
             logger.warning("No planes detected - room dimensions may be inaccurate")
         
         # Stage 4: Extract room dimensions
         logger.info("Stage 4: Extracting room dimensions...")
+        report_stage("room_dimensions", processed_point_count)
         dimensions = extract_room_dimensions(pcd_processed, plane_models, plane_inliers)
         
         # Stage 5: Remove planes from point cloud to isolate objects
-        # Combine all plane inliers
-        all_plane_indices = set()
-        for inliers in plane_inliers:
-            all_plane_indices.update(inliers)
-        
+        report_stage("object_isolation", processed_point_count)
         # Get remaining points (objects/furniture)
-        if len(all_plane_indices) < len(pcd_processed.points):
-            objects_pcd = pcd_processed.select_by_index(
-                list(all_plane_indices), 
-                invert=True
-            )
+        object_mask = remaining_points_mask(processed_point_count, plane_inliers)
+        if object_mask.any():
+            object_indices = np.flatnonzero(object_mask)
+            objects_pcd = pcd_processed.select_by_index(object_indices)
         else:
+            object_indices = np.arange(processed_point_count)
             objects_pcd = pcd_processed
+        profiler.set_points_out(len(objects_pcd.points))
+        
+        # Object points reuse the processed cloud's neighbor graph
+        objects_index = None
+        if indexes is not None and indexes.get("processed") is not None:
+            objects_index = indexes.register(
+                indexes.get("processed").subset(object_indices, name="objects")
+            )
         
         # Stage 6: Object clustering (DBSCAN)
         logger.info("Stage 6: Clustering objects using DBSCAN...")
+        report_stage("clustering", len(objects_pcd.points))
         if len(objects_pcd.points) > 50:  # Minimum points for clustering
-            labels, max_label, cluster_stats = cluster_objects(objects_pcd)
+            # One grouping pass: classification reuses the per-cluster bounding boxes
+            cluster_groups = {}
+            labels, max_label, cluster_stats = cluster_objects(
+                objects_pcd, spatial_index=objects_index, groups=cluster_groups
+            )
+            clustered_points = int((labels >= 0).sum()) if len(labels) else 0
+            profiler.set_points_out(clustered_points)
             
             # Stage 7: Object classification
             logger.info("Stage 7: Classifying objects...")
-            objects = classify_objects(objects_pcd, labels)
+            report_stage("classification", clustered_points)
+            objects = classify_objects(objects_pcd, labels, stats=cluster_groups)
         else:
             logger.info("Insufficient points for object clustering")
             objects = []
@@ -101,10 +236,12 @@ def process_room_scan(file_path: str) -> Dict[str, Any]:
         
         # Stage 8: Spatial relationships
         logger.info("Stage 8: Analyzing spatial relationships...")
+        report_stage("spatial_relationships")
         relationships = []
         if len(objects) > 1:
             relationships = calculate_spatial_relationships(objects)
         
+        stage_profile = profiler.stop()
         processing_time = time.time() - start_time
         logger.info(f"Room processing complete in {processing_time:.2f} seconds")
         
@@ -116,10 +253,18 @@ def process_room_scan(file_path: str) -> Dict[str, Any]:
             "processed_points": processed_point_count,
             "scan_quality": quality_metrics["quality_score"],
             "processing_time": processing_time,
-            "cluster_stats": cluster_stats
+            "cluster_stats": cluster_stats,
+            "plane_stats": plane_stats,
+            "spatial_index": indexes.stats() if indexes is not None else {},
+            "voxel_grid": voxel_grid_stats(voxel_layers),
+            "tiling": tiling_stats,
+            "lod_patches": lod_patches,
+            "lod_stats": lod_stats,
+            "stage_profile": stage_profile
         }
         
     except Exception as e:
+        profiler.stop()
         logger.error(f"Error in room processing pipeline: {e}", exc_info=True)
         raise
 
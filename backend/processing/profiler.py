@@ -0,0 +1,147 @@
+"""Per-stage profiling of the room processing pipeline.
+
+Reference: Section F2 (performance targets).
+process_room_scan marks each stage start (see PIPELINE_STAGES); the profiler
+turns those marks into one record per stage with wall time, process CPU
+time, points in and out, and memory. Memory is the current RSS at the end of
+the stage (rss_mb) and its change over the stage (rss_growth_mb, negative when
+the stage freed more than it kept), the process peak RSS (a high-water mark,
+so it only shows the stages that raised it) and, with tracemalloc enabled,
+the peak of Python/NumPy allocations above the stage's starting level.
+Open3D's C++ allocations are only visible in RSS.
+
+CPU time and the memory figures are process-wide, so they are exact with the
+process (or inline) executor or a single worker; concurrent thread-backend
+jobs are counted together.
+"""
+import logging
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+try:
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    PAGE_SIZE = resource.getpagesize()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * RSS_UNIT / (1024 * 1024)
+
+
+def current_rss_mb() -> float:
+    """Current resident set size of this process in MB.
+    
+    Read from /proc/self/statm; where that does not exist (macOS), the peak
+    RSS is returned instead.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return peak_rss_mb()
+    return resident_pages * PAGE_SIZE / (1024 * 1024)
+
+
+class StageProfiler:
+    """Collects wall time, CPU time, point counts and memory per pipeline stage."""
+    
+    def __init__(self, trace_allocations: bool = False):
+        """
+        Args:
+            trace_allocations: Record per-stage tracemalloc peaks (starts
+                tracemalloc if it is not already running; slows allocation-heavy
+                Python code)
+        """
+        self.trace_allocations = trace_allocations
+        self._started_tracing = False
+        self._stages: List[Dict[str, Any]] = []
+        self._current: Optional[Dict[str, Any]] = None
+        if trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+    
+    def start(self, stage: str, points_in: Optional[int] = None) -> None:
+        """Finish the current stage (if any) and start timing the next one.
+        
+        Args:
+            stage: Stage name
+            points_in: Points entering the stage, if the stage works on points
+        """
+        self._finish_current()
+        self._current = {
+            "stage": stage,
+            "points_in": points_in,
+            "points_out": None,
+            "_wall": time.perf_counter(),
+            "_cpu": time.process_time(),
+            "_rss": current_rss_mb(),
+        }
+        if self.trace_allocations:
+            self._current["_traced"] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+    
+    def set_points_out(self, points_out: int) -> None:
+        """Record the points the current stage produced."""
+        if self._current is not None:
+            self._current["points_out"] = int(points_out)
+    
+    def stop(self) -> List[Dict[str, Any]]:
+        """Finish the current stage and stop tracing if this profiler started it.
+        
+        Returns:
+            Stage records (see results)
+        """
+        self._finish_current()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return self.results()
+    
+    def results(self) -> List[Dict[str, Any]]:
+        """Finished stage records in pipeline order.
+        
+        Returns:
+            List of dicts with stage, wall_time and cpu_time (seconds),
+            points_in, points_out (None where not applicable), rss_mb,
+            rss_growth_mb, peak_rss_mb and, with trace_allocations,
+            traced_peak_mb
+        """
+        return list(self._stages)
+    
+    def _finish_current(self) -> None:
+        current = self._current
+        if current is None:
+            return
+        self._current = None
+        
+        rss = current_rss_mb()
+        # ru_maxrss can trail the current RSS slightly
+        peak = max(peak_rss_mb(), rss)
+        record = {
+            "stage": current["stage"],
+            "wall_time": time.perf_counter() - current["_wall"],
+            "cpu_time": time.process_time() - current["_cpu"],
+            "points_in": current["points_in"],
+            "points_out": current["points_out"],
+            "rss_mb": rss,
+            "rss_growth_mb": rss - current["_rss"],
+            "peak_rss_mb": peak,
+        }
+        if "_traced" in current:
+            traced_peak = tracemalloc.get_traced_memory()[1]
+            record["traced_peak_mb"] = max(traced_peak - current["_traced"], 0) / (1024 * 1024)
+        self._stages.append(record)
+        logger.debug(
+            f"Stage {record['stage']}: {record['wall_time']:.3f}s wall, "
+            f"{record['cpu_time']:.3f}s CPU, RSS {rss:.0f}MB (peak {peak:.0f}MB)"
+        )
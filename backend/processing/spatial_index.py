@@ -0,0 +1,215 @@
+"""Shared spatial index for the processing pipeline.
+
+Reference: Section F1 (preprocessing), Section B1 (DBSCAN clustering).
+Normal estimation and DBSCAN both need radius neighbor queries. Open3D
+builds a private KD-tree for every call; here one scipy cKDTree is built per
+cloud state and its radius neighbor graph is cached so later stages reuse
+it. Subsets of a cloud (e.g. the object points left after plane removal)
+derive their neighbor graph from the parent index without building a new
+tree.
+"""
+import numpy as np
+import logging
+import time
+from typing import Dict, Any, Optional, Tuple
+
+from scipy.sparse import coo_matrix
+from scipy.spatial import cKDTree
+
+logger = logging.getLogger(__name__)
+
+# (indptr, indices, distances): CSR neighbor lists without the point itself
+# (order within a row is unspecified)
+NeighborGraph = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+class SpatialIndex:
+    """KD-tree over a fixed point array with cached neighbor queries.
+    
+    Attributes:
+        name: Label used in statistics
+        points: (N, 3) indexed positions
+        build_time: Seconds spent building the tree
+        queries: Neighbor queries answered by searching the tree
+        reuses: Neighbor queries answered from cached results
+    """
+    
+    def __init__(
+        self,
+        points: np.ndarray,
+        name: str = "cloud",
+        min_graph_radius: float = 0.0,
+        parent: Optional[Tuple["SpatialIndex", np.ndarray]] = None
+    ):
+        """
+        Args:
+            points: (N, 3) positions; float32 and float64 arrays are used
+                as-is (not copied), other dtypes are converted to float64
+            name: Label used in statistics
+            min_graph_radius: Radius graphs are computed at least at this
+                radius so smaller-radius requests can reuse them
+            parent: (parent_index, indices) when points is a subset of the
+                parent's points; neighbor graphs are derived from the parent
+        """
+        self.name = name
+        points = np.asarray(points)
+        if points.dtype not in (np.float32, np.float64):
+            points = points.astype(np.float64)
+        # float32 clouds stay float32, halving the gathered neighbor arrays
+        # (cKDTree keeps its own float64 copy for the search)
+        self.points = points
+        self.size = len(self.points)
+        self.min_graph_radius = min_graph_radius
+        self.parent = parent
+        self.build_time = 0.0
+        self.queries = 0
+        self.reuses = 0
+        self._tree: Optional[cKDTree] = None
+        self._graph: Optional[Tuple[float, NeighborGraph]] = None
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    @property
+    def tree(self) -> cKDTree:
+        """KD-tree over the points, built on first use."""
+        if self._tree is None:
+            start = time.perf_counter()
+            self._tree = cKDTree(self.points)
+            self.build_time = time.perf_counter() - start
+            logger.debug(f"Built spatial index '{self.name}': {self.size} points in {self.build_time:.3f}s")
+        return self._tree
+    
+    def radius_graph(self, radius: float) -> NeighborGraph:
+        """Neighbors of every point within radius.
+        
+        A cached graph computed at a larger radius is filtered instead of
+        searching again.
+        
+        Args:
+            radius: Search radius in meters
+        
+        Returns:
+            NeighborGraph for this radius
+        """
+        if self._graph is not None and self._graph[0] >= radius:
+            self.reuses += 1
+            cached_radius, graph = self._graph
+            return graph if cached_radius == radius else _filter_graph(graph, radius)
+        
+        search_radius = max(radius, self.min_graph_radius)
+        if self.parent is not None:
+            parent_index, indices = self.parent
+            # Counted as a reuse on the parent, whose cached graph is restricted
+            graph = _restrict_graph(parent_index.radius_graph(search_radius), indices, len(parent_index))
+        else:
+            self.queries += 1
+            graph = self._search_graph(search_radius)
+        
+        self._graph = (search_radius, graph)
+        return graph if search_radius == radius else _filter_graph(graph, radius)
+    
+    def subset(self, indices: np.ndarray, name: Optional[str] = None) -> "SpatialIndex":
+        """Index over a subset of these points that derives neighbor graphs from this index.
+        
+        Args:
+            indices: Ascending point indices of the subset
+            name: Label used in statistics
+        
+        Returns:
+            SpatialIndex for points[indices]
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        return SpatialIndex(
+            self.points[indices],
+            name=name or f"{self.name}_subset",
+            min_graph_radius=self.min_graph_radius,
+            parent=(self, indices)
+        )
+    
+    def stats(self) -> Dict[str, Any]:
+        """Build time and query/reuse counters."""
+        return {
+            "points": self.size,
+            "build_time": self.build_time,
+            "derived": self.parent is not None,
+            "queries": self.queries,
+            "reuses": self.reuses,
+        }
+    
+    def _search_graph(self, radius: float) -> NeighborGraph:
+        n = len(self.points)
+        pairs = self.tree.query_pairs(radius, output_type="ndarray")
+        rows = np.concatenate([pairs[:, 0], pairs[:, 1]])
+        cols = np.concatenate([pairs[:, 1], pairs[:, 0]])
+        offsets = self.points[rows] - self.points[cols]
+        distances = np.sqrt(np.einsum("ij,ij->i", offsets, offsets))
+        # COO -> CSR groups edges by row with a linear-time counting sort
+        graph = coo_matrix((distances, (rows, cols)), shape=(n, n)).tocsr()
+        return graph.indptr.astype(np.int64), graph.indices.astype(np.int64), graph.data
+
+
+def _graph_rows(graph: NeighborGraph) -> np.ndarray:
+    """Row index of every edge."""
+    indptr = graph[0]
+    return np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+
+
+def _filter_graph(graph: NeighborGraph, radius: float) -> NeighborGraph:
+    """Drop edges longer than radius."""
+    indptr, indices, distances = graph
+    keep = distances <= radius
+    rows = _graph_rows(graph)[keep]
+    new_indptr = np.zeros_like(indptr)
+    np.cumsum(np.bincount(rows, minlength=len(indptr) - 1), out=new_indptr[1:])
+    return new_indptr, indices[keep], distances[keep]
+
+
+def _restrict_graph(graph: NeighborGraph, subset: np.ndarray, parent_size: int) -> NeighborGraph:
+    """Neighbor graph among a subset of points, renumbered to subset positions."""
+    indptr, indices, distances = graph
+    position = np.full(parent_size, -1, dtype=np.int64)
+    position[subset] = np.arange(len(subset))
+    rows = position[_graph_rows(graph)]
+    cols = position[indices]
+    keep = (rows >= 0) & (cols >= 0)
+    rows, cols, distances = rows[keep], cols[keep], distances[keep]
+    # Rows stay grouped in ascending order since subset is ascending
+    new_indptr = np.zeros(len(subset) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(subset)), out=new_indptr[1:])
+    return new_indptr, cols, distances
+
+
+class SpatialIndexRegistry:
+    """Pipeline-level collection of spatial indexes, one per cloud state."""
+    
+    def __init__(self, graph_radius: float = 0.0):
+        """
+        Args:
+            graph_radius: Minimum radius for neighbor graphs (the largest
+                radius any stage will request, so smaller requests reuse it)
+        """
+        self.graph_radius = graph_radius
+        self._indexes: Dict[str, SpatialIndex] = {}
+    
+    def create(self, name: str, points: np.ndarray) -> SpatialIndex:
+        """Create and register an index for a new cloud state."""
+        index = SpatialIndex(points, name=name, min_graph_radius=self.graph_radius)
+        self._indexes[name] = index
+        return index
+    
+    def register(self, index: SpatialIndex) -> SpatialIndex:
+        """Register an existing (e.g. subset) index under its name."""
+        self._indexes[index.name] = index
+        return index
+    
+    def get(self, name: str) -> Optional[SpatialIndex]:
+        return self._indexes.get(name)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Per-index statistics plus total build time and reuse count."""
+        indexes = {name: index.stats() for name, index in self._indexes.items()}
+        return {
+            "indexes": indexes,
+            "total_build_time": sum(s["build_time"] for s in indexes.values()),
+            "total_reuses": sum(s["reuses"] for s in indexes.values()),
+        }
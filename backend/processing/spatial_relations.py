@@ -41,22 +41,21 @@ def calculate_spatial_relationships(
     # Build KDTree for efficient spatial queries
     kdtree = KDTree(positions)
     
+    # Neighbor lists for all objects in one batched query
+    neighbor_lists = kdtree.query_ball_point(positions, r=distance_threshold)
+    
     # Find relationships for each object
     for i, obj in enumerate(objects):
-        position = np.array(obj["position"])
-        
-        # Find nearby objects within threshold
-        nearby_indices = kdtree.query_ball_point(position, r=distance_threshold)
+        position = positions[i]
         
         # Remove self
-        nearby_indices = [idx for idx in nearby_indices if idx != i]
+        nearby_indices = [idx for idx in neighbor_lists[i] if idx != i]
         
         for j in nearby_indices:
             other_obj = objects[j]
-            other_position = np.array(other_obj["position"])
             
             # Calculate 3D distance
-            distance = np.linalg.norm(position - other_position)
+            distance = np.linalg.norm(position - positions[j])
             
             # Determine relationship type
             relationship_type = "nearby"
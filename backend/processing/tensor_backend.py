@@ -0,0 +1,138 @@
+"""Open3D tensor (o3d.t) geometry backend.
+
+Reference: Section C1 (Open3D), Section F1 (preprocessing pipeline).
+With settings.geometry_backend == "tensor", outlier removal, voxel
+downsampling, normal estimation, fixed-iteration RANSAC and the Open3D DBSCAN
+fallback run on o3d.t.geometry.PointCloud on the CPU instead of the legacy
+o3d.geometry API. Tensors are float32, like CompactPointCloud, and are
+exchanged with NumPy without copying: arrays are wrapped through DLPack and
+tensors are read back with Tensor.numpy(), which shares the buffer on CPU.
+"""
+import numpy as np
+import open3d as o3d
+import logging
+from typing import Tuple
+
+from backend.config import settings
+from backend.processing.cloud import CompactPointCloud
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY_BACKENDS = ("legacy", "tensor")
+
+CPU = o3d.core.Device("CPU:0")
+
+
+def use_tensor_backend() -> bool:
+    """Whether settings.geometry_backend selects the tensor backend.
+    
+    Raises:
+        ValueError: If settings.geometry_backend is unknown
+    """
+    backend = settings.geometry_backend
+    if backend not in GEOMETRY_BACKENDS:
+        raise ValueError(f"Unknown geometry backend: {backend} (expected one of {GEOMETRY_BACKENDS})")
+    return backend == "tensor"
+
+
+def to_tensor(array: np.ndarray, dtype: type = np.float32) -> o3d.core.Tensor:
+    """Wrap a NumPy array as a CPU tensor through DLPack.
+    
+    No copy is made for contiguous arrays of the requested dtype, so the
+    tensor shares (and writes through to) the array's memory. Read-only
+    arrays (e.g. memory-mapped PLY views) are copied, since DLPack cannot
+    export them.
+    
+    Args:
+        array: Input array
+        dtype: Tensor dtype
+    
+    Returns:
+        Tensor over the array's buffer
+    """
+    array = np.ascontiguousarray(array, dtype=dtype)
+    if not array.flags.writeable:
+        array = array.copy()
+    return o3d.core.Tensor.from_dlpack(array.__dlpack__())
+
+
+def to_tensor_cloud(cloud: CompactPointCloud) -> o3d.t.geometry.PointCloud:
+    """Convert a CompactPointCloud to a tensor point cloud.
+    
+    Positions and normals are shared with the cloud; uint8 colors become
+    float32 in [0, 1] (the range Open3D averages and reports).
+    
+    Args:
+        cloud: Input point cloud
+    
+    Returns:
+        Tensor point cloud on the CPU
+    """
+    tpcd = o3d.t.geometry.PointCloud(CPU)
+    tpcd.point.positions = to_tensor(cloud.points)
+    if cloud.has_colors():
+        tpcd.point.colors = to_tensor(cloud.colors / np.float32(255.0))
+    if cloud.has_normals():
+        tpcd.point.normals = to_tensor(cloud.normals)
+    return tpcd
+
+
+def from_tensor_cloud(tpcd: o3d.t.geometry.PointCloud) -> CompactPointCloud:
+    """Convert a tensor point cloud back to a CompactPointCloud.
+    
+    Float32 positions and normals are shared with the tensors; colors are
+    converted to uint8.
+    
+    Args:
+        tpcd: Tensor point cloud on the CPU
+    
+    Returns:
+        CompactPointCloud
+    """
+    attributes = tpcd.point
+    return CompactPointCloud(
+        attributes.positions.numpy(),
+        attributes.colors.numpy() if "colors" in attributes else None,
+        attributes.normals.numpy() if "normals" in attributes else None
+    )
+
+
+def segment_plane_tensor(
+    points: np.ndarray,
+    distance_threshold: float,
+    num_iterations: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """RANSAC plane segmentation with the tensor API.
+    
+    Args:
+        points: (N, 3) positions
+        distance_threshold: Inlier distance in meters
+        num_iterations: Hypotheses evaluated
+    
+    Returns:
+        Tuple of (plane_model [a, b, c, d], inlier indices)
+    """
+    tpcd = o3d.t.geometry.PointCloud(CPU)
+    tpcd.point.positions = to_tensor(points)
+    plane_model, inliers = tpcd.segment_plane(
+        distance_threshold=distance_threshold,
+        ransac_n=3,
+        num_iterations=num_iterations
+    )
+    return plane_model.numpy(), inliers.numpy()
+
+
+def cluster_dbscan_tensor(points: np.ndarray, eps: float, min_points: int) -> np.ndarray:
+    """DBSCAN with the tensor API.
+    
+    Args:
+        points: (N, 3) positions
+        eps: Neighborhood radius in meters
+        min_points: Minimum neighborhood size of core points
+    
+    Returns:
+        (N,) int64 cluster labels (-1 for noise)
+    """
+    tpcd = o3d.t.geometry.PointCloud(CPU)
+    tpcd.point.positions = to_tensor(points)
+    return tpcd.cluster_dbscan(eps=eps, min_points=min_points).numpy().astype(np.int64)
@@ -0,0 +1,358 @@
+"""Out-of-core tiled preprocessing for scans larger than memory.
+
+Reference: Section F1 (preprocessing pipeline).
+load_compact_point_cloud + preprocess_compact hold the whole raw cloud in
+memory. For large binary PLY scans the vertex block is instead memory-mapped
+and split into XY tiles aligned to the voxel grid. Each tile's points, plus a
+halo wide enough for the outlier and normal neighborhoods, are streamed from
+disk and run through outlier removal, voxel downsampling and normal
+estimation; only the voxels inside the tile core are kept. Peak memory is
+bounded by the tile size plus the tile buckets, not by the scan size: the
+bucketed point indices take 4 bytes per point (8 above 2**31 points), plus
+a 2-byte tile id per point while bucketing (4 with more than 65535 tiles).
+
+Points are bucketed by tile once, in a single streaming pass over the file,
+so loading a tile reads only its own and its neighbors' points instead of
+rescanning the whole vertex block. Outlier removal keeps Open3D's cloud-wide
+threshold: a first pass over the tiles accumulates the mean neighbor
+distance statistics, a second pass applies the threshold. Tiles are
+processed in row-major order and voxels in key order, so the merged result
+is deterministic. Positions are read as float32, like CompactPointCloud, so
+both paths see the same coordinates.
+"""
+import numpy as np
+import open3d as o3d
+import logging
+import time
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from scipy.spatial import cKDTree
+
+from backend.config import settings
+from backend.processing.ply_reader import read_ply_header, load_ply_arrays, PLY_BYTE_ORDER
+from backend.processing.cloud import CompactPointCloud
+from backend.processing.point_cloud import (
+    estimate_normals_indexed,
+    NORMAL_SEARCH_RADIUS,
+    NORMAL_MAX_NN
+)
+from backend.processing.spatial_index import SpatialIndex, SpatialIndexRegistry
+from backend.processing.voxel_grid import voxel_downsample
+
+logger = logging.getLogger(__name__)
+
+# Points read from the memory-mapped vertex block per chunk
+STREAM_CHUNK_POINTS = 1_000_000
+
+# (key_lo, key_hi): half-open XY voxel key range of a tile core
+TileRange = Tuple[np.ndarray, np.ndarray]
+
+
+def use_tiled_preprocessing(file_path: str) -> bool:
+    """Check whether a scan should be preprocessed tile by tile.
+    
+    Args:
+        file_path: Path to PLY file
+    
+    Returns:
+        True for binary PLY files with at least
+        settings.tiled_preprocessing_min_points vertices (0 disables tiling)
+    """
+    if settings.tiled_preprocessing_min_points <= 0 or not settings.ply_mmap_reader:
+        return False
+    try:
+        header = read_ply_header(file_path)
+    except (OSError, ValueError):
+        return False
+    if header["format"] not in PLY_BYTE_ORDER:
+        return False
+    vertex = next((e for e in header["elements"] if e["name"] == "vertex"), None)
+    return vertex is not None and vertex["count"] >= settings.tiled_preprocessing_min_points
+
+
+def _chunks(count: int, chunk_points: int) -> Iterator[Tuple[int, int]]:
+    for start in range(0, count, chunk_points):
+        yield start, min(start + chunk_points, count)
+
+
+def open_tiled_scan(file_path: str, chunk_points: int = STREAM_CHUNK_POINTS) -> Dict[str, Any]:
+    """Memory-map a binary PLY scan and compute its bounds in one streaming pass.
+    
+    Args:
+        file_path: Path to binary PLY file
+        chunk_points: Points read per chunk
+    
+    Returns:
+        Dictionary with the load_ply_arrays views plus point_count,
+        min_bound and max_bound
+    
+    Raises:
+        ValueError: If the file cannot be memory-mapped or has no points
+    """
+    scan = load_ply_arrays(file_path)
+    points = scan["points"]
+    if len(points) == 0:
+        raise ValueError("Point cloud is empty")
+    
+    min_bound = np.full(3, np.inf)
+    max_bound = np.full(3, -np.inf)
+    for start, end in _chunks(len(points), chunk_points):
+        chunk = np.asarray(points[start:end], dtype=np.float32)
+        min_bound = np.minimum(min_bound, chunk.min(axis=0))
+        max_bound = np.maximum(max_bound, chunk.max(axis=0))
+    
+    scan["point_count"] = len(points)
+    scan["min_bound"] = min_bound
+    scan["max_bound"] = max_bound
+    logger.info(f"Opened {len(points)} points for tiled preprocessing")
+    return scan
+
+
+def plan_tiles(
+    min_bound: np.ndarray,
+    max_bound: np.ndarray,
+    voxel_size: float,
+    tile_size: float
+) -> Tuple[np.ndarray, List[TileRange]]:
+    """Split the XY extent into tiles aligned to the voxel grid.
+    
+    Args:
+        min_bound: Scan bounding box minimum
+        max_bound: Scan bounding box maximum
+        voxel_size: Voxel edge length in meters
+        tile_size: Approximate tile edge length in meters (rounded to whole voxels)
+    
+    Returns:
+        Tuple of (origin, tiles): the voxel grid origin shared by all tiles
+        (same convention as Open3D voxel_down_sample) and the XY voxel key
+        range of every tile core in row-major order
+    
+    Raises:
+        ValueError: If voxel_size or tile_size is not positive
+    """
+    if voxel_size <= 0 or tile_size <= 0:
+        raise ValueError(f"voxel_size and tile_size must be positive, got {voxel_size}, {tile_size}")
+    
+    origin = np.asarray(min_bound, dtype=np.float64) - voxel_size * 0.5
+    extent = np.floor((np.asarray(max_bound)[:2] - origin[:2]) / voxel_size).astype(np.int64) + 1
+    step = max(1, int(round(tile_size / voxel_size)))
+    
+    tiles = []
+    for y in range(0, int(extent[1]), step):
+        for x in range(0, int(extent[0]), step):
+            tiles.append((np.array([x, y]), np.array([x + step, y + step])))
+    return origin, tiles
+
+
+def _bucket_by_tile(
+    points: np.ndarray,
+    origin: np.ndarray,
+    voxel_size: float,
+    step: int,
+    tile_grid: Tuple[int, int],
+    chunk_points: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Group point indices by tile in one streaming pass.
+    
+    Args:
+        points: (N, 3) positions (memory-mapped)
+        origin: Voxel grid origin (see plan_tiles)
+        voxel_size: Voxel edge length in meters
+        step: Tile edge length in voxels
+        tile_grid: (columns, rows) of the row-major tile grid
+        chunk_points: Points read per chunk
+    
+    Returns:
+        Tuple of (order, bounds): point indices sorted by tile (ascending
+        within a tile; int32 below 2**31 points) and the (tiles + 1,)
+        offsets of each tile's bucket
+    """
+    columns, rows = tile_grid
+    tile_count = columns * rows
+    tile_dtype = np.uint16 if tile_count <= np.iinfo(np.uint16).max else np.int32
+    tile_ids = np.empty(len(points), dtype=tile_dtype)
+    for start, end in _chunks(len(points), chunk_points):
+        xy = np.asarray(points[start:end, :2], dtype=np.float64)
+        tile_xy = np.floor((xy - origin[:2]) / voxel_size).astype(np.int64) // step
+        tile_x = np.clip(tile_xy[:, 0], 0, columns - 1)
+        tile_y = np.clip(tile_xy[:, 1], 0, rows - 1)
+        tile_ids[start:end] = tile_y * columns + tile_x
+    
+    bounds = np.zeros(tile_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tile_ids, minlength=tile_count), out=bounds[1:])
+    
+    # Counting sort, chunk by chunk, so no full-size int64 argsort is needed
+    index_dtype = np.int32 if len(points) < np.iinfo(np.int32).max else np.int64
+    order = np.empty(len(points), dtype=index_dtype)
+    cursor = bounds[:-1].copy()
+    for start, end in _chunks(len(points), chunk_points):
+        chunk_ids = tile_ids[start:end]
+        chunk_order = np.argsort(chunk_ids, kind="stable")
+        sorted_ids = chunk_ids[chunk_order]
+        chunk_counts = np.bincount(chunk_ids, minlength=tile_count)
+        rank = np.arange(end - start) - (np.cumsum(chunk_counts) - chunk_counts)[sorted_ids]
+        order[cursor[sorted_ids] + rank] = chunk_order + start
+        cursor += chunk_counts
+    return order, bounds
+
+
+def _mean_neighbor_distances(
+    tree: cKDTree,
+    positions: np.ndarray,
+    nb_neighbors: int
+) -> np.ndarray:
+    """Mean distance of each position to its nearest neighbors (itself included)."""
+    k = min(nb_neighbors, tree.n)
+    distances, _ = tree.query(positions, k=k, workers=-1)
+    if k == 1:
+        distances = distances[:, None]
+    return distances.mean(axis=1)
+
+
+def preprocess_tiled(
+    scan: Dict[str, Any],
+    layers: Optional[Dict[str, np.ndarray]] = None,
+    indexes: Optional[SpatialIndexRegistry] = None,
+    tile_size: Optional[float] = None,
+    halo: Optional[float] = None,
+    chunk_points: int = STREAM_CHUNK_POINTS
+) -> Tuple[o3d.geometry.PointCloud, Dict[str, Any]]:
+    """Outlier removal, voxel downsampling and normal estimation tile by tile.
+    
+    Same steps and parameters as preprocess_point_cloud, always with the
+    NumPy voxel kernel. The halo is at least the normal search radius plus
+    one voxel so every kept voxel sees its full normal neighborhood.
+    
+    Args:
+        scan: Result of open_tiled_scan
+        layers: Optional dict filled with per-voxel layers of the returned
+            cloud (see downsample_point_cloud)
+        indexes: Optional pipeline spatial index registry; the merged cloud
+            is registered as "processed"
+        tile_size: Tile edge length in meters (defaults to settings.tile_size)
+        halo: Halo width in meters (defaults to settings.tile_halo)
+        chunk_points: Points read per chunk when streaming tiles
+    
+    Returns:
+        Tuple of (processed point cloud, statistics with tiles, halo,
+        outliers_removed, max_tile_points and elapsed time)
+    """
+    start_time = time.perf_counter()
+    voxel_size = settings.voxel_size
+    tile_size = tile_size or settings.tile_size
+    halo = max(halo or settings.tile_halo, NORMAL_SEARCH_RADIUS + voxel_size)
+    halo_keys = int(np.ceil(halo / voxel_size))
+    
+    points = scan["points"]
+    colors = scan["colors"]
+    color_scale = 1.0
+    if colors is not None and np.issubdtype(colors.dtype, np.integer):
+        color_scale = float(np.iinfo(colors.dtype).max)
+    
+    origin, tiles = plan_tiles(scan["min_bound"], scan["max_bound"], voxel_size, tile_size)
+    logger.info(f"Tiled preprocessing: {len(tiles)} tiles of {tile_size}m, halo {halo:.2f}m")
+    
+    # Tile grid of plan_tiles: row-major, step voxels per tile edge
+    step = int(tiles[0][1][0] - tiles[0][0][0])
+    columns = int(max(lo[0] for lo, _ in tiles)) // step + 1
+    rows = len(tiles) // columns
+    order, bounds = _bucket_by_tile(points, origin, voxel_size, step, (columns, rows), chunk_points)
+    
+    def load_tile(key_lo: np.ndarray, key_hi: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        # (indices, positions) of tile + halo points and the mask of core points;
+        # only the buckets of tiles the halo reaches into are read
+        tile_lo = np.maximum((key_lo - halo_keys) // step, 0)
+        tile_hi = np.minimum((key_hi - 1 + halo_keys) // step, [columns - 1, rows - 1])
+        buckets = [
+            order[bounds[y * columns + x]:bounds[y * columns + x + 1]]
+            for y in range(tile_lo[1], tile_hi[1] + 1)
+            for x in range(tile_lo[0], tile_hi[0] + 1)
+        ]
+        indices = np.sort(np.concatenate(buckets))
+        positions = np.asarray(points[indices], dtype=np.float32)
+        keys = np.floor((positions[:, :2] - origin[:2]) / voxel_size)
+        in_halo = np.all((keys >= key_lo - halo_keys) & (keys < key_hi + halo_keys), axis=1)
+        indices, positions, keys = indices[in_halo], positions[in_halo], keys[in_halo]
+        core = np.all((keys >= key_lo) & (keys < key_hi), axis=1)
+        return indices, positions, core
+    
+    # Pass 1: cloud-wide statistics of mean neighbor distances (core points only)
+    count, total, total_sq = 0, 0.0, 0.0
+    max_tile_points = 0
+    for tile, (key_lo, key_hi) in enumerate(tiles):
+        if bounds[tile] == bounds[tile + 1]:
+            continue
+        indices, positions, core = load_tile(key_lo, key_hi)
+        if not core.any():
+            continue
+        max_tile_points = max(max_tile_points, len(indices))
+        mean_distances = _mean_neighbor_distances(cKDTree(positions), positions[core], settings.outlier_neighbors)
+        count += len(mean_distances)
+        total += float(mean_distances.sum())
+        total_sq += float(np.square(mean_distances).sum())
+    
+    mean = total / count
+    std = np.sqrt(max(total_sq - count * mean * mean, 0.0) / (count - 1)) if count > 1 else 0.0
+    threshold = mean + settings.outlier_std_ratio * std
+    
+    # Pass 2: filter, downsample and estimate normals; keep core voxels
+    merged: Dict[str, List[np.ndarray]] = {}
+    outliers_removed = 0
+    for tile, (key_lo, key_hi) in enumerate(tiles):
+        if bounds[tile] == bounds[tile + 1]:
+            continue
+        indices, positions, core = load_tile(key_lo, key_hi)
+        if not core.any():
+            continue
+        keep = _mean_neighbor_distances(cKDTree(positions), positions, settings.outlier_neighbors) <= threshold
+        outliers_removed += int((core & ~keep).sum())
+        if not keep.any():
+            continue
+        
+        tile_colors = None
+        if colors is not None:
+            tile_colors = np.asarray(colors[indices[keep]], dtype=np.float64) / color_scale
+        grid = voxel_downsample(positions[keep], voxel_size, colors=tile_colors, origin=origin)
+        grid_points = grid["points"].astype(np.float32)
+        normals = estimate_normals_indexed(SpatialIndex(grid_points), NORMAL_SEARCH_RADIUS, NORMAL_MAX_NN)
+        
+        in_core = np.all((grid["keys"][:, :2] >= key_lo) & (grid["keys"][:, :2] < key_hi), axis=1)
+        tile_result = {
+            "points": grid_points,
+            "normals": normals,
+            "colors": grid.get("colors"),
+            "density": grid["counts"],
+            "z_min": grid["z_min"],
+            "z_max": grid["z_max"],
+            "color_variance": grid.get("color_variance"),
+        }
+        for name, values in tile_result.items():
+            if values is not None:
+                merged.setdefault(name, []).append(values[in_core])
+    
+    if "points" not in merged:
+        raise ValueError("No points left after tiled preprocessing")
+    
+    result = {name: np.concatenate(parts) for name, parts in merged.items()}
+    pcd = CompactPointCloud(result["points"], result.get("colors"), result["normals"]).to_open3d()
+    
+    if layers is not None:
+        for name in ("density", "z_min", "z_max", "color_variance"):
+            if name in result:
+                layers[name] = result[name]
+    if indexes is not None:
+        indexes.create("processed", np.asarray(pcd.points))
+    
+    stats = {
+        "tiles": len(tiles),
+        "tile_size": tile_size,
+        "halo": halo,
+        "outliers_removed": outliers_removed,
+        "max_tile_points": max_tile_points,
+        "time": time.perf_counter() - start_time,
+    }
+    logger.info(
+        f"Tiled preprocessing complete: {scan['point_count']} -> {len(pcd.points)} points "
+        f"({len(tiles)} tiles, largest {max_tile_points} points)"
+    )
+    return pcd, stats
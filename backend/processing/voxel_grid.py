@@ -0,0 +1,199 @@
+"""Vectorized voxel downsampling over plain NumPy arrays.
+
+Reference: Section F1 (voxel downsampling).
+Coordinates are quantized to integer voxel keys, point indices are sorted by
+key once, and every per-point attribute is reduced over the resulting
+contiguous runs with ufunc.reduceat. Unlike Open3D voxel_down_sample this
+works directly on the memory-mapped arrays from the PLY loader, reduces any
+number of extra attributes, and keeps per-voxel statistics (point count,
+z range, color variance) that later stages can use as layers.
+"""
+import numpy as np
+import logging
+from typing import Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def voxel_keys(
+    points: np.ndarray,
+    voxel_size: float,
+    origin: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Integer (i, j, k) voxel coordinates of every point.
+    
+    By default uses the same grid as Open3D voxel_down_sample (origin half a
+    voxel below the minimum bound), so both assign points to the same voxels.
+    
+    Args:
+        points: (N, 3) positions (any float dtype, may be a memmap view)
+        voxel_size: Voxel edge length in meters
+        origin: Optional grid origin (e.g. shared by the tiles of one scan);
+            must not lie above any point
+    
+    Returns:
+        (N, 3) int64 voxel coordinates, non-negative
+    
+    Raises:
+        ValueError: If voxel_size is not positive
+    """
+    origin = _grid_origin(points, voxel_size, origin)
+    return np.floor((points - origin) / voxel_size).astype(np.int64)
+
+
+def _grid_origin(points: np.ndarray, voxel_size: float, origin: Optional[np.ndarray]) -> np.ndarray:
+    """Validate voxel_size and default the origin (see voxel_keys)."""
+    if voxel_size <= 0:
+        raise ValueError(f"voxel_size must be positive, got {voxel_size}")
+    
+    if origin is None:
+        return points.min(axis=0).astype(np.float64) - voxel_size * 0.5
+    return np.asarray(origin, dtype=np.float64)
+
+
+def _flat_voxel_keys(
+    points: np.ndarray,
+    voxel_size: float,
+    origin: Optional[np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Voxel coordinates raveled to one int64 key per point.
+    
+    Computed one axis at a time (in float64, like voxel_keys), so neither
+    the (N, 3) offsets nor the (N, 3) integer coordinates are materialized.
+    
+    Returns:
+        Tuple of ((N,) flat keys, (3,) grid shape)
+    """
+    origin = _grid_origin(points, voxel_size, origin)
+    shape = np.floor((points.max(axis=0) - origin) / voxel_size).astype(np.int64) + 1
+    flat = np.zeros(len(points), dtype=np.int64)
+    for axis in range(3):
+        offsets = np.subtract(points[:, axis], origin[axis], dtype=np.float64)
+        offsets /= voxel_size
+        flat *= shape[axis]
+        flat += np.floor(offsets, out=offsets).astype(np.int64)
+    return flat, shape
+
+
+def voxel_downsample(
+    points: np.ndarray,
+    voxel_size: float,
+    colors: Optional[np.ndarray] = None,
+    normals: Optional[np.ndarray] = None,
+    attributes: Optional[Dict[str, np.ndarray]] = None,
+    origin: Optional[np.ndarray] = None
+) -> Dict[str, Any]:
+    """Downsample points to one point per occupied voxel.
+    
+    Args:
+        points: (N, 3) positions
+        voxel_size: Voxel edge length in meters
+        colors: Optional (N, 3) colors, averaged in their own units
+        normals: Optional (N, 3) normals, averaged and re-normalized
+        attributes: Optional extra per-point arrays (e.g. PLY confidence),
+            each (N,) or (N, k), averaged per voxel
+        origin: Optional grid origin (see voxel_keys); keys are then
+            comparable between calls
+    
+    Returns:
+        Dictionary with, for M occupied voxels in ascending key order:
+        - points: (M, 3) mean position
+        - counts: (M,) points per voxel (density layer)
+        - z_min, z_max: (M,) height range of the voxel's points
+        - keys: (M, 3) integer voxel coordinates
+        - inverse: (N,) voxel of every input point
+        - colors, color_variance: (M, 3) per-channel mean and population
+          variance (only with colors)
+        - normals: (M, 3) unit mean normal (only with normals)
+        - attributes: dict of per-voxel means (only with attributes)
+    
+    Raises:
+        ValueError: If points is empty or voxel_size is not positive
+    """
+    if len(points) == 0:
+        raise ValueError("Cannot downsample an empty point array")
+    
+    flat, shape = _flat_voxel_keys(points, voxel_size, origin)
+    
+    # One sort: contiguous runs of equal keys are the voxels
+    order = np.argsort(flat, kind="stable")
+    sorted_keys = flat[order]
+    run_start = np.ones(len(sorted_keys), dtype=bool)
+    run_start[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    starts = np.flatnonzero(run_start)
+    counts = np.diff(np.append(starts, len(sorted_keys)))
+    
+    inverse = np.empty(len(points), dtype=np.int64)
+    inverse[order] = np.cumsum(run_start) - 1
+    
+    def moments(values: np.ndarray, variance: bool = False) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        # One channel at a time, gathered in its own dtype (float32 positions
+        # stay float32) and summed in float64, so the input is never copied whole.
+        # The variance squares the gathered channel in place (E[x^2] - E[x]^2).
+        values = np.asarray(values)
+        columns = values.reshape(len(values), -1)
+        means = np.empty((len(starts), columns.shape[1]))
+        variances = np.empty_like(means) if variance else None
+        for channel in range(columns.shape[1]):
+            grouped = columns[:, channel][order]
+            means[:, channel] = np.add.reduceat(grouped, starts, dtype=np.float64) / counts
+            if variance:
+                if not np.issubdtype(grouped.dtype, np.floating):
+                    grouped = grouped.astype(np.float32)
+                np.square(grouped, out=grouped)
+                variances[:, channel] = np.add.reduceat(grouped, starts, dtype=np.float64) / counts
+                variances[:, channel] -= np.square(means[:, channel])
+        if values.ndim == 1:
+            return means[:, 0], variances[:, 0] if variance else None
+        return means, variances
+    
+    def mean(values: np.ndarray) -> np.ndarray:
+        return moments(values)[0]
+    
+    z_sorted = points[:, 2][order]
+    result: Dict[str, Any] = {
+        "points": mean(points),
+        "counts": counts,
+        "z_min": np.minimum.reduceat(z_sorted, starts).astype(np.float64),
+        "z_max": np.maximum.reduceat(z_sorted, starts).astype(np.float64),
+        "keys": np.column_stack(np.unravel_index(sorted_keys[starts], shape)),
+        "inverse": inverse,
+    }
+    
+    if colors is not None:
+        color_means, color_variance = moments(colors, variance=True)
+        result["colors"] = color_means
+        result["color_variance"] = np.maximum(color_variance, 0.0)
+    
+    if normals is not None:
+        normal_means = mean(normals)
+        lengths = np.linalg.norm(normal_means, axis=1, keepdims=True)
+        result["normals"] = np.divide(
+            normal_means, lengths, out=np.zeros_like(normal_means), where=lengths > 0
+        )
+    
+    if attributes:
+        result["attributes"] = {name: mean(values) for name, values in attributes.items()}
+    
+    logger.debug(f"Voxel downsampling: {len(points)} -> {len(counts)} points ({voxel_size}m voxels)")
+    return result
+
+
+def voxel_grid_stats(layers: Dict[str, np.ndarray]) -> Dict[str, Any]:
+    """Summary of a density layer for pipeline statistics.
+    
+    Args:
+        layers: Per-voxel layers with a "density" array (may be empty)
+    
+    Returns:
+        Dictionary with voxels, mean_density and max_density, or an empty
+        dict without a density layer
+    """
+    density = layers.get("density")
+    if density is None or len(density) == 0:
+        return {}
+    return {
+        "voxels": int(len(density)),
+        "mean_density": float(density.mean()),
+        "max_density": int(density.max()),
+    }
@@ -5,14 +5,16 @@ Handles file uploads using aiofiles for async I/O, temporary file management,
 and cleanup on error. Supports PLY file format validation.
 """
 import aiofiles
+import hashlib
 import tempfile
 import os
 import time
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 import logging
 
 from backend.config import settings
+from backend.utils.validators import validate_ply_header
 
 logger = logging.getLogger(__name__)
 
@@ -75,6 +77,75 @@ async def save_temp_file(file_content: bytes, suffix: str = ".ply") -> str:
     return temp_path
 
 
+async def save_upload_stream(
+    upload_file,
+    suffix: str = ".ply",
+    max_size: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> Tuple[str, int, str]:
+    """
+    Stream an uploaded file to the temporary directory in fixed-size chunks.
+    
+    Only one chunk is held in memory at a time, so peak memory per upload is
+    bounded by chunk_size regardless of scan size. The size limit is enforced
+    while streaming, the PLY header is checked on the first chunk, and a
+    SHA-256 content hash is computed on the fly for deduplication.
+    
+    Args:
+        upload_file: FastAPI UploadFile (any object with async read(size))
+        suffix: File suffix (default: .ply)
+        max_size: Maximum allowed size in bytes (defaults to settings.max_upload_size)
+        chunk_size: Bytes per read (defaults to settings.upload_chunk_size)
+    
+    Returns:
+        Tuple of (temp_file_path, bytes_written, sha256_hexdigest)
+    
+    Raises:
+        ValueError: If the file is empty, too large or has an invalid PLY header
+        OSError: If directory creation or file write fails
+    """
+    max_size = max_size or settings.max_upload_size
+    chunk_size = chunk_size or settings.upload_chunk_size
+    
+    temp_dir = settings.temp_directory
+    os.makedirs(temp_dir, exist_ok=True)
+    
+    fd, temp_path = tempfile.mkstemp(suffix=suffix, dir=temp_dir)
+    os.close(fd)
+    
+    bytes_written = 0
+    digest = hashlib.sha256()
+    try:
+        async with aiofiles.open(temp_path, 'wb') as f:
+            while True:
+                chunk = await upload_file.read(chunk_size)
+                if not chunk:
+                    break
+    
+                if bytes_written == 0 and suffix == ".ply":
+                    is_valid, error = validate_ply_header(chunk)
+                    if not is_valid:
+                        raise ValueError(error)
+    
+                bytes_written += len(chunk)
+                if bytes_written > max_size:
+                    raise ValueError(
+                        f"File too large: exceeds {max_size} bytes"
+                    )
+    
+                digest.update(chunk)
+                await f.write(chunk)
+    
+        if bytes_written == 0:
+            raise ValueError("File is empty")
+    except BaseException:
+        cleanup_file(temp_path)
+        raise
+    
+    logger.debug(f"Streamed upload to temporary file: {temp_path} ({bytes_written} bytes)")
+    return temp_path, bytes_written, digest.hexdigest()
+
+
 async def read_file_async(file_path: str) -> bytes:
     """
     Read file asynchronously.
@@ -49,6 +49,28 @@ def validate_ply_file(file_path: str, max_size: int) -> tuple[bool, Optional[str
     return True, None
 
 
+def validate_ply_header(header: bytes) -> tuple[bool, Optional[str]]:
+    """Validate the leading bytes of a PLY file.
+    
+    Used on the first streamed chunk so malformed uploads are rejected
+    before the rest of the body is written to disk.
+    
+    Args:
+        header: First bytes of the file (at least the magic line)
+        
+    Returns:
+        Tuple of (is_valid, error_message)
+    """
+    if not header:
+        return False, "File is empty"
+    
+    # PLY files must start with the "ply" magic line
+    if not header.lstrip().lower().startswith(b"ply"):
+        return False, "Invalid PLY file header"
+    
+    return True, None
+
+
 def validate_filename(filename: str) -> tuple[bool, Optional[str]]:
     """Validate uploaded filename for security.
     
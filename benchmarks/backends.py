@@ -0,0 +1,113 @@
+"""Compare the legacy and tensor (o3d.t) geometry backends on the same scans.
+
+Runs process_room_scan once per backend and scan (after an untimed warm-up)
+and reports per-stage wall time, total time, peak RSS and the main results,
+so speed can be compared against result agreement.
+
+Usage:
+    python -m benchmarks.backends scan.ply [scan2.ply ...] [--repeat 3] [--output results.json]
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+from backend.config import settings
+from backend.processing.process_room import process_room_scan
+from backend.processing.profiler import peak_rss_mb
+
+logger = logging.getLogger(__name__)
+
+# Settings per backend. Everything else keeps its configured value, so each
+# backend runs as it would in production (the tensor backend overrides
+# ransac_mode and shared_spatial_index itself); tiling is off because tiled
+# preprocessing always uses the NumPy kernels.
+BACKEND_SETTINGS: Dict[str, Dict[str, Any]] = {
+    "legacy": {"geometry_backend": "legacy"},
+    "tensor": {"geometry_backend": "tensor"},
+}
+COMMON_SETTINGS: Dict[str, Any] = {"tiled_preprocessing_min_points": 0}
+
+
+def run_once(file_path: str) -> Dict[str, Any]:
+    """Run the pipeline once, timing stages from the progress callback.
+    
+    Args:
+        file_path: Path to PLY file
+    
+    Returns:
+        Dictionary with total and per-stage wall time and the main results
+    """
+    marks: List[tuple] = []
+    start = time.perf_counter()
+    result = process_room_scan(file_path, progress_callback=lambda stage: marks.append((stage, time.perf_counter())))
+    end = time.perf_counter()
+    
+    stages = {}
+    for (stage, stage_start), (_, stage_end) in zip(marks, marks[1:] + [("end", end)]):
+        stages[stage] = stage_end - stage_start
+    return {
+        "time": end - start,
+        "stages": stages,
+        "processed_points": result["processed_points"],
+        "dimensions": result["dimensions"],
+        "objects": len(result["objects"]),
+    }
+
+
+def benchmark_backends(file_paths: List[str], repeat: int = 1) -> List[Dict[str, Any]]:
+    """Benchmark every backend on every scan.
+    
+    Args:
+        file_paths: PLY files
+        repeat: Timed runs per backend and scan (the fastest is reported)
+    
+    Returns:
+        One entry per (scan, backend) with the run_once fields plus peak_rss_mb
+        (process-wide high-water mark, so only increases are meaningful)
+    """
+    saved = {name: getattr(settings, name) for name in set(COMMON_SETTINGS) | set(BACKEND_SETTINGS["legacy"])}
+    results = []
+    try:
+        for name, value in COMMON_SETTINGS.items():
+            setattr(settings, name, value)
+        for file_path in file_paths:
+            for backend, overrides in BACKEND_SETTINGS.items():
+                for name, value in overrides.items():
+                    setattr(settings, name, value)
+                run_once(file_path)  # warm-up (page cache, Open3D thread pools)
+                runs = [run_once(file_path) for _ in range(repeat)]
+                best = min(runs, key=lambda run: run["time"])
+                best.update({"scan": file_path, "backend": backend, "peak_rss_mb": peak_rss_mb()})
+                results.append(best)
+                logger.info(f"{file_path} [{backend}]: {best['time']:.2f}s, {best['processed_points']} points")
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scans", nargs="+", help="PLY files to process")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per backend and scan")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+    results = benchmark_backends(args.scans, args.repeat)
+    
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+"""Pipeline and API benchmark suite with baseline regression checks.
+
+Generates reproducible synthetic rooms (see synthetic.py) at several scales
+and noise levels and runs process_room_scan on each in a fresh worker
+process, so peak RSS is per scenario. It records every stage's profile (see
+StageProfiler), the total time and the dimension error against the known
+room. With --api-url it also uploads each room to a running API and times
+the upload-to-done cycle and the room endpoints.
+
+Results are written as JSON. With a baseline file the run fails (exit code
+1) when a timing or peak memory metric exceeds the baseline by more than
+--threshold, or the dimension error grows by more than
+ACCURACY_TOLERANCE. Baselines are machine specific; record one with
+--update-baseline on the machine that runs the comparison.
+
+Usage:
+    python -m benchmarks.run --sizes 100k,1M,3M,10M --noise 0.002,0.01 \\
+        --output results.json --baseline baseline.json [--threshold 0.2]
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+import open3d
+
+from backend.config import settings
+from benchmarks.synthetic import ROOM_DIMENSIONS, parse_point_count, write_room_ply
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = "100k,1M,3M,10M"
+DEFAULT_NOISE = "0.002,0.01"
+DEFAULT_THRESHOLD = 0.2
+
+# Timings below this many seconds are too noisy to compare
+MIN_COMPARED_SECONDS = 0.05
+
+# Allowed growth of the dimension error over the baseline (meters)
+ACCURACY_TOLERANCE = 0.02
+
+EXPECTED_DIMENSIONS = dict(zip(("length", "width", "height"), ROOM_DIMENSIONS))
+
+# Seconds to wait for an uploaded scan to finish processing
+JOB_TIMEOUT = 1800
+
+
+def scenario_name(point_count: int, noise: float) -> str:
+    """Stable scenario key, e.g. room_1000000_n0.002."""
+    return f"room_{point_count}_n{noise:g}"
+
+
+def _profile_scan(file_path: str) -> Dict[str, Any]:
+    """Worker entry point: run the pipeline once and summarize it."""
+    from backend.processing.process_room import process_room_scan
+    
+    start = time.perf_counter()
+    result = process_room_scan(file_path)
+    total = time.perf_counter() - start
+    
+    return {
+        "total": total,
+        "stages": {stage["stage"]: stage for stage in result["stage_profile"]},
+        "peak_rss_mb": max(stage["peak_rss_mb"] for stage in result["stage_profile"]),
+        "processed_points": result["processed_points"],
+        "dimensions": result["dimensions"],
+        "objects": len(result["objects"]),
+    }
+
+
+def run_pipeline(file_path: str) -> Dict[str, Any]:
+    """Run _profile_scan in a fresh spawned process (clean heap and peak RSS)."""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(_profile_scan, file_path).result()
+
+
+def dimension_error(measured: Dict[str, Any], expected: Dict[str, float]) -> float:
+    """Largest absolute error over length, width and height (meters)."""
+    return max(abs(float(measured[name]) - expected[name]) for name in ("length", "width", "height"))
+
+
+def benchmark_endpoints(api_url: str, file_path: str, repeat: int) -> Dict[str, float]:
+    """Time the upload-to-done cycle and the room endpoints of a running API.
+    
+    The scan is uploaded once (a repeated upload would hit the result
+    cache); read endpoints are timed repeat times and the fastest is kept.
+    
+    Args:
+        api_url: API base URL, e.g. http://localhost:8000
+        file_path: PLY file to upload
+        repeat: Timed requests per read endpoint
+    
+    Returns:
+        Seconds per endpoint
+    
+    Raises:
+        RuntimeError: If processing fails or times out
+    """
+    import httpx
+    
+    timings = {}
+    with httpx.Client(base_url=api_url, timeout=JOB_TIMEOUT) as client:
+        start = time.perf_counter()
+        with open(file_path, "rb") as f:
+            response = client.post("/api/upload-scan", files={"file": (os.path.basename(file_path), f)})
+        response.raise_for_status()
+        timings["upload_scan"] = time.perf_counter() - start
+        
+        job_id = response.json()["job_id"]
+        while True:
+            job = client.get(f"/api/jobs/{job_id}").json()
+            if job["status"] in ("done", "failed"):
+                break
+            if time.perf_counter() - start > JOB_TIMEOUT:
+                raise RuntimeError(f"Job {job_id} did not finish within {JOB_TIMEOUT}s")
+            time.sleep(0.2)
+        if job["status"] != "done":
+            raise RuntimeError(f"Job {job_id} failed: {job.get('error')}")
+        timings["upload_to_done"] = time.perf_counter() - start
+        
+        room_id = job["room_id"]
+        endpoints = {
+            "dimensions": f"/api/room/{room_id}/dimensions",
+            "objects": f"/api/room/{room_id}/objects",
+            "data": f"/api/room/{room_id}/data",
+            "points_lod0": f"/api/room/{room_id}/points?lod=0",
+            "profile": f"/api/room/{room_id}/profile",
+        }
+        for name, path in endpoints.items():
+            durations = []
+            for _ in range(repeat):
+                request_start = time.perf_counter()
+                client.get(path).raise_for_status()
+                durations.append(time.perf_counter() - request_start)
+            timings[name] = min(durations)
+    return timings
+
+
+def run_benchmarks(
+    sizes: List[int],
+    noise_levels: List[float],
+    workdir: str,
+    repeat: int = 1,
+    api_url: Optional[str] = None,
+    seed: int = 0
+) -> Dict[str, Any]:
+    """Benchmark every (size, noise) scenario.
+    
+    Args:
+        sizes: Point counts
+        noise_levels: Gaussian noise levels in meters
+        workdir: Directory for generated scans (reused when present)
+        repeat: Pipeline runs (and endpoint requests) per scenario; the
+            fastest run is kept
+        api_url: Optional API base URL for endpoint timings
+        seed: Random seed for the synthetic rooms
+    
+    Returns:
+        Results document with environment, settings and scenarios
+    """
+    os.makedirs(workdir, exist_ok=True)
+    scenarios = {}
+    for point_count in sizes:
+        for noise in noise_levels:
+            name = scenario_name(point_count, noise)
+            file_path = os.path.join(workdir, f"{name}_s{seed}.ply")
+            if not os.path.exists(file_path):
+                # Written under a temporary name so an interrupted run leaves no partial scan
+                spec = write_room_ply(file_path + ".tmp", point_count, noise, seed)
+                os.replace(file_path + ".tmp", file_path)
+                logger.info(f"Generated {file_path} ({spec['point_count']} points)")
+            
+            runs = [run_pipeline(file_path) for _ in range(repeat)]
+            best = min(runs, key=lambda run: run["total"])
+            best["point_count"] = point_count
+            best["noise"] = noise
+            best["dimension_error"] = dimension_error(best["dimensions"], EXPECTED_DIMENSIONS)
+            if api_url:
+                best["endpoints"] = benchmark_endpoints(api_url, file_path, repeat)
+            scenarios[name] = best
+            logger.info(
+                f"{name}: {best['total']:.2f}s, peak RSS {best['peak_rss_mb']:.0f}MB, "
+                f"dimension error {best['dimension_error']:.3f}m"
+            )
+    
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "open3d": open3d.__version__,
+        },
+        # Everything but the database URL (credentials); the API stack is not imported
+        "settings": settings.model_dump(exclude={"database_url"}),
+        "scenarios": scenarios,
+    }
+
+
+def _metrics(scenario: Dict[str, Any]) -> Dict[str, float]:
+    """Flatten the compared metrics of one scenario."""
+    metrics = {"total": scenario["total"], "peak_rss_mb": scenario["peak_rss_mb"]}
+    for stage, profile in scenario.get("stages", {}).items():
+        metrics[f"stages.{stage}"] = profile["wall_time"]
+    for endpoint, seconds in scenario.get("endpoints", {}).items():
+        metrics[f"endpoints.{endpoint}"] = seconds
+    return metrics
+
+
+def compare_to_baseline(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD
+) -> List[Dict[str, Any]]:
+    """Find metrics that regressed against a baseline results document.
+    
+    Timings and peak RSS regress when they exceed the baseline by more than
+    threshold (relative); timings under MIN_COMPARED_SECONDS in the baseline
+    are skipped. The dimension error regresses when it grows by more than
+    ACCURACY_TOLERANCE. Scenarios or metrics missing from the baseline are
+    not compared.
+    
+    Args:
+        results: Current results (see run_benchmarks)
+        baseline: Baseline results
+        threshold: Allowed relative increase, e.g. 0.2 for 20%
+    
+    Returns:
+        List of regressions with scenario, metric, baseline, current and ratio
+    """
+    regressions = []
+    for name, scenario in results["scenarios"].items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if reference is None:
+            continue
+        
+        current_metrics = _metrics(scenario)
+        for metric, base in _metrics(reference).items():
+            current = current_metrics.get(metric)
+            if current is None or (metric != "peak_rss_mb" and base < MIN_COMPARED_SECONDS):
+                continue
+            if current > base * (1 + threshold):
+                regressions.append({
+                    "scenario": name,
+                    "metric": metric,
+                    "baseline": base,
+                    "current": current,
+                    "ratio": current / base if base > 0 else float("inf"),
+                })
+        
+        base_error = reference.get("dimension_error")
+        if base_error is not None and scenario["dimension_error"] > base_error + ACCURACY_TOLERANCE:
+            regressions.append({
+                "scenario": name,
+                "metric": "dimension_error",
+                "baseline": base_error,
+                "current": scenario["dimension_error"],
+                "ratio": scenario["dimension_error"] / base_error if base_error > 0 else float("inf"),
+            })
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated point counts (e.g. 100k,1M)")
+    parser.add_argument("--noise", default=DEFAULT_NOISE, help="Comma-separated noise levels in meters")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario (fastest is kept)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic rooms")
+    parser.add_argument("--workdir", default=os.path.join(settings.temp_directory, "benchmarks"),
+                        help="Directory for generated scans")
+    parser.add_argument("--api-url", help="Also benchmark the endpoints of the API running at this URL")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--baseline", help="Baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative regression over the baseline (default 0.2)")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results to --baseline")
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.WARNING)
+    logger.setLevel(logging.INFO)
+    
+    results = run_benchmarks(
+        sizes=[parse_point_count(size) for size in args.sizes.split(",")],
+        noise_levels=[float(noise) for noise in args.noise.split(",")],
+        workdir=args.workdir,
+        repeat=args.repeat,
+        api_url=args.api_url,
+        seed=args.seed
+    )
+    
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+    
+    if args.baseline and args.update_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(report)
+        logger.info(f"Baseline written to {args.baseline}")
+        return 0
+    
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            logger.warning(f"Baseline {args.baseline} not found; nothing compared")
+            return 0
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        for regression in regressions:
+            logger.error(
+                f"Regression in {regression['scenario']} {regression['metric']}: "
+                f"{regression['baseline']:.3f} -> {regression['current']:.3f} ({regression['ratio']:.2f}x)"
+            )
+        if regressions:
+            return 1
+        logger.info(f"No regressions over {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""Reproducible synthetic room scans at benchmark scale.
+
+A room is an axis-aligned box (floor, ceiling, four walls) with box-shaped
+furniture standing on the floor. Points are sampled uniformly over all
+surfaces in proportion to their area, jittered with Gaussian noise, and a
+small fraction of uniform outliers is added, so every scan has known
+dimensions and furniture at any point count. Generation is vectorized,
+seeded and chunked, and scans are written as binary little-endian PLY
+(float32 xyz, uchar rgb) like Scaniverse exports, so 10M-point rooms are
+generated in bounded memory.
+"""
+import numpy as np
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+# Room extent in meters (length along x, width along y, height along z)
+ROOM_DIMENSIONS = (5.0, 4.0, 2.6)
+
+# Furniture boxes: footprint center (x, y) and size (length, width, height),
+# sized to match the geometric classification rules
+FURNITURE: List[Dict[str, Any]] = [
+    {"type": "bed", "center": (1.5, 2.6), "size": (2.0, 1.5, 0.5)},
+    {"type": "table", "center": (3.7, 1.2), "size": (1.2, 0.8, 0.75)},
+    {"type": "chair", "center": (3.7, 2.3), "size": (0.45, 0.45, 0.45)},
+    {"type": "cabinet", "center": (4.2, 3.3), "size": (1.0, 0.5, 1.8)},
+]
+
+# Share of points replaced by uniform outliers around the room
+OUTLIER_FRACTION = 0.005
+
+# Points generated (and written) per chunk
+GENERATE_CHUNK_POINTS = 1_000_000
+
+PLY_VERTEX = np.dtype([
+    ("x", "<f4"), ("y", "<f4"), ("z", "<f4"),
+    ("red", "u1"), ("green", "u1"), ("blue", "u1"),
+])
+
+# Surface colors (uint8 rgb)
+FLOOR_COLOR = (150, 120, 90)
+WALL_COLOR = (220, 220, 215)
+CEILING_COLOR = (240, 240, 240)
+FURNITURE_COLOR = (90, 70, 60)
+
+
+def parse_point_count(label: str) -> int:
+    """Parse a point count such as "100k", "3M" or "250000".
+    
+    Raises:
+        ValueError: If the label is not a positive count
+    """
+    text = label.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    count = int(float(text[:-1] if scale > 1 else text) * scale)
+    if count <= 0:
+        raise ValueError(f"Point count must be positive, got {label}")
+    return count
+
+
+def room_surfaces(
+    dimensions: Tuple[float, float, float] = ROOM_DIMENSIONS,
+    furniture: Optional[List[Dict[str, Any]]] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Rectangles making up the room and its furniture.
+    
+    Args:
+        dimensions: Room length, width and height
+        furniture: Furniture boxes (defaults to FURNITURE)
+    
+    Returns:
+        Tuple of (origins, u, v, colors): rectangle i covers
+        origins[i] + s * u[i] + t * v[i] for s, t in [0, 1]
+    """
+    length, width, height = dimensions
+    furniture = FURNITURE if furniture is None else furniture
+    x, y, z = np.eye(3)
+    rects = [
+        ((0, 0, 0), length * x, width * y, FLOOR_COLOR),
+        ((0, 0, height), length * x, width * y, CEILING_COLOR),
+        ((0, 0, 0), length * x, height * z, WALL_COLOR),
+        ((0, width, 0), length * x, height * z, WALL_COLOR),
+        ((0, 0, 0), width * y, height * z, WALL_COLOR),
+        ((length, 0, 0), width * y, height * z, WALL_COLOR),
+    ]
+    for item in furniture:
+        (cx, cy), (sx, sy, sz) = item["center"], item["size"]
+        x0, y0 = cx - sx / 2, cy - sy / 2
+        rects += [
+            ((x0, y0, sz), sx * x, sy * y, FURNITURE_COLOR),
+            ((x0, y0, 0), sx * x, sz * z, FURNITURE_COLOR),
+            ((x0, y0 + sy, 0), sx * x, sz * z, FURNITURE_COLOR),
+            ((x0, y0, 0), sy * y, sz * z, FURNITURE_COLOR),
+            ((x0 + sx, y0, 0), sy * y, sz * z, FURNITURE_COLOR),
+        ]
+    origins, u, v, colors = (np.array(column, dtype=np.float64) for column in zip(*rects))
+    return origins, u, v, colors.astype(np.uint8)
+
+
+def generate_room_chunks(
+    point_count: int,
+    noise: float = 0.002,
+    seed: int = 0,
+    dimensions: Tuple[float, float, float] = ROOM_DIMENSIONS,
+    furniture: Optional[List[Dict[str, Any]]] = None,
+    chunk_points: int = GENERATE_CHUNK_POINTS
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Generate a synthetic room scan chunk by chunk.
+    
+    Args:
+        point_count: Total points (including outliers)
+        noise: Gaussian position noise (standard deviation in meters)
+        seed: Random seed; the same arguments always give the same scan
+        dimensions: Room length, width and height
+        furniture: Furniture boxes (defaults to FURNITURE)
+        chunk_points: Points per chunk
+    
+    Yields:
+        (points (n, 3) float32, colors (n, 3) uint8) chunks
+    """
+    rng = np.random.default_rng(seed)
+    origins, u, v, colors = room_surfaces(dimensions, furniture)
+    areas = np.linalg.norm(np.cross(u, v), axis=1)
+    probabilities = areas / areas.sum()
+    low = np.zeros(3) - 0.5
+    high = np.asarray(dimensions) + 0.5
+    
+    for start in range(0, point_count, chunk_points):
+        n = min(chunk_points, point_count - start)
+        rect = rng.choice(len(areas), size=n, p=probabilities)
+        s, t = rng.random((2, n, 1))
+        points = origins[rect] + s * u[rect] + t * v[rect] + rng.normal(0.0, noise, size=(n, 3))
+        chunk_colors = colors[rect]
+        
+        outliers = rng.random(n) < OUTLIER_FRACTION
+        points[outliers] = rng.uniform(low, high, size=(int(outliers.sum()), 3))
+        yield points.astype(np.float32), chunk_colors
+
+
+def generate_room(point_count: int, noise: float = 0.002, seed: int = 0, **kwargs: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """Generate a whole synthetic room scan in memory (see generate_room_chunks).
+    
+    Returns:
+        Tuple of (points (N, 3) float32, colors (N, 3) uint8)
+    """
+    chunks = list(generate_room_chunks(point_count, noise, seed, **kwargs))
+    return np.concatenate([c[0] for c in chunks]), np.concatenate([c[1] for c in chunks])
+
+
+def write_room_ply(
+    path: str,
+    point_count: int,
+    noise: float = 0.002,
+    seed: int = 0,
+    dimensions: Tuple[float, float, float] = ROOM_DIMENSIONS,
+    furniture: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """Write a synthetic room scan as binary little-endian PLY.
+    
+    Args:
+        path: Output file
+        point_count: Total points (including outliers)
+        noise: Gaussian position noise in meters
+        seed: Random seed
+        dimensions: Room length, width and height
+        furniture: Furniture boxes (defaults to FURNITURE)
+    
+    Returns:
+        Room specification: point_count, noise, seed, dimensions
+        (length, width, height) and furniture
+    """
+    header = (
+        "ply\n"
+        "format binary_little_endian 1.0\n"
+        f"element vertex {point_count}\n"
+        "property float x\nproperty float y\nproperty float z\n"
+        "property uchar red\nproperty uchar green\nproperty uchar blue\n"
+        "end_header\n"
+    )
+    with open(path, "wb") as f:
+        f.write(header.encode("ascii"))
+        for points, colors in generate_room_chunks(point_count, noise, seed, dimensions, furniture):
+            vertices = np.empty(len(points), dtype=PLY_VERTEX)
+            vertices["x"], vertices["y"], vertices["z"] = points.T
+            vertices["red"], vertices["green"], vertices["blue"] = colors.T
+            f.write(vertices.tobytes())
+    
+    length, width, height = dimensions
+    return {
+        "point_count": point_count,
+        "noise": noise,
+        "seed": seed,
+        "dimensions": {"length": length, "width": width, "height": height},
+        "furniture": FURNITURE if furniture is None else furniture,
+    }
@@ -7,6 +7,7 @@ import asyncio
 import tempfile
 import os
 from pathlib import Path
+from contextlib import asynccontextmanager
 from typing import AsyncGenerator, Generator
 import numpy as np
 import open3d as o3d
@@ -20,6 +21,7 @@ os.environ["TEST_MODE"] = "true"
 
 from backend.api.main import app
 from backend.database.connection import get_db_session
+from backend.api.job_queue import job_queue
 from backend.config import settings
 
 
@@ -113,12 +115,19 @@ def test_client(test_db_session: AsyncSession) -> TestClient:
         # Return the session as an async generator to match the original signature
         yield test_db_session
     
+    @asynccontextmanager
+    async def override_job_session():
+        """Run background job workers on the test session as well."""
+        yield test_db_session
+    
     app.dependency_overrides[get_db_session] = override_get_db
+    job_queue.session_factory = override_job_session
     
     with TestClient(app) as client:
         yield client
     
     app.dependency_overrides.clear()
+    job_queue.session_factory = None
 
 
 @pytest.fixture
@@ -8,6 +8,33 @@ from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import AsyncSession
 from pathlib import Path
 import io
+import time
+
+from backend.processing.lod import read_patch_stream, decode_patch
+
+
+def upload_and_wait(client: TestClient, ply_path: str, timeout: float = 120.0):
+    """Upload a scan and poll its job until it finishes.
+    
+    Returns:
+        Tuple of (upload_response, final_job_status or None)
+    """
+    with open(ply_path, "rb") as f:
+        files = {"file": ("test_room.ply", f, "application/octet-stream")}
+        upload_response = client.post("/api/upload-scan", files=files)
+    
+    if upload_response.status_code != 202:
+        return upload_response, None
+    
+    job_id = upload_response.json()["job_id"]
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/api/jobs/{job_id}").json()
+        if job["status"] in ("done", "failed"):
+            return upload_response, job
+        time.sleep(0.2)
+    
+    return upload_response, None
 
 
 class TestHealthEndpoint:
@@ -38,20 +65,19 @@ class TestUploadEndpoint:
     """Tests for file upload endpoint."""
     
     def test_upload_scan_valid_ply(self, test_client: TestClient, synthetic_ply_file: str):
-        """Test uploading a valid PLY file."""
-        with open(synthetic_ply_file, "rb") as f:
-            files = {"file": ("test_room.ply", f, "application/octet-stream")}
-            response = test_client.post("/api/upload-scan", files=files)
+        """Test uploading a valid PLY file queues a job that completes."""
+        upload_response, job = upload_and_wait(test_client, synthetic_ply_file)
         
-        # Upload should succeed (200 or 201)
-        assert response.status_code in [200, 201]
+        # Upload is accepted immediately and processed asynchronously
+        assert upload_response.status_code == 202
         
-        data = response.json()
-        assert data["status"] == "success"
-        assert "room_id" in data
-        assert "objects_detected" in data
-        assert isinstance(data["objects_detected"], int)
-        assert data["objects_detected"] >= 0
+        data = upload_response.json()
+        assert data["status"] == "queued"
+        assert "job_id" in data
+        
+        assert job is not None
+        assert job["status"] == "done"
+        assert job["room_id"] is not None
     
     def test_upload_scan_invalid_format(self, test_client: TestClient):
         """Test uploading an invalid file format."""
@@ -86,8 +112,30 @@ class TestUploadEndpoint:
         files = {"file": ("invalid.ply", invalid_ply, "application/octet-stream")}
         response = test_client.post("/api/upload-scan", files=files)
         
-        # Should reject invalid PLY structure
-        assert response.status_code in [400, 500]
+        # Should reject invalid PLY structure, either up front or as a failed job
+        if response.status_code == 202:
+            job_id = response.json()["job_id"]
+            deadline = time.time() + 30
+            job = test_client.get(f"/api/jobs/{job_id}").json()
+            while job["status"] not in ("done", "failed") and time.time() < deadline:
+                time.sleep(0.2)
+                job = test_client.get(f"/api/jobs/{job_id}").json()
+            assert job["status"] == "failed"
+            assert job["error"]
+        else:
+            assert response.status_code in [400, 500]
+
+
+class TestJobStatusEndpoint:
+    """Tests for processing job status endpoint."""
+    
+    def test_get_job_status_nonexistent(self, test_client: TestClient):
+        """Test getting status for non-existent job."""
+        response = test_client.get("/api/jobs/nonexistent_job")
+        
+        assert response.status_code == 404
+        data = response.json()
+        assert "detail" in data
 
 
 class TestRoomDimensionsEndpoint:
@@ -96,14 +144,12 @@ class TestRoomDimensionsEndpoint:
     def test_get_room_dimensions_existing(self, test_client: TestClient, synthetic_ply_file: str):
         """Test getting dimensions for an existing room."""
         # First upload a scan
-        with open(synthetic_ply_file, "rb") as f:
-            files = {"file": ("test_room.ply", f, "application/octet-stream")}
-            upload_response = test_client.post("/api/upload-scan", files=files)
+        upload_response, job = upload_and_wait(test_client, synthetic_ply_file)
         
-        if upload_response.status_code not in [200, 201]:
+        if job is None or job["status"] != "done":
             pytest.skip("Upload failed, cannot test dimensions endpoint")
         
-        room_id = upload_response.json()["room_id"]
+        room_id = job["room_id"]
         
         # Get dimensions
         response = test_client.get(f"/api/room/{room_id}/dimensions")
@@ -135,14 +181,12 @@ class TestRoomObjectsEndpoint:
     def test_get_room_objects_existing(self, test_client: TestClient, synthetic_ply_file: str):
         """Test getting objects for an existing room."""
         # First upload a scan
-        with open(synthetic_ply_file, "rb") as f:
-            files = {"file": ("test_room.ply", f, "application/octet-stream")}
-            upload_response = test_client.post("/api/upload-scan", files=files)
+        upload_response, job = upload_and_wait(test_client, synthetic_ply_file)
         
-        if upload_response.status_code not in [200, 201]:
+        if job is None or job["status"] != "done":
             pytest.skip("Upload failed, cannot test objects endpoint")
         
-        room_id = upload_response.json()["room_id"]
+        room_id = job["room_id"]
         
         # Get objects
         response = test_client.get(f"/api/room/{room_id}/objects")
@@ -158,6 +202,9 @@ class TestRoomObjectsEndpoint:
             assert "dimensions" in obj
             assert "volume" in obj
             assert "confidence" in obj
+            # Positions are real coordinates inside the 4m x 3m x 2.5m room
+            x, y, z = obj["position"]
+            assert 0.0 <= x <= 4.0 and 0.0 <= y <= 3.0 and 0.0 <= z <= 2.5
     
     def test_get_room_objects_nonexistent(self, test_client: TestClient):
         """Test getting objects for non-existent room."""
@@ -174,14 +221,12 @@ class TestRoomDataEndpoint:
     def test_get_room_data_existing(self, test_client: TestClient, synthetic_ply_file: str):
         """Test getting complete room data."""
         # First upload a scan
-        with open(synthetic_ply_file, "rb") as f:
-            files = {"file": ("test_room.ply", f, "application/octet-stream")}
-            upload_response = test_client.post("/api/upload-scan", files=files)
+        upload_response, job = upload_and_wait(test_client, synthetic_ply_file)
         
-        if upload_response.status_code not in [200, 201]:
+        if job is None or job["status"] != "done":
             pytest.skip("Upload failed, cannot test room data endpoint")
         
-        room_id = upload_response.json()["room_id"]
+        room_id = job["room_id"]
         
         # Get complete room data
         response = test_client.get(f"/api/room/{room_id}/data")
@@ -207,6 +252,106 @@ class TestRoomDataEndpoint:
         response = test_client.get("/api/room/nonexistent_room/data")
         
         assert response.status_code == 404
+    
+    def test_get_room_data_conditional(self, test_client: TestClient, synthetic_ply_file: str):
+        """Test ETag headers and 304 responses for unchanged rooms."""
+        upload_response, job = upload_and_wait(test_client, synthetic_ply_file)
+        
+        if job is None or job["status"] != "done":
+            pytest.skip("Upload failed, cannot test conditional requests")
+        
+        room_id = job["room_id"]
+        for endpoint in ("data", "objects", "dimensions"):
+            response = test_client.get(f"/api/room/{room_id}/{endpoint}")
+            assert response.status_code == 200
+            etag = response.headers["etag"]
+            assert etag.startswith('"') and not etag.startswith("W/")
+            
+            not_modified = test_client.get(f"/api/room/{room_id}/{endpoint}", headers={"If-None-Match": etag})
+            assert not_modified.status_code == 304
+            assert not_modified.content == b""
+            assert not_modified.headers["etag"] == etag
+            
+            stale = test_client.get(f"/api/room/{room_id}/{endpoint}", headers={"If-None-Match": '"stale"'})
+            assert stale.status_code == 200
+            assert stale.json() == response.json()
+        
+        missing = test_client.get("/api/room/nonexistent_room/data", headers={"If-None-Match": etag})
+        assert missing.status_code == 404
+
+
+
+class TestRoomPointsEndpoint:
+    """Tests for the LOD point cloud tile endpoint."""
+    
+    def test_get_room_points_bbox(self, test_client: TestClient, synthetic_ply_file: str):
+        """Test a bounding box returns only the intersecting patches."""
+        upload_response, job = upload_and_wait(test_client, synthetic_ply_file)
+        
+        if job is None or job["status"] != "done":
+            pytest.skip("Upload failed, cannot test points endpoint")
+        
+        room_id = job["room_id"]
+        
+        full = test_client.get(f"/api/room/{room_id}/points", params={"lod": 0})
+        corner = test_client.get(
+            f"/api/room/{room_id}/points",
+            params={"lod": 0, "min_x": -0.1, "min_y": -0.1, "max_x": 0.5, "max_y": 0.5}
+        )
+        
+        assert full.status_code == 200
+        assert corner.status_code == 200
+        assert full.headers["content-type"] == "application/octet-stream"
+        full_patches = list(read_patch_stream(full.content))
+        corner_patches = list(read_patch_stream(corner.content))
+        assert len(full_patches) == int(full.headers["x-patch-count"])
+        assert 0 < len(corner_patches) < len(full_patches)
+        
+        points, _ = decode_patch(corner_patches[0])
+        assert points.shape[1] == 3
+    
+    def test_get_room_points_invalid_bbox(self, test_client: TestClient):
+        """Test partial or inverted bounding boxes are rejected."""
+        response = test_client.get("/api/room/nonexistent_room/points", params={"min_x": 0.0})
+        assert response.status_code == 400
+        
+        response = test_client.get(
+            "/api/room/nonexistent_room/points",
+            params={"min_x": 1.0, "min_y": 0.0, "max_x": 0.0, "max_y": 1.0}
+        )
+        assert response.status_code == 400
+    
+    def test_get_room_points_nonexistent(self, test_client: TestClient):
+        """Test getting points for non-existent room."""
+        response = test_client.get("/api/room/nonexistent_room/points")
+        
+        assert response.status_code == 404
+
+
+class TestRoomProfileEndpoint:
+    """Tests for the per-stage processing profile endpoint."""
+    
+    def test_get_room_profile(self, test_client: TestClient, synthetic_ply_file: str):
+        """Test the profile lists every pipeline stage that ran."""
+        upload_response, job = upload_and_wait(test_client, synthetic_ply_file)
+        
+        if job is None or job["status"] != "done":
+            pytest.skip("Upload failed, cannot test profile endpoint")
+        
+        response = test_client.get(f"/api/room/{job['room_id']}/profile")
+        
+        assert response.status_code == 200
+        data = response.json()
+        stages = [stage["stage"] for stage in data["stages"]]
+        assert stages[:3] == ["loading", "preprocessing", "lod_pyramid"]
+        assert "spatial_relationships" in stages
+        assert data["stages"][1]["points_in"] >= data["stages"][1]["points_out"] > 0
+    
+    def test_get_room_profile_nonexistent(self, test_client: TestClient):
+        """Test getting the profile of a non-existent room."""
+        response = test_client.get("/api/room/nonexistent_room/profile")
+        
+        assert response.status_code == 404
 
 
 class TestCheckFitEndpoint:
@@ -215,14 +360,12 @@ class TestCheckFitEndpoint:
     def test_check_fit_valid_item(self, test_client: TestClient, synthetic_ply_file: str):
         """Test checking if an item fits in a room."""
         # First upload a scan
-        with open(synthetic_ply_file, "rb") as f:
-            files = {"file": ("test_room.ply", f, "application/octet-stream")}
-            upload_response = test_client.post("/api/upload-scan", files=files)
+        upload_response, job = upload_and_wait(test_client, synthetic_ply_file)
         
-        if upload_response.status_code not in [200, 201]:
+        if job is None or job["status"] != "done":
             pytest.skip("Upload failed, cannot test fit check endpoint")
         
-        room_id = upload_response.json()["room_id"]
+        room_id = job["room_id"]
         
         # Check fit for a small item
         item_data = {
@@ -248,14 +391,12 @@ class TestCheckFitEndpoint:
     def test_check_fit_too_large_item(self, test_client: TestClient, synthetic_ply_file: str):
         """Test checking fit for an item that's too large."""
         # First upload a scan
-        with open(synthetic_ply_file, "rb") as f:
-            files = {"file": ("test_room.ply", f, "application/octet-stream")}
-            upload_response = test_client.post("/api/upload-scan", files=files)
+        upload_response, job = upload_and_wait(test_client, synthetic_ply_file)
         
-        if upload_response.status_code not in [200, 201]:
+        if job is None or job["status"] != "done":
             pytest.skip("Upload failed, cannot test fit check endpoint")
         
-        room_id = upload_response.json()["room_id"]
+        room_id = job["room_id"]
         
         # Check fit for a very large item
         item_data = {
@@ -274,14 +415,12 @@ class TestCheckFitEndpoint:
     
     def test_check_fit_invalid_dimensions(self, test_client: TestClient, synthetic_ply_file: str):
         """Test checking fit with invalid item dimensions."""
-        with open(synthetic_ply_file, "rb") as f:
-            files = {"file": ("test_room.ply", f, "application/octet-stream")}
-            upload_response = test_client.post("/api/upload-scan", files=files)
+        upload_response, job = upload_and_wait(test_client, synthetic_ply_file)
         
-        if upload_response.status_code not in [200, 201]:
+        if job is None or job["status"] != "done":
             pytest.skip("Upload failed")
         
-        room_id = upload_response.json()["room_id"]
+        room_id = job["room_id"]
         
         # Invalid dimensions (wrong length)
         item_data = {
@@ -315,14 +454,12 @@ class TestOptimizeEndpoint:
     def test_optimize_existing_room(self, test_client: TestClient, synthetic_ply_file: str):
         """Test getting optimization suggestions for existing room."""
         # First upload a scan
-        with open(synthetic_ply_file, "rb") as f:
-            files = {"file": ("test_room.ply", f, "application/octet-stream")}
-            upload_response = test_client.post("/api/upload-scan", files=files)
+        upload_response, job = upload_and_wait(test_client, synthetic_ply_file)
         
-        if upload_response.status_code not in [200, 201]:
+        if job is None or job["status"] != "done":
             pytest.skip("Upload failed, cannot test optimize endpoint")
         
-        room_id = upload_response.json()["room_id"]
+        room_id = job["room_id"]
         
         # Get optimization suggestions
         response = test_client.get(f"/api/room/{room_id}/optimize")
@@ -0,0 +1,104 @@
+"""Tests for the benchmark suite: synthetic rooms and baseline comparison."""
+import copy
+
+import numpy as np
+import pytest
+
+from backend.processing.point_cloud import load_compact_point_cloud
+from backend.processing.process_room import process_room_scan
+from benchmarks.synthetic import (
+    ROOM_DIMENSIONS,
+    generate_room,
+    parse_point_count,
+    write_room_ply
+)
+from benchmarks.run import compare_to_baseline, dimension_error, EXPECTED_DIMENSIONS
+
+
+@pytest.mark.parametrize("label,expected", [("100k", 100_000), ("3M", 3_000_000), ("2.5k", 2_500), ("1234", 1234)])
+def test_parse_point_count(label, expected):
+    assert parse_point_count(label) == expected
+
+
+def test_parse_point_count_rejects_zero():
+    with pytest.raises(ValueError):
+        parse_point_count("0")
+
+
+def test_synthetic_room_is_reproducible():
+    """The same seed gives the same scan."""
+    points, colors = generate_room(20_000, noise=0.005, seed=3)
+    again, _ = generate_room(20_000, noise=0.005, seed=3)
+    other, _ = generate_room(20_000, noise=0.005, seed=4)
+    
+    assert points.shape == (20_000, 3) and points.dtype == np.float32
+    assert colors.shape == (20_000, 3) and colors.dtype == np.uint8
+    np.testing.assert_array_equal(points, again)
+    assert not np.array_equal(points, other)
+
+
+def test_synthetic_room_extent():
+    """Apart from outliers, points lie within noise of the room box."""
+    points, _ = generate_room(50_000, noise=0.002, seed=0)
+    inside = np.all((points >= -0.01) & (points <= np.array(ROOM_DIMENSIONS) + 0.01), axis=1)
+    
+    assert inside.mean() > 0.99
+    np.testing.assert_allclose(np.percentile(points[inside], 100, axis=0), ROOM_DIMENSIONS, atol=0.01)
+
+
+def test_write_room_ply_loads(tmp_path):
+    path = tmp_path / "room.ply"
+    spec = write_room_ply(str(path), 10_000, noise=0.002, seed=1)
+    cloud = load_compact_point_cloud(str(path))
+    points, colors = generate_room(10_000, noise=0.002, seed=1)
+    
+    assert spec["dimensions"] == EXPECTED_DIMENSIONS
+    assert len(cloud) == 10_000 and cloud.has_colors()
+    np.testing.assert_array_equal(cloud.points, points)
+    np.testing.assert_array_equal(cloud.colors, colors)
+
+
+def test_synthetic_room_dimensions(tmp_path):
+    """The pipeline measures the generated room close to its known size."""
+    path = tmp_path / "room.ply"
+    write_room_ply(str(path), 100_000, noise=0.002, seed=0)
+    
+    result = process_room_scan(str(path))
+    
+    assert dimension_error(result["dimensions"], EXPECTED_DIMENSIONS) < 0.2
+
+
+def _results(total, preprocessing, peak_rss_mb=500.0, error=0.05):
+    return {"scenarios": {"room_100000_n0.002": {
+        "total": total,
+        "stages": {"preprocessing": {"wall_time": preprocessing}, "loading": {"wall_time": 0.01}},
+        "peak_rss_mb": peak_rss_mb,
+        "dimension_error": error,
+    }}}
+
+
+def test_compare_to_baseline_within_threshold():
+    baseline = _results(total=2.0, preprocessing=1.0)
+    assert compare_to_baseline(_results(total=2.3, preprocessing=1.1), baseline, threshold=0.2) == []
+
+
+def test_compare_to_baseline_flags_regressions():
+    baseline = _results(total=2.0, preprocessing=1.0)
+    current = _results(total=2.1, preprocessing=1.5, peak_rss_mb=800.0, error=0.2)
+    # Sub-MIN_COMPARED_SECONDS timings are too noisy to compare
+    current["scenarios"]["room_100000_n0.002"]["stages"]["loading"]["wall_time"] = 0.04
+    
+    regressions = compare_to_baseline(current, baseline, threshold=0.2)
+    
+    assert {r["metric"] for r in regressions} == {"stages.preprocessing", "peak_rss_mb", "dimension_error"}
+    preprocessing = next(r for r in regressions if r["metric"] == "stages.preprocessing")
+    assert preprocessing["ratio"] == pytest.approx(1.5)
+
+
+def test_compare_to_baseline_skips_new_scenarios():
+    baseline = _results(total=2.0, preprocessing=1.0)
+    current = copy.deepcopy(baseline)
+    current["scenarios"]["room_3000000_n0.002"] = current["scenarios"].pop("room_100000_n0.002")
+    current["scenarios"]["room_3000000_n0.002"]["total"] = 100.0
+    
+    assert compare_to_baseline(current, baseline) == []
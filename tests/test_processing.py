@@ -3,24 +3,73 @@
 Tests RANSAC plane detection, DBSCAN clustering, room dimension extraction,
 and object classification with synthetic and real point cloud data.
 """
+import asyncio
 import pytest
 import numpy as np
 import open3d as o3d
 from pathlib import Path
 
+from backend.config import settings
+
 from backend.processing.point_cloud import (
     load_point_cloud,
+    load_compact_point_cloud,
     preprocess_point_cloud,
-    assess_scan_quality
+    assess_scan_quality,
+    estimate_normals_indexed,
+    remove_outliers
 )
 from backend.processing.algorithms import (
     detect_planes,
     cluster_objects,
-    reconstruct_mesh
+    reconstruct_mesh,
+    remaining_points_mask,
+    detect_planes_with_stats,
+    segment_plane_adaptive,
+    ransac_required_iterations,
+    dbscan_labels,
+    voxel_cluster_labels
 )
+from backend.processing.spatial_index import SpatialIndex
+from backend.processing.cloud import CompactPointCloud
+from backend.processing.tensor_backend import to_tensor, to_tensor_cloud, from_tensor_cloud
 from backend.processing.room_analysis import extract_room_dimensions
-from backend.processing.process_room import process_room_scan
-from backend.processing.object_detection import classify_objects
+from backend.processing.process_room import process_room_scan, PIPELINE_STAGES
+from backend.processing.object_detection import (
+    classify_objects,
+    classify_by_geometry,
+    classify_by_geometry_batch,
+    extract_batch_features,
+    extract_geometric_features
+)
+from backend.processing.ply_reader import load_ply_arrays, read_ply_header, is_binary_ply
+from backend.processing.executor import PipelineExecutor
+from backend.processing.cluster_stats import compute_cluster_stats
+from backend.processing.voxel_grid import voxel_downsample
+from backend.processing.tiling import open_tiled_scan, preprocess_tiled, plan_tiles
+from backend.processing.lod import (
+    encode_patch,
+    decode_patch,
+    build_lod_pyramid,
+    frame_patches,
+    read_patch_stream
+)
+from backend.processing.spatial_index import SpatialIndexRegistry
+
+
+def write_binary_ply(path, vertices: np.ndarray, fmt: str = "binary_little_endian"):
+    """Write a structured vertex array as a binary PLY file."""
+    ply_names = {"f4": "float", "f8": "double", "u1": "uchar", "i4": "int"}
+    byte_order = "<" if fmt == "binary_little_endian" else ">"
+    header = ["ply", f"format {fmt} 1.0", f"element vertex {len(vertices)}"]
+    for name in vertices.dtype.names:
+        kind = vertices.dtype[name]
+        header.append(f"property {ply_names[kind.kind + str(kind.itemsize)]} {name}")
+    header.append("end_header")
+    swapped = vertices.astype(vertices.dtype.newbyteorder(byte_order))
+    with open(path, "wb") as f:
+        f.write(("\n".join(header) + "\n").encode("ascii"))
+        f.write(swapped.tobytes())
 
 
 class TestPointCloudLoading:
@@ -52,6 +101,116 @@ class TestPointCloudLoading:
                     load_point_cloud(str(empty_file))
         except ValueError:
             pass  # Expected behavior
+    
+    def test_load_compact_point_cloud(self, synthetic_ply_file):
+        """Test compact loading keeps float32 positions and uint8 colors."""
+        pcd = load_point_cloud(synthetic_ply_file)
+        
+        cloud = load_compact_point_cloud(synthetic_ply_file)
+        
+        assert cloud.points.dtype == np.float32
+        assert cloud.colors.dtype == np.uint8
+        assert cloud.nbytes == len(cloud) * (12 + 3 + (12 if cloud.has_normals() else 0))
+        np.testing.assert_allclose(cloud.points, np.asarray(pcd.points), atol=1e-6)
+        np.testing.assert_allclose(cloud.color_floats(), np.asarray(pcd.colors), atol=0.5 / 255)
+    
+    def test_compact_point_cloud_roundtrip(self):
+        """Test Open3D conversion and selection keep compact dtypes."""
+        rng = np.random.default_rng(5)
+        pcd = o3d.geometry.PointCloud()
+        pcd.points = o3d.utility.Vector3dVector(rng.uniform(0, 5, size=(100, 3)))
+        pcd.colors = o3d.utility.Vector3dVector(rng.uniform(0, 1, size=(100, 3)))
+        
+        cloud = CompactPointCloud.from_open3d(pcd)
+        subset = cloud.select(np.arange(0, 100, 2))
+        restored = cloud.to_open3d()
+        
+        assert not cloud.has_normals()
+        assert len(subset) == 50 and subset.colors.dtype == np.uint8
+        np.testing.assert_array_equal(subset.points, cloud.points[::2])
+        np.testing.assert_allclose(np.asarray(restored.points), np.asarray(pcd.points), atol=1e-6)
+        np.testing.assert_allclose(np.asarray(restored.colors), np.asarray(pcd.colors), atol=0.5 / 255)
+
+
+class TestBinaryPlyReader:
+    """Tests for the memory-mapped binary PLY reader."""
+    
+    @staticmethod
+    def _vertices(count: int = 200) -> np.ndarray:
+        rng = np.random.default_rng(0)
+        vertices = np.zeros(count, dtype=[
+            ("x", "f4"), ("y", "f4"), ("z", "f4"),
+            ("red", "u1"), ("green", "u1"), ("blue", "u1"),
+            ("confidence", "f4"),
+        ])
+        for name in ("x", "y", "z", "confidence"):
+            vertices[name] = rng.random(count)
+        for name in ("red", "green", "blue"):
+            vertices[name] = rng.integers(0, 256, count)
+        return vertices
+    
+    @pytest.mark.parametrize("fmt", ["binary_little_endian", "binary_big_endian"])
+    def test_load_ply_arrays_views_and_extras(self, tmp_path, fmt):
+        """Test xyz/rgb views and extra properties for both byte orders."""
+        vertices = self._vertices()
+        path = tmp_path / "scan.ply"
+        write_binary_ply(path, vertices, fmt)
+        
+        arrays = load_ply_arrays(str(path))
+        
+        assert arrays["vertex_count"] == len(vertices)
+        assert arrays["points"].shape == (len(vertices), 3)
+        assert np.allclose(arrays["points"][:, 0], vertices["x"])
+        assert np.array_equal(arrays["colors"][:, 2], vertices["blue"])
+        assert arrays["normals"] is None
+        # Open3D drops confidence; the reader keeps it
+        assert np.allclose(arrays["attributes"]["confidence"], vertices["confidence"])
+        # Points are a view over the memory-mapped file, not a copy
+        assert not arrays["points"].flags.owndata
+    
+    def test_mmap_loader_matches_open3d(self, synthetic_ply_file):
+        """Test binary loader produces the same cloud as o3d.io.read_point_cloud."""
+        assert is_binary_ply(synthetic_ply_file)
+        
+        pcd = load_point_cloud(synthetic_ply_file)
+        reference = o3d.io.read_point_cloud(synthetic_ply_file)
+        
+        assert np.allclose(np.asarray(pcd.points), np.asarray(reference.points))
+        assert np.allclose(np.asarray(pcd.colors), np.asarray(reference.colors))
+    
+    def test_mmap_loader_positions_only(self, tmp_path):
+        """Test packed float64 xyz (read-only contiguous view) loads into Open3D."""
+        vertices = np.zeros(50, dtype=[("x", "f8"), ("y", "f8"), ("z", "f8")])
+        vertices["x"] = np.arange(50)
+        path = tmp_path / "xyz.ply"
+        write_binary_ply(path, vertices)
+        
+        pcd = load_point_cloud(str(path))
+        
+        assert np.allclose(np.asarray(pcd.points)[:, 0], vertices["x"])
+    
+    def test_ascii_ply_not_binary(self, tmp_path):
+        """Test ASCII PLY files are left to Open3D."""
+        path = tmp_path / "ascii.ply"
+        path.write_text(
+            "ply\nformat ascii 1.0\nelement vertex 1\n"
+            "property float x\nproperty float y\nproperty float z\nend_header\n0 0 0\n"
+        )
+        
+        assert read_ply_header(str(path))["format"] == "ascii"
+        assert not is_binary_ply(str(path))
+    
+    def test_truncated_binary_ply(self, tmp_path):
+        """Test truncated vertex blocks are rejected."""
+        from backend.processing.ply_reader import memmap_ply_vertices
+        
+        path = tmp_path / "truncated.ply"
+        write_binary_ply(path, self._vertices())
+        data = path.read_bytes()
+        path.write_bytes(data[:-10])
+        
+        with pytest.raises(ValueError, match="truncated"):
+            memmap_ply_vertices(str(path))
 
 
 class TestPreprocessing:
@@ -78,8 +237,198 @@ class TestPreprocessing:
         
         assert len(pcd_processed.points) > 0
         assert pcd_processed.has_normals()
+    
+    def test_voxel_downsample_matches_open3d(self):
+        """Test the NumPy kernel produces Open3D's voxels plus per-voxel layers."""
+        rng = np.random.default_rng(5)
+        points = rng.uniform(0, 1, size=(5000, 3))
+        colors = rng.uniform(0, 1, size=(5000, 3))
+        pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(points))
+        pcd.colors = o3d.utility.Vector3dVector(colors)
+        
+        grid = voxel_downsample(points, 0.1, colors=colors, attributes={"confidence": points[:, 0]})
+        expected = pcd.voxel_down_sample(0.1)
+        
+        def by_position(values, positions):
+            return values[np.lexsort(positions.T[::-1])]
+        
+        o3d_points = np.asarray(expected.points)
+        np.testing.assert_allclose(by_position(grid["points"], grid["points"]), by_position(o3d_points, o3d_points))
+        np.testing.assert_allclose(
+            by_position(grid["colors"], grid["points"]),
+            by_position(np.asarray(expected.colors), o3d_points)
+        )
+        
+        assert grid["counts"].sum() == len(points)
+        np.testing.assert_array_equal(np.bincount(grid["inverse"]), grid["counts"])
+        np.testing.assert_allclose(grid["attributes"]["confidence"], grid["points"][:, 0])
+        assert np.all(grid["z_min"] <= grid["points"][:, 2])
+        assert np.all(grid["points"][:, 2] <= grid["z_max"])
+        # Variance of the first voxel against a direct computation
+        members = grid["inverse"] == 0
+        np.testing.assert_allclose(grid["color_variance"][0], colors[members].var(axis=0), atol=1e-12)
+    
+    def test_voxel_downsample_integer_colors(self):
+        """Test uint8 colors give the same means and variances as float colors."""
+        rng = np.random.default_rng(6)
+        points = rng.uniform(0, 1, size=(5000, 3)).astype(np.float32)
+        colors = rng.integers(0, 256, size=(5000, 3), dtype=np.uint8)
+        
+        grid = voxel_downsample(points, 0.1, colors=colors)
+        expected = voxel_downsample(points.astype(np.float64), 0.1, colors=colors.astype(np.float64))
+        
+        np.testing.assert_allclose(grid["points"], expected["points"], atol=1e-6)
+        np.testing.assert_allclose(grid["colors"], expected["colors"])
+        np.testing.assert_allclose(grid["color_variance"], expected["color_variance"], atol=1e-9)
+        np.testing.assert_array_equal(grid["inverse"], expected["inverse"])
+    
+    def test_preprocess_density_layer(self, synthetic_ply_file, monkeypatch):
+        """Test the NumPy downsampler returns a density layer aligned with the cloud."""
+        monkeypatch.setattr(settings, "voxel_downsampler", "numpy")
+        pcd = load_point_cloud(synthetic_ply_file)
+        layers = {}
+        
+        pcd_processed = preprocess_point_cloud(pcd, layers=layers)
+        
+        assert len(layers["density"]) == len(pcd_processed.points)
+        assert layers["density"].min() >= 1
+        assert len(layers["z_min"]) == len(pcd_processed.points)
+    
+    
+    def test_plan_tiles_cover_extent(self):
+        """Test tiles are voxel-aligned and cover the XY extent without overlap."""
+        origin, tiles = plan_tiles(np.array([0.0, 0.0, 0.0]), np.array([4.0, 3.0, 2.5]), 0.05, 1.0)
+        
+        np.testing.assert_allclose(origin, [-0.025, -0.025, -0.025])
+        assert len(tiles) == 5 * 4
+        assert all(np.array_equal(hi - lo, [20, 20]) for lo, hi in tiles)
+        assert tiles[0][0].tolist() == [0, 0] and tiles[1][0].tolist() == [20, 0]
+    
+    def test_tiled_matches_whole_cloud(self, synthetic_ply_file):
+        """Test tiled preprocessing reproduces whole-cloud preprocessing."""
+        expected = preprocess_point_cloud(load_point_cloud(synthetic_ply_file), SpatialIndexRegistry())
+        layers = {}
+        
+        pcd, stats = preprocess_tiled(open_tiled_scan(synthetic_ply_file), layers, tile_size=1.0)
+        
+        assert stats["tiles"] == 20
+        assert stats["halo"] >= 0.1
+        points = np.asarray(pcd.points)
+        expected_points = np.asarray(expected.points)
+        order = np.lexsort(points.T[::-1])
+        expected_order = np.lexsort(expected_points.T[::-1])
+        np.testing.assert_allclose(points[order], expected_points[expected_order])
+        alignment = np.abs(np.sum(
+            np.asarray(pcd.normals)[order] * np.asarray(expected.normals)[expected_order], axis=1
+        ))
+        assert alignment.min() > 0.999
+        # Every kept raw point is counted in exactly one voxel
+        assert len(layers["density"]) == len(points)
+        assert layers["density"].sum() == len(load_point_cloud(synthetic_ply_file).points) - stats["outliers_removed"]
+    
+    def test_tiled_halo_spans_several_tiles(self, synthetic_ply_file):
+        """Test tiles smaller than the halo (neighbors read from several buckets) give the same cloud."""
+        expected, _ = preprocess_tiled(open_tiled_scan(synthetic_ply_file), tile_size=1.0)
+        
+        pcd, stats = preprocess_tiled(open_tiled_scan(synthetic_ply_file), tile_size=0.1, chunk_points=5000)
+        
+        assert stats["halo"] > 0.1
+        points = np.asarray(pcd.points)
+        expected_points = np.asarray(expected.points)
+        np.testing.assert_allclose(
+            points[np.lexsort(points.T[::-1])],
+            expected_points[np.lexsort(expected_points.T[::-1])]
+        )
+    
+    def test_tensor_cloud_shares_memory(self):
+        """Test NumPy <-> tensor exchange does not copy float32 arrays."""
+        points = np.random.default_rng(2).uniform(0, 1, size=(100, 3)).astype(np.float32)
+        cloud = CompactPointCloud(points, colors=np.full((100, 3), 255, dtype=np.uint8))
+        
+        tensor = to_tensor(points)
+        points[0, 0] = 7.0
+        restored = from_tensor_cloud(to_tensor_cloud(cloud))
+        
+        assert tensor[0, 0].item() == 7.0
+        np.testing.assert_array_equal(restored.points, points)
+        assert restored.colors.dtype == np.uint8 and (restored.colors == 255).all()
+    
+    def test_tensor_backend_matches_legacy(self, synthetic_ply_file, monkeypatch):
+        """Test the o3d.t backend removes outliers, downsamples and estimates normals like legacy."""
+        expected = preprocess_point_cloud(load_point_cloud(synthetic_ply_file))
+        monkeypatch.setattr(settings, "geometry_backend", "tensor")
+        
+        pcd = preprocess_point_cloud(load_point_cloud(synthetic_ply_file))
+        
+        # Same voxel grid as the legacy path
+        assert len(pcd.points) == len(expected.points)
+        np.testing.assert_allclose(pcd.get_min_bound(), expected.get_min_bound(), atol=0.05)
+        np.testing.assert_allclose(pcd.get_max_bound(), expected.get_max_bound(), atol=0.05)
+        np.testing.assert_allclose(np.linalg.norm(np.asarray(pcd.normals), axis=1), 1.0, atol=1e-5)
+    
+    def test_unknown_geometry_backend(self, synthetic_ply_file, monkeypatch):
+        """Test invalid geometry backend names raise ValueError."""
+        monkeypatch.setattr(settings, "geometry_backend", "cuda")
+        with pytest.raises(ValueError, match="Unknown geometry backend"):
+            preprocess_point_cloud(load_point_cloud(synthetic_ply_file))
 
 
+class TestLodPyramid:
+    """Tests for the stored level-of-detail pyramid."""
+    
+    def test_patch_roundtrip(self):
+        """Test patch encoding keeps positions within the quantization step."""
+        rng = np.random.default_rng(11)
+        points = rng.uniform([1.0, 2.0, 0.0], [3.0, 4.0, 2.5], size=(1000, 3))
+        colors = rng.uniform(0, 1, size=(1000, 3))
+        
+        data = encode_patch(points, colors)
+        decoded_points, decoded_colors = decode_patch(data)
+        
+        assert len(data) < points.nbytes / 2
+        np.testing.assert_allclose(decoded_points, points, atol=0.001)
+        np.testing.assert_allclose(decoded_colors, colors, atol=1 / 255)
+        with pytest.raises(ValueError):
+            decode_patch(data[:-1])
+    
+    def test_patch_stream_framing(self):
+        """Test framed patch streams split back into the original blobs."""
+        blobs = [encode_patch(np.full((n, 3), float(n))) for n in (1, 5, 20)]
+        payload = b"".join(frame_patches(blobs))
+        
+        assert list(read_patch_stream(payload)) == blobs
+        with pytest.raises(ValueError):
+            list(read_patch_stream(payload[:-2]))
+    
+    def test_build_pyramid_levels(self, synthetic_ply_file):
+        """Test levels go coarse to fine and patches partition each level."""
+        pcd = load_point_cloud(synthetic_ply_file)
+        points = np.asarray(pcd.points)
+        
+        patches, stats = build_lod_pyramid(points, np.asarray(pcd.colors), [0.05, 0.2, 0.1], patch_size=1.0)
+        
+        assert [level["voxel_size"] for level in stats["levels"]] == [0.2, 0.1, 0.05]
+        point_counts = [level["points"] for level in stats["levels"]]
+        assert point_counts == sorted(point_counts)
+        for level, level_stats in enumerate(stats["levels"]):
+            level_patches = [p for p in patches if p["lod_level"] == level]
+            assert len(level_patches) == level_stats["patches"]
+            assert sum(p["point_count"] for p in level_patches) == level_stats["points"]
+            for patch in level_patches[:3]:
+                decoded, _ = decode_patch(patch["data"])
+                min_x, min_y, max_x, max_y = patch["envelope"]
+                assert np.all((decoded[:, 0] >= min_x) & (decoded[:, 0] <= max_x))
+                assert np.all((decoded[:, 1] >= min_y) & (decoded[:, 1] <= max_y))
+    
+    def test_pyramid_skips_levels_finer_than_source(self):
+        """Test levels finer than the source resolution are not stored."""
+        points = np.random.default_rng(2).uniform(0, 2, size=(2000, 3))
+        
+        patches, stats = build_lod_pyramid(points, None, [0.2, 0.02], patch_size=1.0, source_voxel_size=0.05)
+        
+        assert [level["voxel_size"] for level in stats["levels"]] == [0.2]
+        assert {p["lod_level"] for p in patches} == {0}
+
 class TestPlaneDetection:
     """Tests for RANSAC plane detection."""
     
@@ -118,6 +467,87 @@ class TestPlaneDetection:
         plane_models, _ = detect_planes(pcd_processed, max_planes=2)
         
         assert len(plane_models) <= 2
+    
+    def test_detect_planes_global_indices(self, synthetic_ply_file):
+        """Test inlier indices refer to the input cloud and are disjoint."""
+        pcd = load_point_cloud(synthetic_ply_file)
+        pcd_processed = preprocess_point_cloud(pcd)
+        points = np.asarray(pcd_processed.points)
+        
+        plane_models, plane_inliers = detect_planes(pcd_processed, max_planes=5)
+        
+        assert len(plane_models) >= 2
+        seen = np.zeros(len(points), dtype=bool)
+        for plane, inliers in zip(plane_models, plane_inliers):
+            assert not seen[inliers].any()
+            seen[inliers] = True
+            distances = np.abs(points[inliers] @ plane[:3] + plane[3])
+            assert distances.max() <= settings.ransac_distance_threshold + 1e-9
+        
+        mask = remaining_points_mask(len(points), plane_inliers)
+        np.testing.assert_array_equal(mask, ~seen)
+    
+    def test_ransac_required_iterations(self):
+        """Test adaptive iteration formula N = log(1-p) / log(1-w^3)."""
+        assert ransac_required_iterations(0.5, 0.999) == pytest.approx(np.log(0.001) / np.log(1 - 0.125))
+        assert ransac_required_iterations(0.0, 0.999) == float("inf")
+        assert ransac_required_iterations(1.0, 0.999) == 1.0
+    
+    def test_adaptive_ransac_exits_early(self):
+        """Test a dominant plane terminates well before the iteration cap."""
+        rng = np.random.default_rng(0)
+        floor = np.column_stack([rng.uniform(0, 4, 5000), rng.uniform(0, 3, 5000), np.zeros(5000)])
+        clutter = rng.uniform(0, 3, size=(1000, 3))
+        points = np.vstack([floor, clutter])
+        
+        plane, inliers, iterations = segment_plane_adaptive(
+            points, distance_threshold=0.01, max_iterations=1000, confidence=0.999, rng=rng
+        )
+        
+        assert iterations < 1000
+        assert abs(abs(plane[2]) - 1.0) < 1e-6
+        assert len(inliers) >= 5000
+    
+    @pytest.mark.parametrize("mode", ["fixed", "adaptive"])
+    def test_detect_planes_reports_iterations(self, synthetic_ply_file, monkeypatch, mode):
+        """Test iteration counts are reported per plane and bounded by the cap."""
+        monkeypatch.setattr(settings, "ransac_mode", mode)
+        pcd = preprocess_point_cloud(load_point_cloud(synthetic_ply_file))
+        
+        plane_models, _, stats = detect_planes_with_stats(pcd, max_planes=5)
+        
+        assert stats["mode"] == mode
+        assert len(stats["iterations"]) >= len(plane_models) >= 2
+        assert all(0 < n <= settings.ransac_iterations for n in stats["iterations"])
+    
+    def test_manhattan_detector_synthetic_room(self, synthetic_ply_file, monkeypatch):
+        """Test dominant-axis detection recovers the room planes and dimensions."""
+        monkeypatch.setattr(settings, "plane_detector", "manhattan")
+        pcd = preprocess_point_cloud(load_point_cloud(synthetic_ply_file))
+        
+        plane_models, plane_inliers, stats = detect_planes_with_stats(pcd, max_planes=6)
+        dimensions = extract_room_dimensions(pcd, plane_models, plane_inliers)
+        
+        assert stats["detector"] == "manhattan"
+        assert len(plane_models) == 6
+        assert abs(dimensions["length"] - 4.0) < 0.05
+        assert abs(dimensions["width"] - 3.0) < 0.05
+        assert abs(dimensions["height"] - 2.5) < 0.05
+    
+    def test_manhattan_falls_back_to_ransac(self, monkeypatch):
+        """Test unstructured normals fall back to RANSAC."""
+        monkeypatch.setattr(settings, "plane_detector", "manhattan")
+        rng = np.random.default_rng(0)
+        floor = np.column_stack([rng.uniform(0, 4, 3000), rng.uniform(0, 3, 3000), np.zeros(3000)])
+        pcd = o3d.geometry.PointCloud()
+        pcd.points = o3d.utility.Vector3dVector(floor)
+        pcd.normals = o3d.utility.Vector3dVector(rng.normal(size=(3000, 3)))
+        
+        plane_models, _, stats = detect_planes_with_stats(pcd, max_planes=1)
+        
+        assert stats["detector"] == "ransac"
+        assert stats["fallback_from"] == "manhattan"
+        assert len(plane_models) == 1
 
 
 class TestDBSCANClustering:
@@ -163,6 +593,183 @@ class TestDBSCANClustering:
         assert isinstance(labels, np.ndarray)
         # May return empty array or handle differently
         assert max_label >= -1
+    
+    def test_voxel_cluster_labels(self):
+        """Test occupancy-grid clustering separates blobs and drops sparse noise."""
+        rng = np.random.default_rng(3)
+        blob_a = rng.normal([0.0, 0.0, 0.5], 0.05, size=(400, 3))
+        blob_b = rng.normal([1.5, 1.0, 0.5], 0.05, size=(400, 3))
+        noise = rng.uniform([-1, -1, 0], [3, 3, 2], size=(20, 3))
+        points = np.vstack([noise, blob_a, blob_b])
+        
+        labels = voxel_cluster_labels(points, cell_size=0.1, min_points=30)
+        
+        assert labels.shape == (len(points),)
+        assert labels.max() == 1
+        # Numbered by lowest point index; each blob is one cluster
+        assert set(labels[20:420]) == {0}
+        assert set(labels[420:]) == {1}
+        assert (labels[:20] == -1).mean() > 0.8
+    
+    def test_voxel_cluster_labels_sparse_extent(self):
+        """Test clustering only stores occupied voxels, however large the extent."""
+        rng = np.random.default_rng(4)
+        blob_a = rng.normal([0.0, 0.0, 0.5], 0.05, size=(400, 3))
+        blob_b = rng.normal([2000.0, 1500.0, 300.0], 0.05, size=(400, 3))
+        points = np.vstack([blob_a, blob_b])
+        
+        # A dense 10cm grid over this extent would have ~10^12 voxels
+        labels = voxel_cluster_labels(points, cell_size=0.1, min_points=30)
+        
+        assert labels is not None
+        assert set(labels[:400]) <= {-1, 0} and (labels[:400] == 0).mean() > 0.95
+        assert set(labels[400:]) <= {-1, 1} and (labels[400:] == 1).mean() > 0.95
+    
+    def test_cluster_objects_voxel_backend(self, synthetic_ply_file, monkeypatch):
+        """Test the voxel backend returns the cluster_objects contract."""
+        monkeypatch.setattr(settings, "clustering_backend", "voxel")
+        pcd = preprocess_point_cloud(load_point_cloud(synthetic_ply_file))
+        
+        labels, max_label, stats = cluster_objects(pcd)
+        
+        assert len(labels) == len(pcd.points)
+        assert max_label == labels.max()
+        assert stats["backend"] == "voxel"
+        assert stats["num_clusters"] == max_label + 1
+        assert stats["noise_points"] == int((labels == -1).sum())
+    
+    def test_cluster_objects_unknown_backend(self, synthetic_ply_file, monkeypatch):
+        """Test an unknown clustering backend is rejected."""
+        monkeypatch.setattr(settings, "clustering_backend", "kmeans")
+        pcd = load_point_cloud(synthetic_ply_file)
+        
+        with pytest.raises(ValueError):
+            cluster_objects(pcd)
+
+
+class TestClusterStats:
+    """Tests for single-pass cluster statistics."""
+    
+    def test_matches_per_cluster_masks(self):
+        """Test counts, indices, centroids, bounds and colors match mask scans."""
+        rng = np.random.default_rng(0)
+        labels = rng.integers(-1, 6, size=2000)
+        labels[labels == 3] = -1  # Empty label inside the range
+        points = rng.uniform(-2, 2, size=(2000, 3))
+        colors = rng.uniform(0, 1, size=(2000, 3))
+        
+        stats = compute_cluster_stats(labels, points, colors)
+        
+        assert stats["num_clusters"] == 6
+        assert stats["noise_points"] == int(np.sum(labels == -1))
+        for i in range(6):
+            mask = labels == i
+            members = stats["order"][stats["offsets"][i]:stats["offsets"][i + 1]]
+            np.testing.assert_array_equal(members, np.where(mask)[0])
+            assert stats["counts"][i] == mask.sum()
+            if mask.any():
+                np.testing.assert_allclose(stats["centroids"][i], points[mask].mean(axis=0))
+                np.testing.assert_allclose(stats["bbox_min"][i], points[mask].min(axis=0))
+                np.testing.assert_allclose(stats["bbox_max"][i], points[mask].max(axis=0))
+                np.testing.assert_allclose(stats["color_means"][i], colors[mask].mean(axis=0))
+            else:
+                assert np.isnan(stats["centroids"][i]).all()
+    
+    def test_classification_reuses_clustering_groups(self, monkeypatch):
+        """Test cluster_objects hands its grouping to classify_objects (one pass)."""
+        import backend.processing.object_detection as object_detection_module
+        
+        rng = np.random.default_rng(1)
+        blobs = [rng.normal(center, 0.03, size=(300, 3)) for center in ([0, 0, 0.4], [2, 0, 0.4], [0, 2, 0.4])]
+        pcd = o3d.geometry.PointCloud(o3d.utility.Vector3dVector(np.vstack(blobs)))
+        expected_labels, _, _ = cluster_objects(pcd)
+        expected = classify_objects(pcd, expected_labels)
+        
+        groups = {}
+        labels, _, _ = cluster_objects(pcd, groups=groups)
+        monkeypatch.setattr(object_detection_module, "compute_cluster_stats", None)
+        objects = classify_objects(pcd, labels, stats=groups)
+        
+        assert groups["num_clusters"] == 3 and groups["bbox_min"].shape == (3, 3)
+        assert objects == expected
+    
+    def test_all_noise(self):
+        """Test labels without clusters."""
+        stats = compute_cluster_stats(np.full(10, -1), np.zeros((10, 3)))
+        
+        assert stats["num_clusters"] == 0
+        assert stats["noise_points"] == 10
+        assert len(stats["order"]) == 0
+        assert stats["centroids"].shape == (0, 3)
+
+
+class TestSpatialIndex:
+    """Tests for the shared spatial index and the kernels using it."""
+    
+    @pytest.fixture
+    def noisy_points(self):
+        rng = np.random.default_rng(0)
+        floor = np.column_stack([rng.uniform(0, 2, 4000), rng.uniform(0, 2, 4000), np.zeros(4000)])
+        blob = rng.normal([1.0, 1.0, 0.5], 0.05, size=(1000, 3))
+        outliers = rng.uniform(-1, 3, size=(100, 3))
+        return np.vstack([floor, blob, outliers]) + rng.normal(0, 0.002, size=(5100, 3))
+    
+    def test_radius_graph_reuse(self, noisy_points):
+        """Test smaller radii and subsets reuse the cached neighbor graph."""
+        index = SpatialIndex(noisy_points, min_graph_radius=0.1)
+        
+        indptr, neighbors, distances = index.radius_graph(0.05)
+        assert distances.max() <= 0.05
+        index.radius_graph(0.08)
+        assert index.queries == 1
+        assert index.reuses == 1
+        
+        subset_ids = np.arange(0, len(noisy_points), 3)
+        subset = index.subset(subset_ids)
+        sub_indptr, sub_neighbors, _ = subset.radius_graph(0.05)
+        direct = SpatialIndex(noisy_points[subset_ids]).radius_graph(0.05)
+        assert subset.build_time == 0.0
+        assert index.reuses == 2
+        np.testing.assert_array_equal(sub_indptr, direct[0])
+        for row in (0, 10, 500):
+            assert sorted(sub_neighbors[sub_indptr[row]:sub_indptr[row + 1]]) == \
+                sorted(direct[1][direct[0][row]:direct[0][row + 1]])
+    
+    def test_normals_match_open3d(self, noisy_points):
+        """Test hybrid normal estimation matches Open3D up to sign."""
+        pcd = o3d.geometry.PointCloud()
+        pcd.points = o3d.utility.Vector3dVector(noisy_points)
+        pcd.estimate_normals(o3d.geometry.KDTreeSearchParamHybrid(radius=0.1, max_nn=30))
+        
+        normals = estimate_normals_indexed(SpatialIndex(noisy_points), radius=0.1, max_nn=30)
+        
+        alignment = np.abs(np.sum(normals * np.asarray(pcd.normals), axis=1))
+        assert np.median(alignment) > 0.999
+    
+    def test_dbscan_matches_open3d(self, noisy_points):
+        """Test DBSCAN on the neighbor graph finds the same clusters and noise."""
+        pcd = o3d.geometry.PointCloud()
+        pcd.points = o3d.utility.Vector3dVector(noisy_points)
+        expected = np.array(pcd.cluster_dbscan(eps=0.05, min_points=10))
+        
+        labels = dbscan_labels(SpatialIndex(noisy_points), eps=0.05, min_points=10)
+        
+        assert labels.max() == expected.max()
+        np.testing.assert_array_equal(labels == -1, expected == -1)
+    
+    def test_pipeline_reports_index_stats(self, synthetic_ply_file, monkeypatch):
+        """Test the pipeline builds each index once and reports reuse."""
+        monkeypatch.setattr(settings, "shared_spatial_index", True)
+        monkeypatch.setattr(settings, "geometry_backend", "legacy")
+        
+        result = process_room_scan(synthetic_ply_file)
+        
+        indexes = result["spatial_index"]["indexes"]
+        # The raw cloud is filtered by Open3D; only the processed cloud is indexed
+        assert "raw" not in indexes
+        assert "processed" in indexes
+        assert indexes["processed"]["queries"] == 1
+        assert result["spatial_index"]["total_reuses"] >= 1
 
 
 class TestRoomDimensions:
@@ -258,6 +865,36 @@ class TestObjectClassification:
                     assert len(obj["dimensions"]) == 3
 
 
+class TestBatchClassification:
+    """Tests for vectorized feature extraction and classification."""
+    
+    def test_batch_matches_per_cluster(self):
+        """Test batch features and rules match the per-cluster functions."""
+        rng = np.random.default_rng(1)
+        bbox_min = rng.uniform(-3, 3, size=(300, 3))
+        bbox_max = bbox_min + rng.uniform(0, 2.5, size=(300, 3))
+        bbox_max[:5, 1] = bbox_min[:5, 1]  # Zero width
+        
+        features = extract_batch_features(bbox_min, bbox_max)
+        types, confidences = classify_by_geometry_batch(features)
+        
+        for i in range(len(bbox_min)):
+            cluster = o3d.geometry.PointCloud()
+            cluster.points = o3d.utility.Vector3dVector(np.stack([bbox_min[i], bbox_max[i]]))
+            expected = extract_geometric_features(cluster)
+            for name in ("length", "width", "height", "volume", "aspect_ratio_xy", "surface_area"):
+                assert features[name][i] == pytest.approx(expected[name])
+            
+            obj_type, confidence = classify_by_geometry(
+                {"length": expected["length"], "width": expected["width"], "height": expected["height"]},
+                expected["volume"],
+                expected["aspect_ratio_xy"],
+                expected["height"]
+            )
+            assert types[i] == obj_type
+            assert confidences[i] == confidence
+
+
 class TestCompletePipeline:
     """Tests for complete processing pipeline."""
     
@@ -304,6 +941,105 @@ class TestCompletePipeline:
         assert abs(dims["length"] - 4.0) < 0.5
         assert abs(dims["width"] - 3.0) < 0.5
         assert abs(dims["height"] - 2.5) < 0.5
+    
+    def test_process_room_scan_stage_profile(self, synthetic_ply_file, monkeypatch):
+        """Test every stage that ran is profiled with timings and point counts."""
+        monkeypatch.setattr(settings, "profile_allocations", True)
+        
+        result = process_room_scan(synthetic_ply_file)
+        
+        profile = {stage["stage"]: stage for stage in result["stage_profile"]}
+        assert list(profile)[:5] == PIPELINE_STAGES[:5]
+        assert profile["loading"]["points_out"] == result["point_count"]
+        assert profile["preprocessing"]["points_in"] == result["point_count"]
+        assert profile["preprocessing"]["points_out"] == result["processed_points"]
+        assert profile["object_isolation"]["points_out"] <= result["processed_points"]
+        for stage in profile.values():
+            assert stage["wall_time"] >= 0 and stage["cpu_time"] >= 0
+            assert stage["peak_rss_mb"] > 0 and stage["traced_peak_mb"] >= 0
+            assert 0 < stage["rss_mb"] <= stage["peak_rss_mb"]
+        assert sum(stage["wall_time"] for stage in profile.values()) <= result["processing_time"]
+    
+    def test_lod_pyramid_built_from_filtered_cloud(self, synthetic_ply_file):
+        """Test the finest LOD level holds the outlier-filtered points at full resolution."""
+        result = process_room_scan(synthetic_ply_file)
+        
+        filtered = remove_outliers(load_compact_point_cloud(synthetic_ply_file))
+        finest = result["lod_stats"]["levels"][-1]
+        expected = voxel_downsample(filtered.points, finest["voxel_size"])
+        assert finest["voxel_size"] == min(settings.lod_voxel_sizes)
+        assert finest["points"] == len(expected["counts"])
+    
+    def test_process_room_scan_tensor_backend(self, synthetic_ply_file, monkeypatch):
+        """Test the o3d.t backend takes priority over adaptive RANSAC and the shared index."""
+        monkeypatch.setattr(settings, "geometry_backend", "tensor")
+        monkeypatch.setattr(settings, "ransac_mode", "adaptive")
+        monkeypatch.setattr(settings, "shared_spatial_index", True)
+        
+        result = process_room_scan(synthetic_ply_file)
+        
+        assert result["plane_stats"]["mode"] == "fixed"
+        assert result["spatial_index"] == {}
+        dims = result["dimensions"]
+        assert abs(dims["length"] - 4.0) < 0.5
+        assert abs(dims["width"] - 3.0) < 0.5
+        assert abs(dims["height"] - 2.5) < 0.5
+
+
+class TestPipelineExecutor:
+    """Tests for pipeline execution backends."""
+    
+    def test_unknown_backend_rejected(self):
+        """Test invalid backend names raise ValueError."""
+        with pytest.raises(ValueError, match="Unknown processing backend"):
+            PipelineExecutor("gpu", max_workers=1)
+    
+    @pytest.mark.parametrize("backend", [
+        "inline",
+        "thread",
+        pytest.param("process", marks=pytest.mark.slow),
+    ])
+    async def test_run_pipeline_reports_stages(self, small_synthetic_ply, backend):
+        """Test each backend runs the pipeline and forwards stage updates."""
+        executor = PipelineExecutor(backend, max_workers=1, max_tasks_per_child=1)
+        stages = []
+        try:
+            result = await executor.run_pipeline(small_synthetic_ply, stages.append)
+        finally:
+            executor.shutdown()
+        
+        assert result["point_count"] > 0
+        assert stages[0] == "loading"
+        assert "spatial_relationships" in stages
+    
+    async def test_broken_pool_replaced_once(self, monkeypatch):
+        """Test concurrent jobs on a dead process pool shut it down and replace it once."""
+        from concurrent.futures import Executor, Future
+        from concurrent.futures.process import BrokenProcessPool
+        
+        class DeadPool(Executor):
+            shutdowns = 0
+            
+            def submit(self, fn, *args, **kwargs):
+                future = Future()
+                future.set_exception(BrokenProcessPool("worker died"))
+                return future
+            
+            def shutdown(self, wait=True, *, cancel_futures=False):
+                DeadPool.shutdowns += 1
+        
+        executor = PipelineExecutor("process", max_workers=1)
+        created = []
+        monkeypatch.setattr(executor, "_create_executor", lambda: created.append(1) or DeadPool())
+        executor._executor = dead = DeadPool()
+        
+        results = await asyncio.gather(
+            executor.run_pipeline("a.ply"), executor.run_pipeline("b.ply"), return_exceptions=True
+        )
+        
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert len(created) == 1 and DeadPool.shutdowns == 1
+        assert executor._executor is not dead
 
 
 class TestScanQuality:
@@ -0,0 +1,297 @@
+"""Unit tests for upload utilities.
+
+Tests streaming ingest of uploaded scans, PLY header validation, the
+result cache and the room read cache.
+"""
+import pytest
+import hashlib
+import io
+import json
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from fastapi import UploadFile
+
+from backend.api.room_data import build_room_data, etag_matches, load_room_data, room_etag
+from backend.utils.cache import TTLCache
+from backend.utils.file_handler import save_upload_stream
+from backend.utils.validators import validate_ply_header
+
+
+class TestPlyHeaderValidation:
+    """Tests for PLY header validation on the first streamed chunk."""
+
+    def test_valid_header(self):
+        """Test a standard PLY magic line is accepted."""
+        is_valid, error = validate_ply_header(b"ply\nformat binary_little_endian 1.0\n")
+        assert is_valid
+        assert error is None
+
+    def test_invalid_header(self):
+        """Test non-PLY content is rejected."""
+        is_valid, error = validate_ply_header(b"fake content")
+        assert not is_valid
+        assert "header" in error
+
+    def test_empty_header(self):
+        """Test empty content is rejected."""
+        is_valid, error = validate_ply_header(b"")
+        assert not is_valid
+
+
+class TestStreamingUpload:
+    """Tests for chunked upload streaming to the temp directory."""
+
+    async def test_stream_writes_all_chunks(self, tmp_path, monkeypatch):
+        """Test multi-chunk uploads are written completely."""
+        from backend.config import settings
+        monkeypatch.setattr(settings, "temp_directory", str(tmp_path))
+
+        content = b"ply\nformat ascii 1.0\n" + b"0 0 0\n" * 1000
+        upload = UploadFile(file=io.BytesIO(content), filename="scan.ply")
+
+        path, size, content_hash = await save_upload_stream(upload, chunk_size=64)
+
+        assert size == len(content)
+        assert content_hash == hashlib.sha256(content).hexdigest()
+        with open(path, "rb") as f:
+            assert f.read() == content
+        os.unlink(path)
+
+    async def test_stream_rejects_oversized_file(self, tmp_path, monkeypatch):
+        """Test size limit is enforced while streaming and partial file removed."""
+        from backend.config import settings
+        monkeypatch.setattr(settings, "temp_directory", str(tmp_path))
+
+        content = b"ply\n" + b"x" * 1024
+        upload = UploadFile(file=io.BytesIO(content), filename="scan.ply")
+
+        with pytest.raises(ValueError, match="too large"):
+            await save_upload_stream(upload, max_size=256, chunk_size=64)
+
+        assert os.listdir(tmp_path) == []
+
+    async def test_stream_rejects_invalid_header(self, tmp_path, monkeypatch):
+        """Test invalid PLY header is rejected from the first chunk."""
+        from backend.config import settings
+        monkeypatch.setattr(settings, "temp_directory", str(tmp_path))
+
+        upload = UploadFile(file=io.BytesIO(b"not a ply file"), filename="scan.ply")
+
+        with pytest.raises(ValueError, match="header"):
+            await save_upload_stream(upload)
+
+        assert os.listdir(tmp_path) == []
+
+    async def test_stream_rejects_empty_file(self, tmp_path, monkeypatch):
+        """Test empty uploads are rejected."""
+        from backend.config import settings
+        monkeypatch.setattr(settings, "temp_directory", str(tmp_path))
+
+        upload = UploadFile(file=io.BytesIO(b""), filename="scan.ply")
+
+        with pytest.raises(ValueError, match="empty"):
+            await save_upload_stream(upload)
+
+
+class TestTTLCache:
+    """Tests for the LRU/TTL result cache."""
+
+    def test_get_set(self):
+        """Test stored values are returned and counted as hits."""
+        cache = TTLCache(max_size=4, ttl_seconds=60)
+        cache.set(("abc", "def"), "room_1")
+
+        assert cache.get(("abc", "def")) == "room_1"
+        assert cache.get(("abc", "other")) is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_lru_eviction(self):
+        """Test least recently used entry is evicted at capacity."""
+        cache = TTLCache(max_size=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")  # "b" is now least recently used
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_ttl_expiry(self, monkeypatch):
+        """Test entries expire after ttl_seconds."""
+        import backend.utils.cache as cache_module
+
+        now = [1000.0]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+
+        cache = TTLCache(max_size=4, ttl_seconds=10)
+        cache.set("a", 1)
+        now[0] += 11
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_invalidate(self):
+        """Test invalidated keys are removed."""
+        cache = TTLCache(max_size=4, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.invalidate("a")
+
+        assert cache.get("a") is None
+
+
+class TestRoomDataCache:
+    """Tests for the read-through room response cache."""
+
+    @staticmethod
+    def _room(room_id="room_cache_test"):
+        obj = SimpleNamespace(
+            object_type="table",
+            position_x=1.0, position_y=2.0, position_z=0.375,
+            dimensions={"length": 1.2, "width": 0.8, "height": 0.75},
+            volume=0.72,
+            confidence=0.8
+        )
+        return SimpleNamespace(
+            room_id=room_id, length=5.0, width=4.0, height=2.6, accuracy="±2-5cm",
+            point_count=1000, processed_points=800, detected_objects=[obj],
+            updated_at=datetime(2024, 1, 1, 12, 0, 0, 250000)
+        )
+
+    def test_build_room_data(self):
+        """Test the built response and its pre-serialized JSON agree."""
+        cached = build_room_data(self._room())
+
+        assert cached.data.objects[0].position == [1.0, 2.0, 0.375]
+        assert cached.etag == room_etag("room_cache_test", datetime(2024, 1, 1, 12, 0, 0, 250000))
+        assert json.loads(cached.data_json) == cached.data.model_dump()
+        assert json.loads(cached.objects_json) == [o.model_dump() for o in cached.data.objects]
+
+    async def test_load_room_data_reads_through(self, monkeypatch):
+        """Test a miss loads from the repository once and later reads are hits."""
+        import backend.api.room_data as room_data_module
+
+        loads = []
+
+        class FakeRepository:
+            def __init__(self, session):
+                pass
+
+            async def get_room_with_objects(self, room_id):
+                loads.append(room_id)
+                return TestRoomDataCache._room(room_id) if room_id == "room_cache_test" else None
+
+        cache = TTLCache(max_size=4, ttl_seconds=60)
+        monkeypatch.setattr(room_data_module, "RoomRepository", FakeRepository)
+        monkeypatch.setattr(room_data_module, "room_cache", cache)
+
+        first = await load_room_data(None, "room_cache_test")
+        second = await load_room_data(None, "room_cache_test")
+
+        assert second is first
+        assert await load_room_data(None, "missing_room") is None
+        assert loads == ["room_cache_test", "missing_room"]
+        assert cache.stats()["hits"] == 1
+        assert len(cache) == 1
+
+    async def test_room_invalidated_after_commit(self, monkeypatch):
+        """Test a modified room stays cached until commit and is kept on rollback."""
+        from sqlalchemy.ext.asyncio import AsyncSession
+        import backend.database.repositories as repositories_module
+
+        cache = TTLCache(max_size=4, ttl_seconds=60)
+        monkeypatch.setattr(repositories_module, "room_cache", cache)
+        cache.set("room_1", "old")
+        cache.set("room_2", "old")
+        session = AsyncSession()
+
+        repositories_module.invalidate_room_on_commit(session, "room_1")
+        assert cache.get("room_1") == "old"
+        await session.commit()
+        assert cache.get("room_1") is None
+
+        await session.begin()
+        repositories_module.invalidate_room_on_commit(session, "room_2")
+        await session.rollback()
+        await session.commit()
+        assert cache.get("room_2") == "old"
+        await session.close()
+
+    def test_room_etag_changes_with_version(self):
+        """Test the ETag is strong, quoted and changes when updated_at does."""
+        updated_at = datetime(2024, 1, 1, 12, 0, 0)
+        etag = room_etag("room_1", updated_at)
+
+        assert etag.startswith('"room_1-') and etag.endswith('"')
+        assert room_etag("room_1", updated_at) == etag
+        assert room_etag("room_1", updated_at + timedelta(microseconds=1)) != etag
+
+    def test_etag_matches(self):
+        """Test If-None-Match lists, weak prefixes and the wildcard."""
+        etag = '"room_1-5"'
+
+        assert etag_matches('"room_1-5"', etag)
+        assert etag_matches('"room_1-4", "room_1-5"', etag)
+        assert etag_matches('W/"room_1-5"', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"room_1-4"', etag)
+
+
+class TestJobRecovery:
+    """Tests for re-queuing unfinished jobs on startup."""
+
+    async def test_recovery_respects_queue_capacity(self, tmp_path, monkeypatch):
+        """Test jobs beyond the free queue slots fail as queue full and lose their uploads."""
+        import asyncio
+        from contextlib import asynccontextmanager
+        import backend.api.job_queue as job_queue_module
+
+        uploads = []
+        for index in range(4):
+            path = tmp_path / f"scan_{index}.ply"
+            path.write_bytes(b"ply\n")
+            uploads.append(str(path))
+        jobs = [
+            SimpleNamespace(job_id=f"job_{index}", file_path=path, content_hash=None, params_hash=None)
+            for index, path in enumerate(uploads)
+        ]
+        jobs.append(SimpleNamespace(job_id="job_lost", file_path=str(tmp_path / "missing.ply"),
+                                    content_hash=None, params_hash=None))
+        updates = {}
+
+        class FakeRepository:
+            def __init__(self, session):
+                pass
+
+            async def get_unfinished_jobs(self):
+                return jobs
+
+            async def update_job(self, job_id, **fields):
+                updates[job_id] = fields
+
+        @asynccontextmanager
+        async def fake_session():
+            class Session:
+                async def commit(self):
+                    pass
+            yield Session()
+
+        monkeypatch.setattr(job_queue_module, "JobRepository", FakeRepository)
+        queue = job_queue_module.JobQueue(max_workers=1, max_queue_size=3)
+        queue.session_factory = fake_session
+        queue._queue = asyncio.Queue(maxsize=3)
+        queue._queue.put_nowait(("job_running", "scan.ply", None))
+
+        await queue._recover_jobs()
+
+        assert [queue._queue.get_nowait()[0] for _ in range(3)] == ["job_running", "job_0", "job_1"]
+        assert updates["job_0"]["status"] == updates["job_1"]["status"] == "queued"
+        for job_id in ("job_2", "job_3"):
+            assert updates[job_id]["status"] == "failed"
+            assert "queue full" in updates[job_id]["error"]
+        assert "Upload lost" in updates["job_lost"]["error"]
+        assert [os.path.exists(path) for path in uploads] == [True, True, False, False]
+        queue.executor.shutdown()